@@ -0,0 +1,126 @@
+"""
+pytest-benchmark suite for the forward/backward/cost/update hot paths and end-to-end training
+
+usage: pytest benchmarks/hot_paths.py [--benchmark-autosave] [--benchmark-compare] [-k forward]
+
+Every benchmark runs on synthetic data over a grid of layer widths, depths and batch sizes.
+"""
+import numpy as np
+from pytest import fixture, mark
+
+from nnlib.l_layer import LLayer
+from nnlib.l_layer.forward import model_forward
+from nnlib.l_layer.backward import model_backward
+from nnlib.l_layer.inference import model_predict
+from nnlib.l_layer.workspace import initialize_workspace
+from nnlib.utils.cost import cross_entropy
+from nnlib.utils.initialize import initialize_parameters
+from nnlib.utils.update import update_parameters
+
+
+NETWORKS = {
+        'cat': (12288, 7, 1),
+        'wide': (1024, 512, 1),
+        'deep': (256, 128, 128, 128, 128, 1),
+        }
+BATCH_SIZES = (64, 1024)
+
+
+@fixture(params=sorted(NETWORKS))
+def layers_dims(request):
+    return NETWORKS[request.param]
+
+
+@fixture(params=BATCH_SIZES)
+def data(request, layers_dims):
+    rand = np.random.RandomState(0)
+    X = rand.rand(layers_dims[0], request.param)
+    Y = (rand.rand(1, request.param) > 0.5).astype(int)
+
+    return X, Y
+
+
+@fixture
+def parameters(layers_dims):
+    np.random.seed(0)
+
+    return initialize_parameters(layers_dims, flat=True)
+
+
+@mark.parametrize('keep_prob', (1, 0.8))
+def test_model_forward(benchmark, data, parameters, keep_prob):
+    X, _ = data
+
+    benchmark(model_forward, X, parameters, keep_prob)
+
+
+def test_model_forward_workspace(benchmark, data, parameters, layers_dims):
+    X, _ = data
+    workspace = initialize_workspace(layers_dims, X.shape[1])
+
+    benchmark(model_forward, X, parameters, 0.8, workspace)
+
+
+@mark.parametrize('masks', ('legacy', 'bool', 'packed', 'seed'))
+def test_model_forward_masks(benchmark, data, parameters, masks):
+    X, _ = data
+    rng = None if masks == 'legacy' else np.random.default_rng(0)
+
+    benchmark(model_forward, X, parameters, 0.8, rng=rng, masks='bool' if masks == 'legacy' else masks)
+
+
+def test_model_predict(benchmark, data, parameters):
+    X, _ = data
+
+    benchmark(model_predict, X, parameters)
+
+
+def test_model_backward(benchmark, data, parameters):
+    X, Y = data
+    AL, caches = model_forward(X, parameters, 0.8)
+
+    benchmark(model_backward, AL, Y, parameters, caches, 0.1, 0.8)
+
+
+def test_model_backward_workspace(benchmark, data, parameters, layers_dims):
+    X, Y = data
+    workspace = initialize_workspace(layers_dims, X.shape[1])
+    AL, caches = model_forward(X, parameters, 0.8, workspace)
+
+    benchmark(model_backward, AL, Y, parameters, caches, 0.1, 0.8, workspace)
+
+
+def test_cross_entropy(benchmark, data, parameters):
+    X, Y = data
+    AL, _ = model_forward(X, parameters, 1)
+
+    benchmark(cross_entropy, AL, Y, parameters, 0.1)
+
+
+@mark.parametrize('flat', (False, True))
+def test_update_parameters(benchmark, parameters, layers_dims, flat):
+    X = np.random.RandomState(0).rand(layers_dims[0], 64)
+    Y = np.ones((1, 64))
+    if flat:
+        workspace = initialize_workspace(layers_dims, 64)
+        AL, caches = model_forward(X, parameters, 1, workspace)
+        grads = model_backward(AL, Y, parameters, caches, 0, 1, workspace)
+    else:
+        AL, caches = model_forward(X, parameters, 1)
+        grads = model_backward(AL, Y, parameters, caches, 0, 1)
+
+    benchmark(update_parameters, parameters, grads, 1e-9)
+
+
+@mark.parametrize('batch_size', (None, 256))
+@mark.parametrize('inplace', (False, True))
+def test_fit_params(benchmark, layers_dims, batch_size, inplace):
+    rand = np.random.RandomState(0)
+    X = rand.rand(layers_dims[0], 2048)
+    Y = (rand.rand(1, 2048) > 0.5).astype(int)
+
+    def fit():
+        LLayer().fit_params(X, Y, layers_dims, num_iterations=2, keep_prob=0.8, alpha=0.1, verbose=False,
+                            batch_size=batch_size, inplace=inplace)
+
+    benchmark.pedantic(fit, rounds=3)
@@ -0,0 +1,72 @@
+"""
+Latency and throughput of LLayer inference for batch sizes 1 to 4096
+
+usage: python benchmarks/inference.py [--layers-dims 12288 7 1] [--repeat 20]
+
+Compares the training forward pass (model_forward with keep_prob=1), the inference
+path (InferenceEngine.predict) and single-example requests micro-batched by
+InferenceEngine.submit from concurrent client threads.
+"""
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from nnlib.l_layer.forward import model_forward
+from nnlib.l_layer.inference import InferenceEngine
+from nnlib.utils.initialize import initialize_parameters
+
+
+def best_time(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--layers-dims', type=int, nargs='+', default=[12288, 7, 1])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=4096)
+    args = parser.parse_args()
+
+    np.random.seed(0)
+    parameters = initialize_parameters(args.layers_dims, flat=True)
+    engine = InferenceEngine(parameters)
+
+    print('batch size  model_forward ms  predict ms  predict samples/sec')
+    for m in 2 ** np.arange(13):
+        X = np.random.rand(args.layers_dims[0], m)
+        forward = best_time(lambda: model_forward(X, parameters, keep_prob=1), args.repeat)
+        predict = best_time(lambda: engine.predict(X), args.repeat)
+        print('{:10d}  {:16.3f}  {:10.3f}  {:19.0f}'.format(m, forward * 1e3, predict * 1e3, m / predict))
+
+    X = np.random.rand(args.layers_dims[0], args.requests)
+    per_client = args.requests // args.clients
+
+    def client(k, submit):
+        for i in range(k * per_client, (k+1) * per_client):
+            submit(X[:, i])
+
+    for name, submit in (('one request per pass', lambda x: engine.predict(x[:, None])),
+                         ('micro-batched', lambda x: engine.submit(x).result())):
+        threads = [threading.Thread(target=client, args=(k, submit)) for k in range(args.clients)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - start
+        print('{} clients, {}: {:.0f} requests/sec'.format(args.clients, name, per_client * args.clients / seconds))
+
+    engine.close()
+
+
+if __name__ == '__main__':
+    main()
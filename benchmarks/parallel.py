@@ -0,0 +1,50 @@
+"""
+Scaling of data-parallel training (LLayer.fit_params(processes=...)) from 1 to N cores
+
+usage: python benchmarks/parallel.py [--max-processes N] [--samples M] ...
+
+BLAS is limited to one thread per process unless --blas-threads is given,
+so the speedup measured comes from the worker processes alone.
+"""
+import argparse
+import os
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--max-processes', type=int, default=os.cpu_count())
+    parser.add_argument('--samples', type=int, default=20000)
+    parser.add_argument('--layers-dims', type=int, nargs='+', default=[1024, 256, 64, 1])
+    parser.add_argument('--batch-size', type=int, default=4096)
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--blas-threads', type=int, default=1)
+    args = parser.parse_args()
+
+    for variable in ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS'):
+        os.environ[variable] = str(args.blas_threads)
+
+    # imported after limiting BLAS threads, which only takes effect before numpy is loaded
+    import numpy as np
+    from nnlib.l_layer import LLayer
+
+    rand = np.random.RandomState(0)
+    X = rand.randn(args.layers_dims[0], args.samples)
+    Y = (rand.rand(1, args.samples) > 0.5).astype(int)
+
+    processes = 1
+    baseline = None
+    print('processes  seconds/epoch  samples/sec  speedup')
+    while processes <= args.max_processes:
+        model = LLayer()
+        start = time.perf_counter()
+        model.fit_params(X, Y, args.layers_dims, args.epochs, verbose=False, batch_size=args.batch_size,
+                         processes=processes if processes > 1 else None)
+        seconds = (time.perf_counter() - start) / args.epochs
+        baseline = baseline or seconds
+        print('{:9d}  {:13.3f}  {:11.0f}  {:7.2f}'.format(processes, seconds, args.samples / seconds, baseline / seconds))
+        processes *= 2
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Accuracy, size and latency of the cat model pruned to increasing sparsity
+
+usage: python benchmarks/pruning.py [--amounts 0 0.5 0.8 0.9 0.95 0.99] [--prune-every 50] [--repeat 50]
+
+For every fraction of weights removed, the (12288, 7, 1) model is trained on the cat dataset
+of the tests, pruned iteratively every --prune-every epochs, and its test accuracy, weight memory
+and prediction latency with dense and with sparse (CSR) weights are reported.
+"""
+import argparse
+import time
+from os import path
+
+import h5py
+import numpy as np
+
+from nnlib.l_layer import LLayer
+from nnlib.utils.prune import sparse_parameters, parameters_nbytes
+
+datasets = path.join(path.dirname(path.abspath(__file__)), '..', 'tests', 'datasets')
+
+
+def load(name):
+    with h5py.File(path.join(datasets, '{}_catvnoncat.h5'.format(name)), 'r') as f:
+        X = np.array(f['{}_set_x'.format(name)][:])
+        Y = np.array(f['{}_set_y'.format(name)][:]).reshape(1, -1)
+
+    return X.reshape(X.shape[0], -1).T / 255., Y
+
+
+def best_time(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--amounts', type=float, nargs='+', default=[0, 0.5, 0.8, 0.9, 0.95, 0.99])
+    parser.add_argument('--iterations', type=int, default=300)
+    parser.add_argument('--prune-every', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    train_x, train_y = load('train')
+    test_x, test_y = load('test')
+
+    print('pruned  test acc  dense KiB  sparse KiB  dense m=1 ms  sparse m=1 ms  dense m=50 ms  sparse m=50 ms')
+    for amount in args.amounts:
+        np.random.seed(1)
+        model = LLayer()
+        model.fit_params(train_x, train_y, layers_dims=(12288, 7, 1), num_iterations=args.iterations, verbose=False,
+                         learning_rate=0.0003, optimizer='adam', prune_amount=amount, prune_every=args.prune_every)
+        sparse = sparse_parameters(model.parameters)
+
+        times = []
+        for m in (1, 50):
+            X = np.ascontiguousarray(test_x[:, :m])
+            times.append(best_time(lambda: model.output(X), args.repeat))
+            times.append(best_time(lambda: model.output(X, sparse=True), args.repeat))
+        print('{:6.2f}  {:8.2f}  {:9.1f}  {:10.1f}  {:12.3f}  {:13.3f}  {:13.3f}  {:14.3f}'.format(
+            amount, model.verify_accuracy(test_x, test_y), parameters_nbytes(model.parameters) / 1024,
+            parameters_nbytes(sparse) / 1024, *(t * 1e3 for t in times)))
+
+
+if __name__ == '__main__':
+    main()
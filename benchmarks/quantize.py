@@ -0,0 +1,80 @@
+"""
+Accuracy, size and throughput of the cat model with float and int8 weights
+
+usage: python benchmarks/quantize.py [--layers-dims 12288 7 1] [--iterations 300] [--repeat 20]
+
+The model is trained on the cat dataset of the tests, quantized with scales calibrated
+on --calibration training examples, and its train and test accuracies, weight memory and
+prediction throughput for batch sizes 1 to 1024 are reported for the float64 weights,
+float32 weights and int8 weights.
+"""
+import argparse
+import time
+from os import path
+
+import h5py
+import numpy as np
+
+from nnlib.l_layer import LLayer
+from nnlib.l_layer.inference import model_predict
+from nnlib.l_layer.quantize import quantized_predict, quantized_nbytes
+
+datasets = path.join(path.dirname(path.abspath(__file__)), '..', 'tests', 'datasets')
+
+
+def load(name):
+    with h5py.File(path.join(datasets, '{}_catvnoncat.h5'.format(name)), 'r') as f:
+        X = np.array(f['{}_set_x'.format(name)][:])
+        Y = np.array(f['{}_set_y'.format(name)][:]).reshape(1, -1)
+
+    return X.reshape(X.shape[0], -1).T / 255., Y
+
+
+def best_time(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--layers-dims', type=int, nargs='+', default=[12288, 7, 1])
+    parser.add_argument('--iterations', type=int, default=300)
+    parser.add_argument('--calibration', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    train_x, train_y = load('train')
+    test_x, test_y = load('test')
+
+    np.random.seed(1)
+    model = LLayer()
+    model.fit_params(train_x, train_y, layers_dims=args.layers_dims, num_iterations=args.iterations, verbose=False,
+                     learning_rate=0.0003, optimizer='adam')
+    quantized = model.quantize(train_x[:, :args.calibration])
+    float32 = {key: {l: value.astype(np.float32) for l, value in model.parameters[key].items()} for key in ('W', 'b')}
+
+    print('weights  train acc  test acc  KiB')
+    for name, flag in (('float64', False), ('int8', True)):
+        print('{:7s}  {:9.3f}  {:8.3f}  {:.1f}'.format(
+            name, model.verify_accuracy(train_x, train_y, quantized=flag),
+            model.verify_accuracy(test_x, test_y, quantized=flag),
+            (quantized_nbytes(quantized) if flag else model.parameters['flat'].nbytes) / 1024))
+
+    print('batch size  float64 samples/sec  float32 samples/sec  int8 samples/sec')
+    X = np.tile(train_x, 5)
+    for m in 4 ** np.arange(6):
+        X_batch = np.ascontiguousarray(X[:, :m])
+        X_batch32 = X_batch.astype(np.float32)
+        times = (best_time(lambda: model_predict(X_batch, model.parameters, activations=model.activations), args.repeat),
+                 best_time(lambda: model_predict(X_batch32, float32, activations=model.activations), args.repeat),
+                 best_time(lambda: quantized_predict(X_batch, quantized, model.activations), args.repeat))
+        print('{:10d}  {:19.0f}  {:19.0f}  {:16.0f}'.format(m, *(m / t for t in times)))
+
+
+if __name__ == '__main__':
+    main()
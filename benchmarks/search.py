@@ -0,0 +1,64 @@
+"""
+Hyperparameter search on the cat dataset, and its wall time for different splits of the cores
+
+usage: python benchmarks/search.py [--strategy halving] [--trials 27] [--iterations 270] [--splits 1x4 2x2 4x1]
+
+Every split PxT runs the same search with P worker processes of T BLAS threads each and reports
+its wall time and the leaderboard of the first split; with one thread per worker the cores are
+used by the processes alone, which usually wins for models as small as the cat model.
+"""
+import argparse
+import os
+import time
+from os import path
+
+import h5py
+import numpy as np
+
+from nnlib.l_layer.search import search, format_leaderboard, log_uniform
+
+datasets = path.join(path.dirname(path.abspath(__file__)), '..', 'tests', 'datasets')
+
+
+def load(name):
+    with h5py.File(path.join(datasets, '{}_catvnoncat.h5'.format(name)), 'r') as f:
+        X = np.array(f['{}_set_x'.format(name)][:])
+        Y = np.array(f['{}_set_y'.format(name)][:]).reshape(1, -1)
+
+    return X.reshape(X.shape[0], -1).T / 255., Y
+
+
+def main():
+    cpus = os.cpu_count()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--strategy', default='halving', choices=('grid', 'random', 'halving'))
+    parser.add_argument('--trials', type=int, default=27)
+    parser.add_argument('--iterations', type=int, default=270)
+    parser.add_argument('--splits', nargs='+', default=['{}x1'.format(cpus), '1x{}'.format(cpus)],
+                        help='processes x BLAS threads per process')
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    train_x, train_y = load('train')
+    test_x, test_y = load('test')
+    space = dict(learning_rate=log_uniform(1e-4, 3e-3), alpha=[0, 0.1, 0.3, 1], keep_prob=[0.8, 0.9, 1],
+                 layers_dims=[(12288, 7, 1), (12288, 20, 7, 1)])
+    if args.strategy == 'grid':
+        space['learning_rate'] = [1e-4, 3e-4, 1e-3]
+
+    print('processes  BLAS threads  seconds')
+    for k, split in enumerate(args.splits):
+        processes, threads = (int(n) for n in split.split('x'))
+        start = time.perf_counter()
+        leaderboard = search(space, train_x, train_y, args.iterations, strategy=args.strategy, n_trials=args.trials,
+                             validation_data=(test_x, test_y), processes=processes, blas_threads=threads,
+                             verbose=False, optimizer='adam')
+        print('{:9d}  {:12d}  {:7.1f}'.format(processes, threads, time.perf_counter() - start))
+        if k == 0:
+            board = format_leaderboard(leaderboard, args.top)
+
+    print(board)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Load test of the multi-process inference server
+
+usage: python benchmarks/server.py [--layers-dims 12288 7 1] [--processes 1 2 4] [--clients 16] [--batch 1]
+
+For every number of server processes, client processes send --requests requests of --batch
+examples each over keep-alive connections and the throughput and latency percentiles are
+reported, along with the private memory of the workers (Linux only) which should not grow
+with the size of the weights since they are shared.
+"""
+import argparse
+import multiprocessing as mp
+import time
+
+import numpy as np
+
+from nnlib.l_layer.server import InferenceServer, InferenceClient
+from nnlib.utils.initialize import initialize_parameters
+
+
+def private_memory(pid):
+    try:
+        with open('/proc/{}/smaps_rollup'.format(pid)) as f:
+            fields = dict(line.split(':', 1) for line in f if ':' in line)
+    except OSError:
+        return float('nan')
+
+    return sum(int(fields[key].split()[0]) for key in ('Private_Clean', 'Private_Dirty')) / 1024
+
+
+def client(address, X, requests, batch, latencies):
+    connection = InferenceClient(address)
+    times = []
+    for k in range(requests):
+        start = time.perf_counter()
+        connection.predict(X[:, (k * batch) % X.shape[1]:][:, :batch])
+        times.append(time.perf_counter() - start)
+    connection.close()
+    latencies.put(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--layers-dims', type=int, nargs='+', default=[12288, 7, 1])
+    parser.add_argument('--processes', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=200, help='requests per client')
+    parser.add_argument('--batch', type=int, default=1, help='examples per request')
+    args = parser.parse_args()
+
+    np.random.seed(0)
+    parameters = initialize_parameters(args.layers_dims, flat=True)
+    X = np.random.rand(args.layers_dims[0], 1024)
+    context = mp.get_context('fork')
+    print('weights: {:.1f} MiB'.format(parameters['flat'].nbytes / 2**20))
+    print('processes  requests/sec  examples/sec  p50 ms  p99 ms  private MiB per worker')
+
+    for processes in args.processes:
+        with InferenceServer(parameters, processes=processes) as server:
+            # warm up every worker before measuring
+            for _ in range(2 * processes):
+                InferenceClient(server.address).predict(X[:, :1])
+
+            latencies = context.Queue()
+            clients = [context.Process(target=client, args=(server.address, X, args.requests, args.batch, latencies))
+                       for _ in range(args.clients)]
+            start = time.perf_counter()
+            for process in clients:
+                process.start()
+            times = np.concatenate([latencies.get() for _ in clients])
+            seconds = time.perf_counter() - start
+            for process in clients:
+                process.join()
+
+            memory = np.mean([private_memory(worker.pid) for worker in server.workers])
+            print('{:9d}  {:12.0f}  {:12.0f}  {:6.2f}  {:6.2f}  {:22.1f}'.format(
+                processes, len(times) / seconds, len(times) * args.batch / seconds,
+                np.percentile(times, 50) * 1e3, np.percentile(times, 99) * 1e3, memory))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""
+Training time of K models stacked in one StackedLLayer against K LLayer trainings
+
+usage: python benchmarks/stacked.py [--layers-dims 12288 7 1] [--models 1 2 4 8 16] [--iterations 100]
+
+Every model trains on the cat dataset of the tests with adam; the sequential time is measured
+once for a single LLayer and multiplied by K.
+"""
+import argparse
+import time
+from os import path
+
+import h5py
+import numpy as np
+
+from nnlib.l_layer import LLayer
+from nnlib.l_layer.stacked import StackedLLayer
+
+datasets = path.join(path.dirname(path.abspath(__file__)), '..', 'tests', 'datasets')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--layers-dims', type=int, nargs='+', default=[12288, 7, 1])
+    parser.add_argument('--models', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    parser.add_argument('--iterations', type=int, default=100)
+    args = parser.parse_args()
+
+    with h5py.File(path.join(datasets, 'train_catvnoncat.h5'), 'r') as f:
+        X = np.array(f['train_set_x'][:])
+        Y = np.array(f['train_set_y'][:]).reshape(1, -1)
+    X = X.reshape(X.shape[0], -1).T / 255.
+
+    np.random.seed(1)
+    start = time.perf_counter()
+    LLayer().fit_params(X, Y, args.layers_dims, args.iterations, verbose=False, learning_rate=0.0003, optimizer='adam')
+    single = time.perf_counter() - start
+
+    print('models  stacked seconds  sequential seconds  speedup  best train acc')
+    for K in args.models:
+        np.random.seed(1)
+        model = StackedLLayer()
+        start = time.perf_counter()
+        model.fit_params(X, Y, args.layers_dims, args.iterations, K, verbose=False, optimizer='adam',
+                         learning_rate=np.geomspace(1e-4, 3e-3, K))
+        seconds = time.perf_counter() - start
+        print('{:6d}  {:15.2f}  {:18.2f}  {:7.2f}  {:14.3f}'.format(
+            K, seconds, K * single, K * single / seconds, np.max(model.verify_accuracy(X, Y))))
+
+
+if __name__ == '__main__':
+    main()
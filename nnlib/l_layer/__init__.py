@@ -1,10 +1,45 @@
+import os
+
 import numpy as np
 
+from nnlib.utils.checkpoint import save_checkpoint, load_checkpoint
+from nnlib.utils.flat import flat_views
 from nnlib.utils.initialize import initialize_parameters
-from nnlib.utils.update import update_parameters
-from nnlib.utils.cost import cross_entropy
+from nnlib.utils.update import (update_parameters, update_parameters_with_momentum, update_parameters_with_rmsprop,
+                                update_parameters_with_adam, initialize_velocity)
+from nnlib.utils.cost import output_cost, l2_penalty
+from nnlib.utils.batch import batch_indices
+from nnlib.utils.dataset import Dataset, columns
+from nnlib.utils.sparse import issparse
+from nnlib.utils.prune import prune_masks, apply_masks, sparse_parameters
+from nnlib.utils.prefetch import prefetch as prefetched
+from nnlib.utils.layers import ACTIVATIONS, layer_activations
 from nnlib.l_layer.forward import model_forward
 from nnlib.l_layer.backward import model_backward
+from nnlib.l_layer.workspace import initialize_workspace
+from nnlib.l_layer.parallel import DataParallel
+from nnlib.l_layer.inference import model_predict
+from nnlib.l_layer.quantize import CALIBRATION_SIZE, quantize_parameters, quantized_predict
+
+
+# hyperparameters, optimizer state and training history written by save, restored by load
+SAVED_ATTRIBUTES = ("learning_rate", "alpha", "keep_prob", "batch_size", "optimizer", "beta1", "beta2", "epsilon",
+                    "recompute_every", "dropout_masks", "t", "epoch", "costs", "cost_iterations", "validation_costs",
+                    "validation_accuracies", "validation_iterations", "best_validation_cost", "best_iteration",
+                    "stopped_iteration", "sparsity")
+
+# attributes of a model that was not trained by fit_params, see LLayer.load
+INFERENCE_DEFAULTS = dict(learning_rate=0.0075, alpha=0, keep_prob=1, batch_size=None, optimizer="gd", beta1=0.9,
+                          beta2=0.999, epsilon=1e-8, recompute_every=None, dropout_masks="bool", t=0, epoch=-1,
+                          costs=[], cost_iterations=[], validation_costs=[], validation_accuracies=[],
+                          validation_iterations=[], best_validation_cost=None, best_iteration=None,
+                          stopped_iteration=None, finished=False, sparsity=0, v=None, s=None, rng=None,
+                          _best_parameters=None, _sparse_parameters=None, _quantized=None)
+
+
+def _number(value, kind):
+    # numpy scalars are not JSON serializable, see save
+    return None if value is None else kind(value)
 
 
 class LLayer:
@@ -12,20 +47,27 @@ class LLayer:
     Simple model of arbitrary depth and complexity
     """
 
-    def fit_params(self, X, Y, layers_dims, num_iterations, learning_rate=0.0075, alpha=0, keep_prob=1, verbose=True):
+    def fit_params(self, X, Y, layers_dims, num_iterations, learning_rate=0.0075, alpha=0, keep_prob=1, verbose=True,
+                   batch_size=None, shuffle=True, inplace=False, dtype=np.float64, processes=None,
+                   prefetch=0, optimizer="gd", beta1=0.9, beta2=None, epsilon=1e-8, lr_schedule=None,
+                   hooks=None, cost_every=1, activations=None, recompute_every=None, dropout_seed=None,
+                   dropout_masks="bool", checkpoint_path=None, checkpoint_every=None, resume=False,
+                   validation_data=None, validation_every=1, patience=None, min_delta=0, restore_best=True,
+                   prune_amount=0, prune_every=None, prune_scope="global"):
         """
         fits model to parameters X, Y
 
         Arguments:
 
-        X -- input of shape (num_features, m)
+        X -- input of shape (num_features, m), numpy array, Dataset for inputs read from disk
+        or scipy.sparse matrix (converted to CSC) so the input layer only touches the nonzeros
 
-        Y -- labels for data of shape (m, 1)
+        Y -- labels for data of shape (1, m), integer class labels when the last activation is softmax
 
         layers_dims -- len(layers_dims) determines depth of network,
         layer_dims[l] determines number of nodes in layer l
 
-        num_iterations -- number of iterations to run the train
+        num_iterations -- number of passes (epochs) over the training data
 
         learning_rate -- learning rate of gradient descent
 
@@ -34,40 +76,514 @@ class LLayer:
         keep_prob -- dropout probability
 
         verbose -- print cost every 20 iterations
+
+        batch_size -- number of examples per parameter update, None for full batch gradient descent
+
+        shuffle -- reshuffle the examples every epoch when training in mini-batches
+
+        inplace -- reuse preallocated activation and gradient buffers on every iteration
+
+        dtype -- floating point type inputs are stored in, np.float32 halves memory traffic,
+        np.float16 stores inputs in half precision while parameters and computations use np.float32
+
+        processes -- split every batch across this many worker processes and average their gradients,
+        see nnlib.l_layer.parallel
+
+        prefetch -- number of batches read, converted and sliced ahead in a background thread, 0 to disable
+
+        optimizer -- "gd", "momentum", "rmsprop" or "adam", see nnlib.utils.update
+
+        beta1 -- decay of the moving average of the gradients (momentum and adam)
+
+        beta2 -- decay of the moving average of the squared gradients, defaults to 0.9 for rmsprop and 0.999 for adam
+
+        epsilon -- avoids division by zero in rmsprop and adam
+
+        lr_schedule -- function (learning_rate, epoch) -> learning rate of the epoch, see nnlib.utils.schedule
+
+        hooks -- optional object notified around every layer of the forward and backward passes and around
+        every training step, cost, update, validation and checkpoint, e.g. nnlib.utils.profiler.Profiler;
+        with processes the layers run in the worker processes and only the phases of fit_params are notified
+
+        cost_every -- compute the cost every cost_every epochs only, None or 0 to never compute it,
+        the epochs evaluated are recorded in cost_iterations
+
+        activations -- activation names of layers 1..L among nnlib.utils.layers.ACTIVATIONS,
+        e.g. ("tanh", "tanh", "sigmoid"), defaults to relu for hidden layers and sigmoid for the last;
+        with softmax last, layers_dims[-1] is the number of classes and the cost is the categorical cross-entropy
+
+        recompute_every -- activation checkpointing, keep the activations of every recompute_every-th layer only
+        and recompute the others during backward propagation, trades compute for memory in deep networks,
+        cannot be combined with inplace or processes which preallocate every layer
+
+        dropout_seed -- seed of a np.random.Generator (PCG64) drawing the dropout masks,
+        None to draw them from the global np.random state; cannot be combined with processes
+
+        dropout_masks -- how dropout masks are kept between forward and backward propagation,
+        "bool" arrays, "packed" 8 per byte or "seed" to redraw them from a seed per layer and step,
+        see nnlib.utils.dropout; the compact forms cannot be combined with inplace or processes
+
+        checkpoint_path -- file the model is saved to (see save) every checkpoint_every epochs and after the last one,
+        the parameters of the last epoch are kept for resume and load returns the best ones of a finished training
+
+        checkpoint_every -- number of epochs between checkpoints, None to save after the last epoch only
+
+        resume -- continue from the checkpoint at checkpoint_path if it exists: parameters, optimizer state,
+        costs and random states are restored and training resumes at the epoch after the saved one
+
+        validation_data -- tuple (X_val, Y_val) evaluated every validation_every epochs, the costs and accuracies
+        are recorded in validation_costs, validation_accuracies and validation_iterations
+
+        validation_every -- number of epochs between validations
+
+        patience -- stop training after this many validations without improvement, None to never stop early
+
+        min_delta -- smallest decrease of the validation cost counted as an improvement
+
+        restore_best -- end training with the parameters of the best validation instead of the last epoch's
+
+        prune_amount -- fraction of the weights removed by magnitude pruning, see nnlib.utils.prune;
+        pruned weights stay zero for the rest of training and predict(X, sparse=True) skips them
+
+        prune_every -- iterative pruning: every prune_every epochs the smallest weights are removed, the fraction
+        growing linearly to prune_amount at epoch (num_iterations // prune_every) * prune_every, and the remaining
+        weights retrain in between; None to prune once after the last epoch; the best validation is only tracked
+        among models of the latest pruning round; training stopped early by patience prunes the parameters of the
+        best validation to prune_amount at once
+
+        prune_scope -- "global" to rank the weights of all layers together or "layer" to prune every layer alike
         """
 
-        self.X = X
+        if optimizer not in ("gd", "momentum", "rmsprop", "adam"):
+            raise ValueError("unknown optimizer " + str(optimizer))
+        if recompute_every and (inplace or processes):
+            raise ValueError("recompute_every cannot be combined with inplace or processes")
+        if dropout_masks != "bool" and (inplace or processes):
+            raise ValueError("dropout_masks " + str(dropout_masks) + " cannot be combined with inplace or processes")
+        if dropout_seed is not None and processes:
+            raise ValueError("dropout_seed cannot be combined with processes, whose workers draw their own masks")
+        if prune_amount and prune_every and not 0 < prune_every <= num_iterations:
+            raise ValueError("prune_every must be between 1 and num_iterations, got " + str(prune_every))
+
+        self.dtype = np.dtype(dtype)
+        self.compute_dtype = np.promote_types(self.dtype, np.float32)
+        if issparse(X):
+            # examples are columns, selecting batches of columns is cheap in CSC
+            X = X.tocsc()
+        self.X = X if isinstance(X, Dataset) else X.astype(self.dtype, copy=False)
         self.Y = Y
         self.layers_dims = layers_dims
-        self.parameters = initialize_parameters(layers_dims)
-        self.learning_rate = learning_rate,
+        self.activations = layer_activations(activations, len(layers_dims)-1)
+        self.parameters = initialize_parameters(layers_dims, flat=True, dtype=self.compute_dtype)
+        self.learning_rate = learning_rate
         self.alpha = alpha
         self.keep_prob = keep_prob
+        self.batch_size = batch_size
+        self.optimizer = optimizer
+        self.beta1 = beta1
+        self.beta2 = beta2 if beta2 is not None else 0.9 if optimizer == "rmsprop" else 0.999
+        self.epsilon = epsilon
+        self.hooks = hooks
+        self.recompute_every = recompute_every
+        self.dropout_masks = dropout_masks
+        self.rng = None
+        if dropout_seed is not None or dropout_masks == "seed":
+            # without an explicit seed, np.random.seed still makes the run reproducible
+            self.rng = np.random.default_rng(dropout_seed if dropout_seed is not None else np.random.randint(2**31))
         self.costs = []
+        self.cost_iterations = []
+        m = X.shape[1]
+        self._workspaces = {} if inplace else None
+        self._trainer = None
+
+        if processes:
+            self._trainer = DataParallel(self.parameters, layers_dims, self.X, self.Y, self.keep_prob, processes,
+                                         self.activations)
+            self.parameters = self._trainer.parameters
+
+        # optimizer state, preallocated once and updated in place
+        self.v = initialize_velocity(self.parameters) if optimizer in ("momentum", "adam") else None
+        self.s = initialize_velocity(self.parameters) if optimizer in ("rmsprop", "adam") else None
+        self.t = 0
+        self.epoch = -1
+        self.validation_costs = []
+        self.validation_accuracies = []
+        self.validation_iterations = []
+        self.best_validation_cost = None
+        self.best_iteration = None
+        self.stopped_iteration = None
+        self.finished = False
+        self._best_parameters = None
+        self.sparsity = 0
+        self._prune_masks = None
+        self._sparse_parameters = None
+        self._quantized = None
+        # rounds of pruning at the end of every prune_period-th epoch, a single one after the last epoch by default
+        prune_period = prune_every or num_iterations
+        prune_rounds = num_iterations // prune_period if prune_amount else 0
+
+        if resume and checkpoint_path and os.path.exists(checkpoint_path):
+            self._restore(*load_checkpoint(checkpoint_path))
+
+        try:
+            for i in range(self.epoch+1 if self.stopped_iteration is None else num_iterations, num_iterations):
+                epoch_learning_rate = learning_rate if lr_schedule is None else lr_schedule(learning_rate, i)
+                evaluate = bool(cost_every) and i % cost_every == 0
+                cost = 0
+                # indices are drawn here so shuffling does not depend on the timing of the prefetch thread
+                indices = list(batch_indices(m, batch_size, shuffle))
+                batches = self._batches(indices, read_X=self._trainer is None)
+                if prefetch:
+                    batches = prefetched(batches, prefetch)
+                for index, X_batch, Y_batch in batches:
+                    m_batch = Y_batch.shape[1]
+                    self._begin("step")
+                    grads, batch_cost = self._gradients(index, X_batch, Y_batch, evaluate)
+                    self._update(grads, epoch_learning_rate)
+                    if evaluate:
+                        # running estimate from the outputs of the forward passes already computed
+                        cost += batch_cost * m_batch / m
+                    self._end("step", samples=m_batch)
+                if evaluate:
+                    # the l2 term of every batch, summed once with the weights at the end of the epoch
+                    self._begin("cost")
+                    cost += len(indices) * l2_penalty(self.parameters, self.alpha, m)
+                    self._end("cost")
+                    self.costs.append(cost)
+                    self.cost_iterations.append(i)
+                    if verbose and i % 20 == 0:
+                        print(str(i), 'iterations:', str(cost))
+                if prune_rounds and (i+1) % prune_period == 0 and (i+1) // prune_period <= prune_rounds:
+                    self._prune(prune_amount * ((i+1) // prune_period) / prune_rounds, prune_scope)
+                if validation_data is not None and i % validation_every == 0:
+                    self._begin("validation")
+                    if self._validate(i, *validation_data, patience, min_delta, restore_best):
+                        self.stopped_iteration = i
+                        if verbose:
+                            print('stopped after', str(i), 'iterations, best validation at', str(self.best_iteration))
+                    self._end("validation", samples=validation_data[1].shape[1])
+                    if self.stopped_iteration is not None and prune_rounds and (i+1) // prune_period < prune_rounds:
+                        # the rounds left are never reached, the best model so far is pruned to the full amount
+                        if self._best_parameters is not None:
+                            self.parameters["flat"][...] = self._best_parameters
+                        self._prune(prune_amount, prune_scope)
+                self.epoch = i
+                self.finished = i == num_iterations-1 or self.stopped_iteration is not None
+                if checkpoint_path and ((checkpoint_every and (i+1) % checkpoint_every == 0) or self.finished):
+                    self._begin("checkpoint")
+                    self.save(checkpoint_path)
+                    self._end("checkpoint", nbytes=self.parameters["flat"].nbytes)
+                if self.stopped_iteration is not None:
+                    break
+            if self._best_parameters is not None:
+                self.parameters["flat"][...] = self._best_parameters
+        finally:
+            if self._trainer:
+                self._trainer.close()
+                self._trainer = None
+
+    def _prune(self, amount, scope):
+        self._prune_masks = prune_masks(self.parameters, amount, scope)
+        apply_masks(self.parameters, self._prune_masks)
+        self.sparsity = amount
+        # models of an earlier round have more weights, only models of this round compete for the best validation
+        self.best_validation_cost = None
+        self.best_iteration = None
+        self._best_parameters = None
+
+    def _validate(self, i, X_val, Y_val, patience, min_delta, restore_best):
+        # records the validation of epoch i, returns whether training should stop
+        AL, ZL = self._logits(X_val)
+        cost = output_cost(AL, ZL, Y_val, self.parameters, 0, self.activations[len(self.activations)])
+        self.validation_costs.append(float(cost))
+        self.validation_accuracies.append(float(np.mean(self._labels(AL) == Y_val)))
+        self.validation_iterations.append(i)
+
+        # a diverged model is never an improvement, nor the best
+        improved = np.isfinite(cost) and (self.best_validation_cost is None
+                                          or cost < self.best_validation_cost - min_delta)
+        if improved:
+            self.best_validation_cost = float(cost)
+            self.best_iteration = i
+            if restore_best:
+                if self._best_parameters is None:
+                    self._best_parameters = np.empty_like(self.parameters["flat"])
+                self._best_parameters[...] = self.parameters["flat"]
+            return False
+
+        if self.best_iteration is None:
+            waited = len(self.validation_iterations)
+        else:
+            waited = sum(1 for k in self.validation_iterations if k > self.best_iteration)
+        return patience is not None and waited >= patience
+
+    def save(self, path):
+        """
+        Save the parameters, layer dimensions, hyperparameters, optimizer state, costs and random states
+        to a single binary file, see nnlib.utils.checkpoint
+
+        Arguments:
+
+        path -- file to write, replaced atomically
+        """
+
+        arrays = dict(parameters=self.parameters["flat"])
+        for key in ("v", "s"):
+            if getattr(self, key, None) is not None:
+                arrays[key] = getattr(self, key)["flat"]
+        _, keys, position, has_gauss, cached_gaussian = np.random.get_state()
+        arrays["random_keys"] = keys
+        if getattr(self, "_best_parameters", None) is not None:
+            arrays["best_parameters"] = self._best_parameters
+
+        meta = dict(
+                layers_dims=[int(n) for n in self.layers_dims],
+                activations=[self.activations[l] for l in sorted(self.activations)],
+                dtype=self.dtype.str,
+                compute_dtype=np.dtype(self.compute_dtype).str,
+                learning_rate=_number(self.learning_rate, float),
+                alpha=_number(self.alpha, float),
+                keep_prob=_number(self.keep_prob, float),
+                batch_size=_number(self.batch_size, int),
+                optimizer=self.optimizer,
+                beta1=_number(self.beta1, float),
+                beta2=_number(self.beta2, float),
+                epsilon=_number(self.epsilon, float),
+                recompute_every=_number(self.recompute_every, int),
+                dropout_masks=self.dropout_masks,
+                t=int(self.t),
+                epoch=int(self.epoch),
+                costs=[float(cost) for cost in self.costs],
+                cost_iterations=self.cost_iterations,
+                validation_costs=self.validation_costs,
+                validation_accuracies=self.validation_accuracies,
+                validation_iterations=self.validation_iterations,
+                best_validation_cost=self.best_validation_cost,
+                best_iteration=self.best_iteration,
+                stopped_iteration=self.stopped_iteration,
+                finished=bool(getattr(self, "finished", False)),
+                sparsity=float(self.sparsity),
+                random_state=[position, has_gauss, cached_gaussian],
+                rng_state=None if self.rng is None else self.rng.bit_generator.state,
+                )
 
-        for i in range(0, num_iterations):
-            AL, caches = model_forward(self.X, self.parameters, self.keep_prob)
-            grads = model_backward(AL, self.Y, self.parameters, caches, self.alpha, self.keep_prob)
+        save_checkpoint(path, arrays, meta)
+
+    @classmethod
+    def load(cls, path, mmap=False):
+        """
+        Model saved by save, ready for output, predict and verify_accuracy
+
+        A checkpoint written at the end of a training that tracked the best validation holds the parameters
+        of the last epoch to resume from and the best ones, which are the ones returned as fit_params does.
+
+        Arguments:
+
+        path -- file written by save
+
+        mmap -- map the parameters read-only from the file instead of reading them, for inference workers
+        sharing one copy of the weights
+
+        Returns:
+
+        model -- LLayer with the saved parameters and hyperparameters
+        """
+
+        arrays, meta = load_checkpoint(path, mmap)
+        layers_dims = tuple(meta["layers_dims"])
+        best = meta.get("finished", False) and "best_parameters" in arrays
+        model = cls._from_parameters(
+                flat_views(arrays["best_parameters" if best else "parameters"], layers_dims), layers_dims,
+                meta["activations"], meta["dtype"],
+                v=flat_views(arrays["v"], layers_dims, keys=("dW", "db")) if "v" in arrays else None,
+                s=flat_views(arrays["s"], layers_dims, keys=("dW", "db")) if "s" in arrays else None,
+                finished=meta.get("finished", False),
+                **{key: meta[key] for key in SAVED_ATTRIBUTES})
+
+        return model
+
+    @classmethod
+    def _from_parameters(cls, parameters, layers_dims, activations, dtype, **attributes):
+        # model of trained parameters for inference and save, the attributes not given keep their defaults
+        model = cls()
+        model.layers_dims = tuple(layers_dims)
+        model.activations = layer_activations(activations, len(model.layers_dims)-1)
+        model.dtype = np.dtype(dtype)
+        model.compute_dtype = parameters["flat"].dtype
+        model.parameters = parameters
+        for key, value in dict(INFERENCE_DEFAULTS, **attributes).items():
+            # the default lists are never shared between models
+            setattr(model, key, list(value) if isinstance(value, list) else value)
+
+        return model
+
+    def _restore(self, arrays, meta):
+        if tuple(meta["layers_dims"]) != tuple(self.layers_dims):
+            raise ValueError("checkpoint has layers_dims " + str(meta["layers_dims"]) + ", expected "
+                             + str(tuple(self.layers_dims)))
+        if meta["optimizer"] != self.optimizer:
+            raise ValueError("checkpoint was trained with optimizer " + str(meta["optimizer"]))
+
+        # copied into the existing buffers, which may be shared with worker processes
+        self.parameters["flat"][...] = arrays["parameters"]
+        for key in ("v", "s"):
+            if getattr(self, key) is not None:
+                getattr(self, key)["flat"][...] = arrays[key]
+        self.t = meta["t"]
+        self.epoch = meta["epoch"]
+        self.costs = meta["costs"]
+        self.cost_iterations = meta["cost_iterations"]
+        for key in ("validation_costs", "validation_accuracies", "validation_iterations", "best_validation_cost",
+                    "best_iteration", "stopped_iteration", "sparsity"):
+            setattr(self, key, meta[key])
+        if self.sparsity:
+            # the pruned weights are the zeros, no trained weight is exactly zero
+            self._prune_masks = {l: Wl != 0 for l, Wl in self.parameters["W"].items()}
+        if "best_parameters" in arrays:
+            self._best_parameters = np.array(arrays["best_parameters"])
+        np.random.set_state(("MT19937", arrays["random_keys"], *meta["random_state"]))
+        if self.rng is not None and meta["rng_state"] is not None:
+            self.rng.bit_generator.state = meta["rng_state"]
+
+    def _begin(self, phase):
+        if self.hooks is not None:
+            self.hooks.begin(phase)
+
+    def _end(self, phase, **stats):
+        if self.hooks is not None:
+            self.hooks.end(phase, **stats)
+
+    def _gradients(self, index, X_batch, Y_batch, evaluate=True):
+        if self._trainer:
+            return self._trainer.gradients(index, self.alpha)
+
+        m_batch = Y_batch.shape[1]
+        workspace = None
+        if self._workspaces is not None:
+            # one workspace per batch size, i.e. at most two with a smaller last batch
+            if m_batch not in self._workspaces:
+                self._workspaces[m_batch] = initialize_workspace(self.layers_dims, m_batch, self.compute_dtype)
+            workspace = self._workspaces[m_batch]
+
+        AL, caches = model_forward(X_batch, self.parameters, self.keep_prob, workspace, self.hooks, self.activations,
+                                   self.recompute_every, self.rng, self.dropout_masks)
+        grads = model_backward(AL, Y_batch, self.parameters, caches, self.alpha, self.keep_prob, workspace, self.hooks,
+                               fused=True, activations=self.activations)
+        cost = None
+        if evaluate:
+            self._begin("cost")
+            L = len(self.activations)
+            cost = output_cost(AL, caches["Z"][L], Y_batch, self.parameters, 0, self.activations[L])
+            self._end("cost", samples=m_batch)
+
+        return grads, cost
+
+    def _update(self, grads, learning_rate):
+        self._begin("update")
+        self.t += 1
+
+        if self.optimizer == "momentum":
+            update_parameters_with_momentum(self.parameters, grads, self.v, learning_rate, self.beta1)
+        elif self.optimizer == "rmsprop":
+            update_parameters_with_rmsprop(self.parameters, grads, self.s, learning_rate, self.beta2, self.epsilon)
+        elif self.optimizer == "adam":
+            update_parameters_with_adam(self.parameters, grads, self.v, self.s, self.t, learning_rate,
+                                        self.beta1, self.beta2, self.epsilon)
+        else:
             self.parameters = update_parameters(self.parameters, grads, learning_rate)
-            cost = cross_entropy(AL, self.Y, self.parameters, self.alpha)
-            self.costs.append(cost)
-            if verbose and i % 20 == 0:
-                print(str(i), 'iterations:', str(cost))
+        if self._prune_masks is not None:
+            # pruned weights stay zero, the others keep training
+            apply_masks(self.parameters, self._prune_masks)
+        self._end("update", flops=2*self.parameters["flat"].size)
+
+    def _batches(self, indices, read_X=True):
+        for index in indices:
+            X_batch = columns(self.X, index).astype(self.compute_dtype, copy=False) if read_X else None
+            yield index, X_batch, self.Y[:, index]
+
+    def quantize(self, X, percentile=100):
+        """
+        Quantize the trained weights to int8 for output, predict and verify_accuracy with quantized=True,
+        see nnlib.l_layer.quantize
+
+        Arguments:
+
+        X -- sample of the input data calibrating the scales of the inputs of every layer,
+        of a Dataset or a scipy.sparse matrix the first CALIBRATION_SIZE examples are read densely
+
+        percentile -- percentile of the absolute values of each layer's input mapped to the largest int8
+
+        Returns:
+
+        quantized -- dictionary of int8 weights, int32 biases and scales
+        """
+
+        if isinstance(X, Dataset) or issparse(X):
+            X = columns(X, slice(0, CALIBRATION_SIZE))
+            X = X.toarray() if issparse(X) else X
+        self._quantized = quantize_parameters(self.parameters, X.astype(self.compute_dtype, copy=False),
+                                              self.activations, percentile)
+
+        return self._quantized
+
+    def output(self, X, sparse=False, quantized=False):
+        """
+        output of the last layer for input X, a Dataset is read one chunk at a time,
+        sparse multiplies by the pruned weights stored as scipy.sparse matrices, see nnlib.utils.prune,
+        quantized by the int8 weights of quantize
+        """
+
+        if sparse and quantized:
+            raise ValueError("sparse and quantized weights cannot be combined")
+        if quantized and self._quantized is None:
+            raise ValueError("the model must be quantized first, see quantize")
+        if isinstance(X, Dataset):
+            return np.concatenate([self.output(X_chunk, sparse, quantized) for X_chunk in X.chunks()], axis=1)
+
+        if quantized:
+            return quantized_predict(X, self._quantized, self.activations)
+
+        parameters = self.parameters
+        if sparse:
+            if self._sparse_parameters is None:
+                self._sparse_parameters = sparse_parameters(self.parameters)
+            parameters = self._sparse_parameters
+
+        return model_predict(X.astype(self.compute_dtype, copy=False), parameters, activations=self.activations)
+
+    def _logits(self, X):
+        # outputs and pre-activations of the last layer, the costs are computed from the latter
+        if isinstance(X, Dataset):
+            chunks = [self._logits(X_chunk) for X_chunk in X.chunks()]
+            return tuple(np.concatenate(arrays, axis=1) for arrays in zip(*chunks))
+
+        ZL = model_predict(X.astype(self.compute_dtype, copy=False), self.parameters, activations=self.activations,
+                           logits=True)
+        AL = ACTIVATIONS[self.activations[len(self.activations)]][0](ZL)
+
+        return AL, ZL
+
+    def _labels(self, AL):
+        if self.activations[len(self.activations)] == "softmax":
+            # most probable class of each example, shaped like the integer labels
+            return np.argmax(AL, axis=0).reshape(1, -1)
+
+        return AL >= 0.5
 
     def verify_cost(self, X_test, Y_test):
-        AL, _ = model_forward(X_test, self.parameters, keep_prob=1)
-        cost = cross_entropy(AL, Y_test, self.parameters, self.alpha)
+        AL, ZL = self._logits(X_test)
+        cost = output_cost(AL, ZL, Y_test, self.parameters, self.alpha, self.activations[len(self.activations)])
 
         return cost
 
-    def predict(self, X):
-        AL, _ = model_forward(X, self.parameters, keep_prob=1)
+    def predict(self, X, sparse=False, quantized=False):
+        AL = self.output(X, sparse, quantized)
 
-        return AL >= 0.5
+        return self._labels(AL)
 
-    def verify_accuracy(self, X_test, Y_test):
+    def verify_accuracy(self, X_test, Y_test, sparse=False, quantized=False):
         m = X_test.shape[1]
-        p = self.predict(X_test)
+        p = self.predict(X_test, sparse, quantized)
         accuracy = np.sum(p == Y_test) / m
 
         return accuracy
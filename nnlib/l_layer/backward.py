@@ -1,9 +1,14 @@
 import numpy as np
 
-from nnlib.utils.derivative import relu_backward, sigmoid_backward
+from nnlib.utils.derivative import softmax_cross_entropy_backward
+from nnlib.utils.dropout import load_mask
+from nnlib.utils.flat import flat_zeros_like
+from nnlib.utils.layers import ACTIVATIONS, layer_activations
+from nnlib.utils.sparse import issparse, matmul
+from nnlib.l_layer.forward import linear_forward_activation
 
 
-def linear_backward(dZ, cache, alpha, keep_prob):
+def linear_backward(dZ, cache, alpha, keep_prob, out=None):
     """
     Implement the linear portion of backward propagation
 
@@ -17,6 +22,10 @@ def linear_backward(dZ, cache, alpha, keep_prob):
 
     keep_prob -- dropout probability
 
+    out -- optional preallocated (dA_prev, dW, db) arrays to write into, dA_prev is not computed if its array is None
+
+    dA_prev is neither computed when A_prev is sparse input data
+
     Returns:
 
     dA_prev -- Gradient of cost with respect to activation of previous layer (l-1)
@@ -30,15 +39,26 @@ def linear_backward(dZ, cache, alpha, keep_prob):
 
     A_prev, D_prev, W = cache
     m = A_prev.shape[1]
-
-    dW = np.matmul(dZ, A_prev.T)/m + alpha/m * W
-    db = np.sum(dZ, axis=1, keepdims=True)/m
-    dA_prev = np.matmul(W.T, dZ) * D_prev / keep_prob
+    dA_prev_out, dW_out, db_out = (None, None, None) if out is None else out
+
+    # with sparse input data this only touches its nonzeros
+    dW = matmul(dZ, A_prev.T, out=dW_out)
+    dW /= m
+    if alpha:
+        dW += alpha/m * W
+    db = np.sum(dZ, axis=1, keepdims=True, out=db_out)
+    db /= m
+    dA_prev = None
+    if (out is None or dA_prev_out is not None) and not issparse(A_prev):
+        dA_prev = np.matmul(W.T, dZ, out=dA_prev_out)
+        if keep_prob < 1:
+            dA_prev *= D_prev
+            dA_prev /= keep_prob
 
     return dA_prev, dW, db
 
 
-def linear_backward_activation(dA, cache, backward_func, alpha, keep_prob):
+def linear_backward_activation(dA, cache, backward_func, alpha, keep_prob, out=None):
     """
     Implement backward propagation of entire layer
 
@@ -53,16 +73,66 @@ def linear_backward_activation(dA, cache, backward_func, alpha, keep_prob):
     alpha -- l2 regularization term
 
     keep_prob -- dropout probability
+
+    out -- optional preallocated (dZ, dA_prev, dW, db) arrays to write into, see linear_backward
     """
 
     linear_cache, activation_cache = cache
-    dZ = backward_func(dA, activation_cache)
-    dA_prev, dW, db = linear_backward(dZ, linear_cache, alpha, keep_prob)
+    dZ_out, linear_out = (None, None) if out is None else (out[0], out[1:])
+    dZ = backward_func(dA, activation_cache, out=dZ_out)
+    dA_prev, dW, db = linear_backward(dZ, linear_cache, alpha, keep_prob, out=linear_out)
 
     return dA_prev, dW, db
 
 
-def model_backward(AL, Y, parameters, caches, alpha, keep_prob):
+def _layer_buffers(workspace, grads, l, W, m):
+    if workspace is not None:
+        # the gradient with respect to the input data is never needed, so it gets no buffer and is skipped
+        return workspace["dZ"][l], workspace["dA"].get(l-1), workspace["dW"][l], workspace["db"][l]
+    if "flat" not in grads:
+        return None
+
+    # dW and db are written into the flat gradient buffer, the input data's gradient is skipped as above
+    dA_prev = np.empty((W.shape[1], m), dtype=grads["flat"].dtype) if l > 1 else None
+    return None, dA_prev, grads["dW"][l], grads["db"][l]
+
+
+def _end_hook(hooks, workspace, l, W, dZ_like, dA_prev, dW, db):
+    m = dZ_like.shape[1]
+    nbytes = 0 if workspace is not None else dZ_like.nbytes + dW.nbytes + db.nbytes
+    if workspace is None and dA_prev is not None:
+        nbytes += dA_prev.nbytes
+    # one matmul for dW, one more for dA_prev, plus the activation derivative
+    flops = (2 if dA_prev is None else 4)*W.size*m + 3*dZ_like.size
+    hooks.end("backward", l, flops=flops, nbytes=nbytes, samples=m)
+
+
+def _recompute(caches, parameters, activations, keep_prob, l, hooks=None):
+    # A and Z of the layers below l that model_forward did not keep, from the closest kept activations
+    # and the stored dropout masks, so the recomputed values are exactly the ones of the forward pass
+    start = max(k for k in caches["A"] if k < l)
+    segment = dict(A={}, Z={})
+    A = caches["A"][start]
+
+    for k in range(start+1, l+1):
+        if k in caches["Z"]:
+            break
+        if hooks is not None:
+            hooks.begin("recompute", k)
+        mask = load_mask(caches["D"][k], (parameters["W"][k].shape[0], A.shape[1]), keep_prob)
+        A, D, Z = linear_forward_activation(A, parameters["W"][k], parameters["b"][k], ACTIVATIONS[activations[k]][0],
+                                            keep_prob, mask=mask)
+        if hooks is not None:
+            hooks.end("recompute", k, flops=2*parameters["W"][k].size*A.shape[1] + 4*A.size, nbytes=A.nbytes + Z.nbytes,
+                      samples=A.shape[1])
+        segment["A"][k] = A
+        segment["Z"][k] = Z
+
+    return segment
+
+
+def model_backward(AL, Y, parameters, caches, alpha, keep_prob, workspace=None, hooks=None, fused=False,
+                   activations=None):
     """
     Implement backward propgation of arbitrary model
 
@@ -70,50 +140,123 @@ def model_backward(AL, Y, parameters, caches, alpha, keep_prob):
 
     Al -- output of forward prop
 
-    Y -- labels for data
+    Y -- labels for data, integer labels of shape (1, m) when the last layer is a softmax
 
     parameters -- dictionary of weights W, b
 
     caches -- dictionary of forward propagation values {A, D, Z}
 
     alpha -- l2 regularization term
-    keep_prob -- dropout probability
 
     keep_prob -- dropout probability
 
-    keep_prob -- dropout probability
+    workspace -- optional buffers from initialize_workspace, gradients are written into them instead of new arrays
+
+    hooks -- optional object whose begin("backward", l) and end("backward", l, flops, nbytes, samples)
+    are called around each layer, see nnlib.utils.profiler
+
+    fused -- differentiate a sigmoid or softmax last layer and the cross-entropy together, dZ of the last layer
+    is then computed directly as AL - Y (AL - one_hot(Y) for softmax), which stays finite when AL saturates
+    at 0 or 1; dA of the last layer is not computed
+
+    activations -- activation names of layers 1..L as given to model_forward
+
+    When model_forward ran with recompute_every, the activations it did not keep are recomputed
+    one segment between kept layers at a time, and dA of each layer is dropped once used.
 
     Returns:
 
-    grads -- dictionary of lists for gradients of each layer
+    grads -- dictionary of lists for gradients of each layer, dW and db are views into one flat gradient
+    buffer stored under "flat" when the parameters are flat-backed (see nnlib.utils.flat), so that
+    update_parameters and the optimizers update every layer in a single vector operation
     """
 
-    grads = dict(dA={}, dW={}, db={})
-    L = len(caches["Z"])
-    Y = Y.reshape(AL.shape)
-
-    dAL = - (np.divide(Y, AL) - np.divide(1-Y, 1-AL))
-    grads["dA"][L] = dAL
-    dA_prev, dWL, dbL = linear_backward_activation(
-            dAL,
-            ((caches["A"][L-1], caches["D"][L-1], parameters["W"][L]), (caches["Z"][L], caches["A"][L])),
-            sigmoid_backward,
-            alpha,
-            keep_prob
-            )
-    grads["dA"][L-1] = dA_prev
+    if workspace is not None:
+        grads = workspace
+    elif "flat" in parameters:
+        grads = dict(dA={}, **flat_zeros_like(parameters))
+    else:
+        grads = dict(dA={}, dW={}, db={})
+    m = AL.shape[1]
+    L = len(parameters["W"])
+    activations = layer_activations(activations, L)
+    checkpointed = len(caches["Z"]) < L
+    segment = dict(A={}, Z={})
+
+    def cached(key, l):
+        return caches[key][l] if l in caches[key] else segment[key][l]
+
+    def mask(l):
+        # masks may be kept packed or as seeds, see nnlib.utils.dropout
+        return load_mask(caches["D"][l], (parameters["W"][l].shape[0], AL.shape[1]), keep_prob) if l > 0 else 1
+    if activations[L] == "softmax":
+        # integer labels, the loss is the categorical cross-entropy
+        Y = np.ravel(Y)
+        examples = np.arange(AL.shape[1])
+    else:
+        Y = Y.reshape(AL.shape).astype(AL.dtype, copy=False)
+
+    if L-1 not in caches["A"]:
+        segment = _recompute(caches, parameters, activations, keep_prob, L, hooks)
+    if hooks is not None:
+        hooks.begin("backward", L)
+    linear_cache = (cached("A", L-1), mask(L-1), parameters["W"][L])
+    if fused and activations[L] in ("sigmoid", "softmax"):
+        dZ_out = None if workspace is None else workspace["dZ"][L]
+        if activations[L] == "softmax":
+            dZL = softmax_cross_entropy_backward(AL, Y, out=dZ_out)
+        else:
+            dZL = np.subtract(AL, Y, out=dZ_out)
+        out = _layer_buffers(workspace, grads, L, parameters["W"][L], m)
+        linear_out = None if out is None else out[1:]
+        dA_prev, dWL, dbL = linear_backward(dZL, linear_cache, alpha, keep_prob, out=linear_out)
+    else:
+        dA_out = None if workspace is None else workspace["dA"][L]
+        if activations[L] == "softmax":
+            # -1/AL at the true class of each example, 0 elsewhere
+            dAL = np.zeros_like(AL) if dA_out is None else dA_out
+            dAL[...] = 0
+            dAL[Y, examples] = -1 / AL[Y, examples]
+        else:
+            dAL = np.divide(1-Y, 1-AL, out=dA_out)
+            dAL -= np.divide(Y, AL)
+        grads["dA"][L] = dAL
+        dA_prev, dWL, dbL = linear_backward_activation(
+                dAL,
+                (linear_cache, (caches["Z"][L], caches["A"][L])),
+                ACTIVATIONS[activations[L]][1],
+                alpha,
+                keep_prob,
+                out=_layer_buffers(workspace, grads, L, parameters["W"][L], m)
+                )
+    if hooks is not None:
+        _end_hook(hooks, workspace, L, parameters["W"][L], AL, dA_prev, dWL, dbL)
+    if dA_prev is not None:
+        grads["dA"][L-1] = dA_prev
     grads["dW"][L] = dWL
     grads["db"][L] = dbL
 
     for l in reversed(range(L-1)):
+        if l not in caches["A"] and l not in segment["A"]:
+            segment = _recompute(caches, parameters, activations, keep_prob, l+1, hooks)
+        if hooks is not None:
+            hooks.begin("backward", l+1)
+        # dropout changed the cached activations, the derivatives needing them recompute them from Z
+        activation_cache = (cached("Z", l+1), cached("A", l+1) if keep_prob == 1 else None)
         dA_prev, dWl, dbl = linear_backward_activation(
                 grads["dA"][l+1],
-                ((caches["A"][l], caches["D"][l], parameters["W"][l+1]), (caches["Z"][l+1], caches["A"][l+1])),
-                relu_backward,
+                ((cached("A", l), mask(l), parameters["W"][l+1]), activation_cache),
+                ACTIVATIONS[activations[l+1]][1],
                 alpha,
-                keep_prob
+                keep_prob,
+                out=_layer_buffers(workspace, grads, l+1, parameters["W"][l+1], m)
                 )
-        grads["dA"][l] = dA_prev
+        if hooks is not None:
+            _end_hook(hooks, workspace, l+1, parameters["W"][l+1], activation_cache[0], dA_prev, dWl, dbl)
+        if checkpointed:
+            del grads["dA"][l+1]
+        if dA_prev is not None:
+            grads["dA"][l] = dA_prev
         grads["dW"][l+1] = dWl
         grads["db"][l+1] = dbl
 
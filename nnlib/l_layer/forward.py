@@ -1,31 +1,36 @@
 import numpy as np
 
-from nnlib.utils.activation import relu, sigmoid
+from nnlib.utils.dropout import MASKS, dropout_mask, store_mask
+from nnlib.utils.layers import ACTIVATIONS, layer_activations
+from nnlib.utils.sparse import matmul
 
 
-def linear_forward(A_prev, W, b):
+def linear_forward(A_prev, W, b, out=None):
     """
     Implement linear part of forward propagation
 
     Arguments:
 
-    A_prev -- activations from previous layer or input data
+    A_prev -- activations from previous layer or input data, input data may be a scipy.sparse matrix
 
     W -- weight matrix
 
     b -- bias vector
 
+    out -- optional preallocated array to write Z into
+
     Returns:
 
     Z -- input for activation function
     """
 
-    Z = np.matmul(W, A_prev) + b
+    Z = matmul(W, A_prev, out=out)
+    Z += b
 
     return Z
 
 
-def linear_forward_activation(A_prev, W, b, activation_func, keep_prob):
+def linear_forward_activation(A_prev, W, b, activation_func, keep_prob, out=None, mask=None, rng=None):
     """
     Implement forward propagation
 
@@ -38,29 +43,53 @@ def linear_forward_activation(A_prev, W, b, activation_func, keep_prob):
     b -- bias vector
 
     activation_func -- activation function (from utils)
-    keep_prob -- dropout probability
 
     keep_prob -- dropout probability
 
-    keep_prob -- dropout probability
+    out -- optional preallocated (A, D, Z) arrays to write into
+
+    mask -- dropout mask stored by an earlier pass, applied instead of drawing a new one
+
+    rng -- np.random.Generator to draw the dropout mask from, the global np.random state if None
 
     Returns:
 
     A -- output of activation function
 
+    D -- dropout mask, 1 when keep_prob is 1 and rng is given, no mask is drawn then
+
     Z -- cached pre activation matrix
     """
 
-    Z = linear_forward(A_prev, W, b)
-    A = activation_func(Z)
-    D = np.random.rand(A.shape[0], A.shape[1]) < keep_prob
+    A_out, D_out, Z_out = (None, None, None) if out is None else out
+    Z = linear_forward(A_prev, W, b, out=Z_out)
+    A = activation_func(Z, out=A_out)
+    if keep_prob == 1 and (rng is not None or mask is not None):
+        # nothing to drop, only the global np.random path still draws its masks so seeded runs reproduce exactly
+        return A, 1, Z
+    D = mask if mask is not None else dropout_mask(A.shape, keep_prob, rng, out=D_out)
     A *= D
     A /= keep_prob
 
     return A, D, Z
 
 
-def model_forward(X, parameters, keep_prob):
+def _layer_buffers(workspace, l):
+    if workspace is None:
+        return None
+
+    return workspace["A"][l], workspace["D"][l], workspace["Z"][l]
+
+
+def _end_hook(hooks, workspace, l, W, A, D, Z):
+    m = A.shape[1]
+    nbytes = 0 if workspace is not None else A.nbytes + getattr(D, "nbytes", 0) + Z.nbytes
+    # matmul plus bias, activation and dropout
+    hooks.end("forward", l, flops=2*W.size*m + 4*A.size, nbytes=nbytes, samples=m)
+
+
+def model_forward(X, parameters, keep_prob, workspace=None, hooks=None, activations=None, recompute_every=None,
+                  rng=None, masks="bool"):
     """
     Implement forward propagation sequence
 
@@ -72,6 +101,24 @@ def model_forward(X, parameters, keep_prob):
 
     keep_prob -- probability of keeping a node for dropout
 
+    workspace -- optional buffers from initialize_workspace, reused as caches instead of allocating new arrays
+
+    hooks -- optional object whose begin("forward", l) and end("forward", l, flops, nbytes, samples)
+    are called around each layer, see nnlib.utils.profiler
+
+    activations -- activation names of layers 1..L, defaults to relu for hidden layers and sigmoid for the last,
+    see nnlib.utils.layers
+
+    recompute_every -- activation checkpointing, A and Z of the hidden layers are only kept for every
+    recompute_every-th layer and model_backward recomputes the others from the stored masks,
+    cannot be combined with a workspace
+
+    rng -- np.random.Generator to draw the dropout masks from, the global np.random state if None
+
+    masks -- how the dropout masks are kept for model_backward, "bool" arrays, "packed" 8 per byte
+    or only the "seed" each was drawn from (requires rng), see nnlib.utils.dropout;
+    with rng, no mask is drawn for layers with keep_prob 1, the output layer included
+
     Returns:
 
     AL -- last post-activation value
@@ -80,9 +127,19 @@ def model_forward(X, parameters, keep_prob):
     {A: activation, D: mask, Z: pre-activation}
     """
 
-    caches = dict(A={}, D={}, Z={})
+    if recompute_every and workspace is not None:
+        raise ValueError("activation checkpointing cannot be combined with a workspace holding every layer")
+    if masks not in MASKS:
+        raise ValueError("unknown masks " + str(masks))
+    if masks != "bool" and workspace is not None:
+        raise ValueError("a workspace keeps its masks as preallocated bool arrays")
+    if masks == "seed" and rng is None:
+        raise ValueError("masks kept as seeds must be drawn from a np.random.Generator")
+
+    caches = dict(A={}, D={}, Z={}) if workspace is None else workspace
     A = X
     L = len(parameters["W"])
+    activations = layer_activations(activations, L)
     caches['A'][0] = X
     caches['D'][0] = 1  # this ensures there is a value of D for every value of A
 
@@ -91,12 +148,32 @@ def model_forward(X, parameters, keep_prob):
         A_prev = A
         Wl = parameters["W"][l]
         bl = parameters["b"][l]
-        A, D, Z = linear_forward_activation(A_prev, Wl, bl, relu, keep_prob)
-        caches["A"][l] = A
-        caches["D"][l] = D
-        caches["Z"][l] = Z
-
-    AL, _, ZL = linear_forward_activation(A, parameters["W"][L], parameters["b"][L], sigmoid, keep_prob=1)
+        seed = None
+        layer_rng = rng
+        if masks == "seed" and keep_prob < 1:
+            # an independent stream per layer and step, redrawn from its seed in model_backward
+            seed = np.random.SeedSequence(int(rng.integers(2**63)))
+            layer_rng = np.random.default_rng(seed)
+        if hooks is not None:
+            hooks.begin("forward", l)
+        A, D, Z = linear_forward_activation(
+                A_prev, Wl, bl, ACTIVATIONS[activations[l]][0], keep_prob, out=_layer_buffers(workspace, l),
+                rng=layer_rng)
+        if hooks is not None:
+            _end_hook(hooks, workspace, l, Wl, A, D, Z)
+        if workspace is None:
+            caches["D"][l] = store_mask(D, masks, seed) if np.ndim(D) else D
+        if not recompute_every or l % recompute_every == 0:
+            caches["A"][l] = A
+            caches["Z"][l] = Z
+
+    if hooks is not None:
+        hooks.begin("forward", L)
+    AL, DL, ZL = linear_forward_activation(
+            A, parameters["W"][L], parameters["b"][L], ACTIVATIONS[activations[L]][0], keep_prob=1,
+            out=_layer_buffers(workspace, L), rng=rng)
+    if hooks is not None:
+        _end_hook(hooks, workspace, L, parameters["W"][L], AL, DL, ZL)
     caches["A"][L] = AL
     caches["Z"][L] = ZL
 
@@ -0,0 +1,200 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from nnlib.utils.layers import ACTIVATIONS, layer_activations
+from nnlib.l_layer.forward import linear_forward
+
+
+def model_predict(X, parameters, buffers=None, activations=None, logits=False):
+    """
+    Forward propagation for inference only: no dropout masks and no caches,
+    the bias and the activation are applied in place on each layer's output
+
+    Arguments:
+
+    X -- input data of shape (num_features, m)
+
+    parameters -- dictionary of weights W, b
+
+    buffers -- optional dictionary of preallocated arrays of shape (layers_dims[l], m) indexed by layer,
+    see initialize_inference_buffers, overwritten by the next call
+
+    activations -- activation names of layers 1..L, see nnlib.utils.layers
+
+    logits -- return the pre-activation ZL of the last layer instead, for costs computed from the logits
+
+    Returns:
+
+    AL -- last post-activation value
+    """
+
+    A = X
+    L = len(parameters["W"])
+    activations = layer_activations(activations, L)
+
+    for l in range(1, L+1):
+        Z = linear_forward(A, parameters["W"][l], parameters["b"][l], out=None if buffers is None else buffers[l])
+        A = Z if logits and l == L else ACTIVATIONS[activations[l]][0](Z, out=Z)
+
+    return A
+
+
+def initialize_inference_buffers(layers_dims, m, dtype=np.float64):
+    """
+    Arguments:
+
+    layers_dims -- dimensions of each layer in the network
+
+    m -- number of examples per call of model_predict
+
+    dtype -- floating point type of the parameters
+
+    Returns:
+
+    buffers -- dictionary of arrays of shape (layers_dims[l], m) indexed by layer
+    """
+
+    return {l: np.empty((layers_dims[l], m), dtype=dtype) for l in range(1, len(layers_dims))}
+
+
+class InferenceEngine:
+    """
+    Batched inference with reused output buffers
+
+    predict runs whole matrices in chunks of at most max_batch_size examples.
+    submit queues single examples from any number of threads, a background thread
+    stacks the requests waiting at the same time into one batch and runs a single
+    forward pass for all of them.
+    """
+
+    def __init__(self, parameters, max_batch_size=4096, max_delay=0.001, activations=None):
+        """
+        Arguments:
+
+        parameters -- dictionary of weights W, b
+
+        max_batch_size -- largest number of examples in one forward pass
+
+        max_delay -- seconds a submitted example may wait for others to join its batch
+
+        activations -- activation names of layers 1..L, see nnlib.utils.layers
+        """
+
+        W = parameters["W"]
+        self.parameters = parameters
+        self.layers_dims = [W[1].shape[1]] + [W[l].shape[0] for l in sorted(W)]
+        self.dtype = W[1].dtype
+        self.activations = layer_activations(activations, len(W))
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+
+        # one flat array per layer, viewed as (layers_dims[l], m) for every batch size m
+        self._flat_buffers = {l: np.empty(self.layers_dims[l] * max_batch_size, dtype=self.dtype)
+                              for l in range(len(self.layers_dims))}
+        self._lock = threading.Lock()
+        self._requests = queue.Queue()
+        self._thread = None
+
+    def _buffers(self, m):
+        return {l: buffer[:self.layers_dims[l] * m].reshape(self.layers_dims[l], m)
+                for l, buffer in self._flat_buffers.items() if l > 0}
+
+    def predict(self, X):
+        """
+        Arguments:
+
+        X -- input data of shape (num_features, m)
+
+        Returns:
+
+        AL -- output of the network, a new array of shape (layers_dims[-1], m)
+        """
+
+        m = X.shape[1]
+        AL = np.empty((self.layers_dims[-1], m), dtype=self.dtype)
+
+        with self._lock:
+            for k in range(0, m, self.max_batch_size):
+                X_batch = X[:, k:k+self.max_batch_size]
+                buffers = self._buffers(X_batch.shape[1])
+                AL[:, k:k+self.max_batch_size] = model_predict(X_batch, self.parameters, buffers, self.activations)
+
+        return AL
+
+    def submit(self, x):
+        """
+        Queue a single example for the next micro-batch
+
+        Arguments:
+
+        x -- input of shape (num_features,)
+
+        Returns:
+
+        future -- concurrent.futures.Future resolving to the output of shape (layers_dims[-1],)
+        """
+
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._serve, daemon=True)
+                    self._thread.start()
+
+        future = Future()
+        if np.shape(x) != (self.layers_dims[0],):
+            # only this request fails, the micro-batch it would have joined is served as usual
+            future.set_exception(ValueError("expected an input of shape " + str((self.layers_dims[0],))
+                                            + ", got " + str(np.shape(x))))
+            return future
+        self._requests.put((x, future))
+
+        return future
+
+    def close(self):
+        """
+        Stop the micro-batching thread once the queued requests are answered
+        """
+
+        if self._thread is not None:
+            self._requests.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _serve(self):
+        X = self._flat_buffers[0]
+        n_x = self.layers_dims[0]
+
+        while True:
+            request = self._requests.get()
+            if request is None:
+                return
+            batch = [request]
+            # gather whatever else arrives before the deadline, up to a full batch
+            deadline = time.monotonic() + self.max_delay
+            try:
+                while len(batch) < self.max_batch_size:
+                    request = self._requests.get(timeout=max(deadline - time.monotonic(), 0))
+                    if request is None:
+                        self._requests.put(None)
+                        break
+                    batch.append(request)
+            except queue.Empty:
+                pass
+
+            m = len(batch)
+            X_batch = X[:n_x * m].reshape(m, n_x)
+            try:
+                for i, (x, _) in enumerate(batch):
+                    X_batch[i] = x
+                with self._lock:
+                    AL = model_predict(X_batch.T, self.parameters, self._buffers(m), self.activations)
+                    for i, (_, future) in enumerate(batch):
+                        future.set_result(AL[:, i].copy())
+            except Exception as error:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
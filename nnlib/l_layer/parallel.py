@@ -0,0 +1,140 @@
+import os
+import multiprocessing as mp
+
+import numpy as np
+
+from nnlib.utils.cost import output_cost
+from nnlib.utils.dataset import columns
+from nnlib.utils.flat import flat_size, flat_views
+from nnlib.utils.layers import layer_activations
+from nnlib.l_layer.forward import model_forward
+from nnlib.l_layer.backward import model_backward
+from nnlib.l_layer.workspace import initialize_workspace
+
+
+_worker = {}  # state of the current worker process, set once by _initialize_worker
+
+
+def _initialize_worker(shared, layers_dims, dtype, X, Y, keep_prob, activations=None):
+    _worker["parameters"] = flat_views(np.frombuffer(shared, dtype=dtype), layers_dims)
+    _worker["layers_dims"] = layers_dims
+    _worker["dtype"] = dtype
+    _worker["X"] = X
+    _worker["Y"] = Y
+    _worker["keep_prob"] = keep_prob
+    _worker["activations"] = layer_activations(activations, len(layers_dims)-1)
+    _worker["workspaces"] = {}
+
+
+def _shard_gradients(task):
+    index, seed = task
+    if seed is not None:
+        # the dropout masks of a shard do not depend on the worker it is sent to
+        np.random.seed(seed)
+    X = columns(_worker["X"], index).astype(_worker["dtype"], copy=False)
+    Y = _worker["Y"][:, index]
+    m = X.shape[1]
+
+    if m not in _worker["workspaces"]:
+        _worker["workspaces"][m] = initialize_workspace(_worker["layers_dims"], m, _worker["dtype"])
+    workspace = _worker["workspaces"][m]
+
+    activations = _worker["activations"]
+    L = len(activations)
+    AL, caches = model_forward(X, _worker["parameters"], _worker["keep_prob"], workspace, activations=activations)
+    grads = model_backward(AL, Y, _worker["parameters"], caches, 0, _worker["keep_prob"], workspace, fused=True,
+                           activations=activations)
+    cost = output_cost(AL, caches["Z"][L], Y, _worker["parameters"], 0, activations[L])
+
+    # sums rather than means, so shards of different sizes average correctly
+    return grads["flat"] * m, cost * m
+
+
+def _shards(index, m, processes):
+    if isinstance(index, slice):
+        start, stop, _ = index.indices(m)
+        bounds = np.linspace(start, stop, processes+1).astype(int)
+        return [slice(bounds[k], bounds[k+1]) for k in range(processes) if bounds[k] < bounds[k+1]]
+
+    return [shard for shard in np.array_split(index, processes) if len(shard)]
+
+
+class DataParallel:
+    """
+    Pool of worker processes computing the gradients of a batch in shards
+
+    The flat parameters live in shared memory: the workers read them directly and
+    the parent process updates them in place, so only gradients are sent between processes.
+    The pool is forked, inputs are inherited by the workers without being copied or pickled.
+    """
+
+    def __init__(self, parameters, layers_dims, X, Y, keep_prob, processes=None, activations=None):
+        """
+        Arguments:
+
+        parameters -- flat-backed parameters (see nnlib.utils.flat), copied into shared memory
+
+        layers_dims -- dimensions of each layer in the network
+
+        X -- input of shape (num_features, m), numpy array or Dataset backed by np.memmap
+
+        Y -- labels for data of shape (1, m)
+
+        keep_prob -- dropout probability
+
+        processes -- number of worker processes, defaults to the number of CPUs
+
+        activations -- activation names of layers 1..L, see nnlib.utils.layers
+        """
+
+        self.processes = processes or os.cpu_count()
+        self.layers_dims = layers_dims
+        self.m = X.shape[1]
+
+        dtype = parameters["flat"].dtype
+        shared = mp.RawArray(np.ctypeslib.as_ctypes_type(dtype), flat_size(layers_dims))
+        self.parameters = flat_views(np.frombuffer(shared, dtype=dtype), layers_dims)
+        self.parameters["flat"][:] = parameters["flat"]
+
+        self.pool = mp.get_context("fork").Pool(
+                self.processes,
+                initializer=_initialize_worker,
+                initargs=(shared, layers_dims, dtype, X, Y, keep_prob, activations)
+                )
+        self.dropout = np.any(np.less(keep_prob, 1))
+
+    def gradients(self, index, alpha):
+        """
+        Average gradients of the examples in index over all workers
+
+        Arguments:
+
+        index -- slice or integer array of the examples in the batch
+
+        alpha -- l2 regularization term
+
+        Returns:
+
+        grads -- flat-backed dictionary of gradients dW, db
+
+        cost -- cross-entropy cost of the batch without the l2 regularization term
+        """
+
+        m = len(range(self.m)[index]) if isinstance(index, slice) else len(index)
+        shards = _shards(index, self.m, self.processes)
+        # every shard draws its dropout masks from a seed of the parent's np.random state, so np.random.seed
+        # reproduces a run whichever worker computes the shard
+        seeds = np.random.randint(2**31, size=len(shards)).tolist() if self.dropout else [None] * len(shards)
+        results = self.pool.map(_shard_gradients, list(zip(shards, seeds)))
+
+        grads = flat_views(sum(result[0] for result in results) / m, self.layers_dims, keys=("dW", "db"))
+        cost = sum(result[1] for result in results) / m
+        if alpha:
+            for l in grads["dW"]:
+                grads["dW"][l] += alpha/m * self.parameters["W"][l]
+
+        return grads, cost
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
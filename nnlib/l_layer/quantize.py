@@ -0,0 +1,167 @@
+import numpy as np
+
+from nnlib.utils.layers import ACTIVATIONS, layer_activations
+from nnlib.utils.sparse import issparse, matmul
+from nnlib.l_layer.forward import linear_forward
+
+# symmetric int8, -128 is left out so that the range is the same on both sides
+QMAX = 127
+# float32 represents every integer up to 2**24, a sum of EXACT_K products of int8 is always below
+EXACT_K = 1024
+# examples of a Dataset or scipy.sparse input densified to calibrate the scales, see LLayer.quantize
+CALIBRATION_SIZE = 1024
+
+
+def quantize_parameters(parameters, X, activations=None, percentile=100):
+    """
+    Post-training int8 quantization of the weights, with one scale per row (output unit),
+    and of the inputs of every layer, with one scale per layer calibrated on a sample of the inputs
+
+    Arguments:
+
+    parameters -- dictionary of weights W, b
+
+    X -- sample of the input data of shape (num_features, m), e.g. a few hundred training examples
+
+    activations -- activation names of layers 1..L, see nnlib.utils.layers
+
+    percentile -- percentile of the absolute values of each layer's input mapped to 127,
+    below 100 clips outliers to give more resolution to the other values
+
+    Returns:
+
+    quantized -- dictionary indexed by layer of
+    W: int8 weights,
+    W_scale: float32 scale of each row of W, of shape (layers_dims[l], 1),
+    A_scale: scale of the input of the layer,
+    b: int32 biases in units of W_scale * A_scale, added to the integer accumulators
+    """
+
+    W = parameters["W"]
+    L = len(W)
+    activations = layer_activations(activations, L)
+
+    quantized = dict(W={}, W_scale={}, A_scale={}, b={})
+    A = X
+    for l in range(1, L+1):
+        magnitude = np.percentile(np.abs(A), percentile)
+        quantized["A_scale"][l] = float(magnitude / QMAX) if magnitude > 0 else 1.
+
+        W_max = np.max(np.abs(W[l]), axis=1, keepdims=True)
+        W_scale = np.where(W_max > 0, W_max / QMAX, 1).astype(np.float32)
+        quantized["W_scale"][l] = W_scale
+        quantized["W"][l] = np.rint(W[l] / W_scale).astype(np.int8)
+        quantized["b"][l] = np.rint(parameters["b"][l] / (W_scale * quantized["A_scale"][l])).astype(np.int32)
+
+        if l < L:
+            # calibrate the next layer on the outputs of the float model
+            Z = linear_forward(A, W[l], parameters["b"][l])
+            A = ACTIVATIONS[activations[l]][0](Z, out=Z)
+
+    return quantized
+
+
+def quantize_inputs(A, scale, out=None):
+    """
+    Round to the int8 grid of a layer's input, the values are kept as float32
+
+    Arguments:
+
+    A -- input of the layer, may be a scipy.sparse matrix whose nonzeros are quantized
+
+    scale -- A_scale of the layer
+
+    out -- optional float32 array to write into
+
+    Returns:
+
+    A_q -- float32 integers between -127 and 127, A is approximately A_q * scale
+    """
+
+    if issparse(A):
+        A_q = A.astype(np.float32)
+        quantize_inputs(A_q.data, scale, out=A_q.data)
+        return A_q
+
+    A_q = np.multiply(A, np.float32(1 / scale), out=out, dtype=np.float32)
+    np.rint(A_q, out=A_q)
+
+    return np.clip(A_q, -QMAX, QMAX, out=A_q)
+
+
+def integer_matmul(W_q, A_q):
+    """
+    Exact product of integer matrices by the float32 BLAS
+
+    The inner dimension is split in blocks of EXACT_K whose products are exact in float32,
+    the blocks are summed in float64.
+
+    Arguments:
+
+    W_q -- int8 matrix of shape (n, k)
+
+    A_q -- float32 matrix of integers between -127 and 127 of shape (k, m), or scipy.sparse matrix
+
+    Returns:
+
+    Z_q -- float64 matrix of shape (n, m) holding W_q @ A_q
+    """
+
+    if issparse(A_q):
+        # scipy has no BLAS path to keep in float32, float64 products are exact as well
+        return matmul(W_q.astype(np.float64), A_q)
+
+    Z_q = np.matmul(W_q[:, :EXACT_K].astype(np.float32), A_q[:EXACT_K]).astype(np.float64)
+    for k in range(EXACT_K, W_q.shape[1], EXACT_K):
+        Z_q += np.matmul(W_q[:, k:k+EXACT_K].astype(np.float32), A_q[k:k+EXACT_K])
+
+    return Z_q
+
+
+def quantized_predict(X, quantized, activations=None):
+    """
+    Forward propagation with int8 weights and inputs
+
+    Each layer accumulates the products of the integer weights and inputs and the integer biases,
+    then dequantizes once: Z = (W_q @ A_q + b_q) * W_scale * A_scale. NumPy's integer matmul does not
+    use BLAS and is about 8 times slower, the integers are multiplied exactly by integer_matmul instead.
+
+    Arguments:
+
+    X -- input data of shape (num_features, m), may be a scipy.sparse matrix
+
+    quantized -- dictionary from quantize_parameters
+
+    activations -- activation names of layers 1..L, see nnlib.utils.layers
+
+    Returns:
+
+    AL -- last post-activation value, float64
+    """
+
+    L = len(quantized["W"])
+    activations = layer_activations(activations, L)
+
+    A = X
+    for l in range(1, L+1):
+        A_q = quantize_inputs(A, quantized["A_scale"][l])
+        Z = integer_matmul(quantized["W"][l], A_q)
+        Z += quantized["b"][l]
+        Z *= quantized["W_scale"][l] * quantized["A_scale"][l]
+        A = ACTIVATIONS[activations[l]][0](Z, out=Z)
+
+    return A
+
+
+def quantized_nbytes(quantized):
+    """
+    Arguments:
+
+    quantized -- dictionary from quantize_parameters
+
+    Returns:
+
+    nbytes -- memory held by the integer weights and biases and the scales
+    """
+
+    return sum(np.asarray(value).nbytes for values in quantized.values() for value in values.values())
@@ -0,0 +1,351 @@
+import itertools
+import json
+import math
+import multiprocessing as mp
+import os
+import tempfile
+
+import numpy as np
+
+from nnlib.l_layer import LLayer
+
+
+STRATEGIES = ("grid", "random", "halving")
+BLAS_VARIABLES = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "VECLIB_MAXIMUM_THREADS")
+
+_worker = {}  # state of the current worker process, set once by _initialize_worker
+
+
+def uniform(low, high):
+    """
+    Distribution of a hyperparameter for random search
+
+    Returns:
+
+    sample -- function drawing a float uniformly between low and high from a np.random.Generator
+    """
+
+    return lambda rng: float(rng.uniform(low, high))
+
+
+def log_uniform(low, high):
+    """
+    Distribution of a hyperparameter for random search, e.g. learning rates or regularization terms
+
+    Returns:
+
+    sample -- function drawing a float between low and high whose logarithm is uniform from a np.random.Generator
+    """
+
+    return lambda rng: float(np.exp(rng.uniform(np.log(low), np.log(high))))
+
+
+def grid(space):
+    """
+    Arguments:
+
+    space -- dictionary of fit_params arguments to lists of values, e.g. dict(alpha=[0, 0.1, 0.3])
+
+    Returns:
+
+    configs -- list of dictionaries, every combination of the values
+    """
+
+    keys = sorted(space)
+
+    return [{key: _plain(value) for key, value in zip(keys, values)}
+            for values in itertools.product(*(space[key] for key in keys))]
+
+
+def sample(space, n, rng):
+    """
+    Arguments:
+
+    space -- dictionary of fit_params arguments to lists of values, drawn uniformly,
+    or to distributions such as log_uniform
+
+    n -- number of configurations
+
+    rng -- np.random.Generator
+
+    Returns:
+
+    configs -- list of n dictionaries of values drawn independently
+    """
+
+    keys = sorted(space)
+
+    return [{key: _plain(space[key](rng) if callable(space[key]) else space[key][rng.integers(len(space[key]))])
+             for key in keys} for _ in range(n)]
+
+
+def _plain(value):
+    # numpy scalars, e.g. from values given as np.array, become the Python numbers checkpoints can save
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def halving_budgets(n, num_iterations, eta=3):
+    """
+    Arguments:
+
+    n -- number of trials in the first rung
+
+    num_iterations -- budget of the trials reaching the last rung
+
+    eta -- one trial in eta is promoted to the next rung, with eta times its budget
+
+    Returns:
+
+    budgets -- increasing numbers of iterations of the rungs, ending with num_iterations
+    """
+
+    rungs = max(math.ceil(math.log(n) / math.log(eta) - 1e-9), 0) if n > 1 else 0
+    budgets = [max(round(num_iterations * eta ** (k - rungs)), 1) for k in range(rungs + 1)]
+
+    return sorted(set(budgets))
+
+
+def _initialize_worker(X, Y, validation_data, directory, cores):
+    _worker["X"] = X
+    _worker["Y"] = Y
+    _worker["validation_data"] = validation_data
+    _worker["directory"] = directory
+    cpus = cores.get()
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+
+
+def _run_trial(task):
+    trial, params, fit_kwargs, num_iterations, seed, resume = task
+    path = os.path.join(_worker["directory"], "trial_" + str(trial) + ".nnlib")
+    params_path = os.path.join(_worker["directory"], "trial_" + str(trial) + ".json")
+    validation_data = _worker["validation_data"]
+    X_test, Y_test = validation_data if validation_data is not None else (_worker["X"], _worker["Y"])
+    saved_params = json.dumps(params, sort_keys=True, default=str)
+
+    # the checkpoint restores the random state of a trial continued in a later rung
+    np.random.seed(seed)
+    model = LLayer()
+    try:
+        if resume:
+            with open(params_path) as f:
+                if f.read() != saved_params:
+                    raise ValueError("checkpoint " + path + " was trained with other params")
+        else:
+            # a checkpoint left in directory by an earlier search is never resumed
+            for stale in (path, params_path):
+                if os.path.exists(stale):
+                    os.remove(stale)
+            with open(params_path, "w") as f:
+                f.write(saved_params)
+        model.fit_params(_worker["X"], _worker["Y"], num_iterations=num_iterations, verbose=False,
+                         checkpoint_path=path, resume=resume, validation_data=validation_data,
+                         **dict(fit_kwargs, **params))
+    except (ValueError, TypeError, FloatingPointError, OSError) as error:
+        return dict(trial=trial, error=repr(error))
+
+    if validation_data is not None and model.best_validation_cost is not None:
+        # the parameters of the best validation are the ones fit_params restores
+        score = model.best_validation_cost
+    else:
+        score = float(model.costs[-1]) if len(model.costs) else float(model.verify_cost(X_test, Y_test))
+
+    return dict(
+            trial=trial,
+            iterations=model.epoch + 1,
+            stopped_iteration=model.stopped_iteration,
+            score=score if np.isfinite(score) else float("inf"),
+            costs=list(model.costs),
+            validation_costs=list(model.validation_costs),
+            cost=float(model.verify_cost(X_test, Y_test)),
+            accuracy=float(model.verify_accuracy(X_test, Y_test)),
+            checkpoint=path,
+            )
+
+
+def _blas_threads(processes, blas_threads):
+    cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count()))
+    threads = blas_threads or max(len(cpus) // processes, 1)
+    # worker k runs on cores k*threads .. (k+1)*threads-1, wrapping around when there are more threads than cores
+    cores = [{cpus[(k * threads + i) % len(cpus)] for i in range(threads)} for k in range(processes)]
+
+    return threads, cores
+
+
+def search(space, X, Y, num_iterations, strategy="grid", n_trials=10, eta=3, check_every=None, kill_quantile=0.75,
+           validation_data=None, processes=None, blas_threads=None, pin=True, seed=0, directory=None, verbose=True,
+           **fit_kwargs):
+    """
+    Hyperparameter search over LLayer.fit_params, trials run in a pool of worker processes
+
+    Trials train in rungs of increasing numbers of iterations, every rung resuming from the checkpoint
+    of the previous one, and the trials with the worst partial cost curves are stopped between rungs:
+    grid and random search check every check_every iterations and stop the trials whose cost is not finite
+    or above the kill_quantile of the running trials; successive halving ("halving") only promotes the best
+    1/eta of the trials to the next rung, which trains eta times longer.
+
+    Every worker limits its BLAS library to blas_threads threads and, with pin, is pinned to as many cores
+    of its own, so that processes * blas_threads threads share the cores without oversubscribing them.
+    The workers are spawned, not forked, for the BLAS limits to apply; scripts calling search from the
+    main module need the usual if __name__ == "__main__" guard.
+
+    Arguments:
+
+    space -- dictionary of fit_params arguments to lists of values or, for random and halving, distributions
+    such as log_uniform, e.g. dict(learning_rate=log_uniform(1e-4, 1e-2), layers_dims=[(12288, 7, 1), (12288, 20, 1)])
+
+    X -- input of shape (num_features, m), sent once to every worker
+
+    Y -- labels for data of shape (1, m)
+
+    num_iterations -- number of epochs of the trials that are never stopped
+
+    strategy -- "grid" for every combination of the values, "random" for n_trials configurations drawn from space,
+    "halving" for successive halving of n_trials drawn configurations, or of the grid if n_trials is None
+
+    n_trials -- number of configurations drawn by random and halving
+
+    eta -- halving promotes one trial in eta to the next rung, which trains eta times longer
+
+    check_every -- number of epochs between the checks of grid and random, defaults to a fifth of num_iterations
+
+    kill_quantile -- grid and random stop the trials whose cost is above this quantile of the running trials'
+    at every check, as long as at least 1 / (1 - kill_quantile) are running, None to only stop diverging trials
+
+    validation_data -- tuple (X_val, Y_val) evaluated every epoch, the best validation cost (see fit_params
+    best_validation_cost) ranks the trials and verify_cost and verify_accuracy are reported on it,
+    the last training cost and the training data otherwise
+
+    processes -- number of worker processes, defaults to the number of CPUs
+
+    blas_threads -- BLAS threads per worker, defaults to the number of CPUs divided by processes
+
+    pin -- pin every worker to its own cores (Linux only)
+
+    seed -- seed of the random configurations, trial k seeds np.random with seed + k
+
+    directory -- directory the checkpoints trial_k.nnlib and the params trial_k.json of every trial are kept in,
+    replacing those of an earlier search, a temporary directory removed afterwards if None
+
+    verbose -- print the trials running and stopped at every rung
+
+    fit_kwargs -- other arguments of fit_params shared by every trial, e.g. layers_dims or optimizer="adam"
+
+    Returns:
+
+    leaderboard -- list of dictionaries, one per trial from best to worst score:
+    trial, params, status ("completed", "stopped" early by fit_params, "killed" or "failed"), iterations,
+    score, cost and accuracy (verify_cost and verify_accuracy), costs and validation_costs curves, checkpoint
+    (None if directory is None) or error
+    """
+
+    if strategy not in STRATEGIES:
+        raise ValueError("unknown strategy " + str(strategy))
+
+    rng = np.random.default_rng(seed)
+    if strategy == "grid" or (strategy == "halving" and n_trials is None):
+        configs = grid(space)
+    else:
+        configs = sample(space, n_trials, rng)
+    if strategy == "halving":
+        budgets = halving_budgets(len(configs), num_iterations, eta)
+    else:
+        check_every = check_every or max(num_iterations // 5, 1)
+        budgets = list(range(check_every, num_iterations, check_every)) + [num_iterations]
+
+    processes = min(processes or os.cpu_count(), len(configs))
+    threads, cores = _blas_threads(processes, blas_threads)
+    context = mp.get_context("spawn")
+    queue = context.Queue()
+    for cpus in cores:
+        queue.put(cpus if pin else None)
+
+    with tempfile.TemporaryDirectory() as temporary:
+        # spawned workers read the BLAS limits from the environment when they import numpy
+        environ = {variable: os.environ.get(variable) for variable in BLAS_VARIABLES}
+        os.environ.update({variable: str(threads) for variable in BLAS_VARIABLES})
+        try:
+            pool = context.Pool(processes, initializer=_initialize_worker,
+                                initargs=(X, Y, validation_data, directory or temporary, queue))
+        finally:
+            for variable, value in environ.items():
+                if value is None:
+                    os.environ.pop(variable, None)
+                else:
+                    os.environ[variable] = value
+
+        trials = [dict(trial=k, params=params, status="running", iterations=0, score=float("inf"))
+                  for k, params in enumerate(configs)]
+        try:
+            for rung, budget in enumerate(budgets):
+                running = [trial for trial in trials if trial["status"] == "running"]
+                tasks = [(trial["trial"], trial["params"], fit_kwargs, budget, seed + trial["trial"], rung > 0)
+                         for trial in running]
+                for result in pool.imap_unordered(_run_trial, tasks):
+                    trial = trials[result["trial"]]
+                    trial.update(result)
+                    if "error" in result:
+                        trial["status"] = "failed"
+                    elif result["stopped_iteration"] is not None:
+                        trial["status"] = "stopped"
+                    elif budget == num_iterations:
+                        trial["status"] = "completed"
+
+                running = [trial for trial in trials if trial["status"] == "running"]
+                for trial in _killed(running, strategy, eta, kill_quantile):
+                    trial["status"] = "killed"
+                if verbose:
+                    print("rung", rung, "at", budget, "iterations:", len(tasks), "trials,",
+                          sum(trial["status"] == "killed" for trial in running), "killed")
+        finally:
+            pool.close()
+            pool.join()
+
+    for trial in trials:
+        trial.pop("stopped_iteration", None)
+        if directory is None:
+            trial["checkpoint"] = None
+
+    return sorted(trials, key=lambda trial: trial["score"])
+
+
+def _killed(running, strategy, eta, kill_quantile):
+    if not running:
+        return []
+    if strategy == "halving":
+        promoted = max(math.ceil(len(running) / eta), 1)
+        return sorted(running, key=lambda trial: trial["score"])[promoted:]
+
+    diverged = [trial for trial in running if not np.isfinite(trial["score"])]
+    finite = [trial["score"] for trial in running if np.isfinite(trial["score"])]
+    if kill_quantile is None or len(finite) * (1 - kill_quantile) < 1:
+        # too few trials for any of them to be in the worst (1 - kill_quantile)
+        return diverged
+    threshold = np.quantile(finite, kill_quantile)
+
+    return diverged + [trial for trial in running if np.isfinite(trial["score"]) and trial["score"] > threshold]
+
+
+def format_leaderboard(leaderboard, top=None):
+    """
+    Arguments:
+
+    leaderboard -- list returned by search
+
+    top -- number of trials shown, all if None
+
+    Returns:
+
+    table -- text table of the trials from best to worst
+    """
+
+    lines = ["rank  trial  status     iterations  score     cost      accuracy  params"]
+    for rank, trial in enumerate(leaderboard[:top], 1):
+        params = ", ".join(key + "=" + ("{:.3g}".format(value) if isinstance(value, float) else str(value))
+                           for key, value in sorted(trial["params"].items()))
+        lines.append("{:4d}  {:5d}  {:9s}  {:10d}  {:8.4f}  {:8.4f}  {:8.3f}  {}".format(
+            rank, trial["trial"], trial["status"], trial["iterations"], trial["score"],
+            trial.get("cost", float("nan")), trial.get("accuracy", float("nan")),
+            params if "error" not in trial else params + " " + trial["error"]))
+
+    return "\n".join(lines)
@@ -0,0 +1,205 @@
+import http.client
+import json
+import multiprocessing as mp
+import os
+import socket
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from nnlib.utils.flat import flat_size, flat_views
+from nnlib.utils.layers import layer_activations
+from nnlib.l_layer.inference import InferenceEngine
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, clients reuse their connection
+    disable_nagle_algorithm = True  # headers and body are written separately, do not wait for the ack between them
+
+    def do_GET(self):
+        if self.path != "/health":
+            self.send_error(404)
+            return
+        self._respond("application/json", json.dumps(dict(pid=os.getpid())).encode("utf-8"))
+
+    def do_POST(self):
+        if self.path != "/predict":
+            self.send_error(404)
+            return
+
+        engine = self.server.engine
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        content_type = self.headers.get("Content-Type", "application/octet-stream")
+        try:
+            if content_type == "application/json":
+                X = np.asarray(json.loads(body.decode("utf-8"))["inputs"], dtype=engine.dtype)
+            else:
+                X = np.frombuffer(body, dtype=self.headers.get("X-Dtype", engine.dtype.str))
+            # one example per row
+            X = X.astype(engine.dtype, copy=False).reshape(-1, engine.layers_dims[0])
+        except (ValueError, KeyError, TypeError) as error:
+            self.send_error(400, str(error))
+            return
+
+        if len(X) == 1:
+            # single examples wait briefly for others to share their forward pass
+            AL = engine.submit(X[0]).result()[np.newaxis]
+        else:
+            AL = engine.predict(X.T).T
+
+        if content_type == "application/json":
+            self._respond(content_type, json.dumps(dict(outputs=AL.tolist())).encode("utf-8"))
+        else:
+            self._respond(content_type, np.ascontiguousarray(AL).tobytes(), {"X-Dtype": AL.dtype.str})
+
+    def _respond(self, content_type, body, headers=None):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, sock, engine):
+        # serve on the listening socket inherited from the parent, shared by every worker
+        super().__init__(sock.getsockname(), _Handler, bind_and_activate=False)
+        self.socket.close()
+        self.socket = sock
+        self.engine = engine
+
+
+def _serve(sock, name, layers_dims, dtype, activations, max_batch_size, max_delay):
+    memory = shared_memory.SharedMemory(name=name)
+    flat = np.ndarray((flat_size(layers_dims),), dtype=dtype, buffer=memory.buf)
+    engine = InferenceEngine(flat_views(flat, layers_dims), max_batch_size, max_delay, activations)
+    _HTTPServer(sock, engine).serve_forever()
+
+
+class InferenceServer:
+    """
+    HTTP inference service answered by a pool of worker processes
+
+    The weights are copied once into a multiprocessing.shared_memory block that every worker
+    maps, so adding workers does not add copies of the parameters. All workers accept connections
+    on the same listening socket and micro-batch the single-example requests of their
+    connections with an InferenceEngine.
+
+    POST /predict takes examples as rows, either raw bytes (dtype given by the X-Dtype header,
+    the model's by default) or JSON {"inputs": [[...], ...]}, and answers the outputs as rows
+    in the same format. GET /health answers the pid of the worker.
+
+    Requires Python 3.8 for multiprocessing.shared_memory and socket.create_server,
+    the rest of nnlib runs on 3.6.
+    """
+
+    def __init__(self, parameters, activations=None, host="127.0.0.1", port=0, processes=None,
+                 max_batch_size=4096, max_delay=0.001):
+        """
+        Arguments:
+
+        parameters -- flat-backed dictionary of weights W, b (see nnlib.utils.flat), e.g. LLayer.parameters
+
+        activations -- activation names of layers 1..L, see nnlib.utils.layers
+
+        host -- interface to listen on
+
+        port -- port to listen on, 0 for any free port, see address
+
+        processes -- number of worker processes, defaults to the number of CPUs
+
+        max_batch_size -- largest number of examples in one forward pass
+
+        max_delay -- seconds a single-example request may wait for others to join its batch
+        """
+
+        W = parameters["W"]
+        self.layers_dims = [W[1].shape[1]] + [W[l].shape[0] for l in sorted(W)]
+        self.activations = layer_activations(activations, len(W))
+        self.processes = processes or os.cpu_count()
+        flat = parameters["flat"]
+
+        self.memory = shared_memory.SharedMemory(create=True, size=flat.nbytes)
+        np.ndarray(flat.shape, dtype=flat.dtype, buffer=self.memory.buf)[...] = flat
+
+        self.socket = socket.create_server((host, port), backlog=128)
+        self.address = self.socket.getsockname()
+
+        context = mp.get_context("fork")
+        self.workers = [context.Process(
+                target=_serve,
+                args=(self.socket, self.memory.name, self.layers_dims, flat.dtype, self.activations,
+                      max_batch_size, max_delay),
+                daemon=True
+                ) for _ in range(self.processes)]
+        for worker in self.workers:
+            worker.start()
+
+    def close(self):
+        """
+        Stop the workers and release the shared weights
+        """
+
+        for worker in self.workers:
+            worker.terminate()
+        for worker in self.workers:
+            worker.join()
+        self.workers = []
+        self.socket.close()
+        self.memory.close()
+        self.memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class InferenceClient:
+    """
+    Client of an InferenceServer keeping one connection open
+    """
+
+    def __init__(self, address, timeout=None):
+        """
+        Arguments:
+
+        address -- (host, port) of the server, InferenceServer.address
+
+        timeout -- seconds to wait for the server, None to wait forever
+        """
+
+        self.connection = http.client.HTTPConnection(*address, timeout=timeout)
+
+    def predict(self, X):
+        """
+        Arguments:
+
+        X -- input data of shape (num_features, m)
+
+        Returns:
+
+        AL -- output of the network of shape (layers_dims[-1], m)
+        """
+
+        X = np.ascontiguousarray(X.T)
+        self.connection.request("POST", "/predict", body=X.tobytes(),
+                                headers={"Content-Type": "application/octet-stream", "X-Dtype": X.dtype.str})
+        response = self.connection.getresponse()
+        body = response.read()
+        if response.status != 200:
+            raise RuntimeError("inference server answered " + str(response.status) + " " + response.reason)
+
+        return np.frombuffer(body, dtype=response.getheader("X-Dtype")).reshape(X.shape[0], -1).T
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,446 @@
+import numpy as np
+
+from nnlib.utils.batch import batch_indices
+from nnlib.utils.dataset import columns
+from nnlib.utils.flat import allocate_flat
+from nnlib.utils.initialize import he_initialization
+from nnlib.utils.layers import ACTIVATIONS, layer_activations
+from nnlib.utils.sparse import issparse, matmul
+from nnlib.utils.update import (update_parameters, update_parameters_with_momentum, update_parameters_with_rmsprop,
+                                update_parameters_with_adam, initialize_velocity)
+from nnlib.l_layer import LLayer
+
+
+def initialize_stacked_parameters(layers_dims, models, initialization_func=he_initialization, dtype=np.float64):
+    """
+    Arguments:
+
+    layers_dims -- dimensions of each layer in the network, the same for every model
+
+    models -- number of models K
+
+    dtype -- floating point type of the weights and biases
+
+    Returns:
+
+    parameters -- dictionary of weights W[l] of shape (K, layers_dims[l], layers_dims[l-1])
+    and biases b[l] of shape (K, layers_dims[l], 1), every model initialized independently
+    """
+
+    parameters = dict(W={}, b={})
+
+    for l in range(1, len(layers_dims)):
+        W = np.random.randn(models, layers_dims[l], layers_dims[l-1])*initialization_func(layers_dims, l)
+        parameters["W"][l] = W.astype(dtype, copy=False)
+        parameters["b"][l] = np.zeros((models, layers_dims[l], 1), dtype=dtype)
+
+    return parameters
+
+
+def stack_parameters(parameters_list):
+    """
+    Arguments:
+
+    parameters_list -- list of K dictionaries of weights W, b of the same shapes
+
+    Returns:
+
+    parameters -- dictionary of the weights and biases stacked along a new first axis
+    """
+
+    return {key: {l: np.stack([parameters[key][l] for parameters in parameters_list]) for l in parameters_list[0][key]}
+            for key in ("W", "b")}
+
+
+def unstack_parameters(parameters, k, keys=("W", "b")):
+    """
+    Arguments:
+
+    parameters -- stacked dictionary of weights W, b
+
+    k -- index of a model
+
+    keys -- names of the weight and bias dictionaries, e.g. ("dW", "db") for optimizer state
+
+    Returns:
+
+    parameters_k -- flat-backed copy of the weights and biases of model k, see nnlib.utils.flat
+    """
+
+    W = parameters[keys[0]]
+    layers_dims = [W[1].shape[2]] + [W[l].shape[1] for l in sorted(W)]
+    parameters_k = allocate_flat(layers_dims, keys, dtype=W[1].dtype)
+    for key in keys:
+        for l in W:
+            parameters_k[key][l][...] = parameters[key][l][k]
+
+    return parameters_k
+
+
+def per_model(value, models, dtype=np.float64):
+    """
+    Arguments:
+
+    value -- hyperparameter shared by every model, or sequence of one value per model
+
+    models -- number of models K
+
+    Returns:
+
+    value -- the scalar unchanged, or an array of shape (K, 1, 1) broadcasting against stacked arrays
+    """
+
+    if np.ndim(value) == 0:
+        return value
+    if len(value) != models:
+        raise ValueError("expected " + str(models) + " values, got " + str(len(value)))
+
+    return np.asarray(value, dtype=dtype).reshape(models, 1, 1)
+
+
+def stacked_linear_forward(A_prev, W, b):
+    """
+    Linear part of forward propagation of K models at once
+
+    The input data is shared by every model: the K weight matrices are multiplied by it in a single
+    matmul of shape (K*n, n_prev) @ (n_prev, m), reading the input once instead of K times.
+
+    Arguments:
+
+    A_prev -- input data of shape (n_prev, m), or activations of the previous layers of shape (K, n_prev, m)
+
+    W -- stacked weights of shape (K, n, n_prev)
+
+    b -- stacked biases of shape (K, n, 1)
+
+    Returns:
+
+    Z -- stacked pre-activations of shape (K, n, m)
+    """
+
+    K, n, n_prev = W.shape
+    if A_prev.ndim == 2:
+        Z = matmul(W.reshape(K*n, n_prev), A_prev).reshape(K, n, -1)
+    else:
+        Z = np.matmul(W, A_prev)
+    Z += b
+
+    return Z
+
+
+def stacked_forward(X, parameters, keep_prob, activations=None):
+    """
+    Forward propagation of K models with the same layers_dims on the same input
+
+    Arguments:
+
+    X -- input data of shape (num_features, m), may be a scipy.sparse matrix
+
+    parameters -- stacked weights W and biases b, see initialize_stacked_parameters
+
+    keep_prob -- dropout probability, shared or of shape (K, 1, 1), see per_model
+
+    activations -- activation names of layers 1..L, elementwise for the hidden layers, sigmoid for the last
+
+    Returns:
+
+    AL -- stacked outputs of shape (K, layers_dims[-1], m)
+
+    caches -- dictionary of dictionaries {A, D, Z} indexed by layer, as for model_forward
+    """
+
+    L = len(parameters["W"])
+    activations = layer_activations(activations, L)
+    dropout = np.any(np.less(keep_prob, 1))
+    caches = dict(A={0: X}, D={0: 1}, Z={})
+
+    A = X
+    for l in range(1, L+1):
+        Z = stacked_linear_forward(A, parameters["W"][l], parameters["b"][l])
+        A = ACTIVATIONS[activations[l]][0](Z)
+        D = 1
+        if dropout and l < L:
+            D = np.random.rand(*A.shape) < keep_prob
+            A *= D
+            A /= keep_prob
+        caches["A"][l] = A
+        caches["D"][l] = D
+        caches["Z"][l] = Z
+
+    return A, caches
+
+
+def stacked_backward(AL, Y, parameters, caches, alpha, keep_prob, activations=None):
+    """
+    Backward propagation of K models, the sigmoid output and the cross-entropy differentiated together
+
+    Arguments:
+
+    AL -- stacked outputs of stacked_forward
+
+    Y -- labels of shape (1, m), shared by every model
+
+    parameters -- stacked weights W and biases b
+
+    caches -- caches of stacked_forward
+
+    alpha -- l2 regularization term, shared or of shape (K, 1, 1)
+
+    keep_prob -- dropout probability, shared or of shape (K, 1, 1)
+
+    activations -- activation names of layers 1..L as given to stacked_forward
+
+    Returns:
+
+    grads -- dictionary of stacked gradients dW, db indexed by layer
+    """
+
+    L = len(parameters["W"])
+    activations = layer_activations(activations, L)
+    dropout = np.any(np.less(keep_prob, 1))
+    m = AL.shape[2]
+    grads = dict(dW={}, db={})
+
+    dZ = AL - Y.reshape(1, 1, m)
+    for l in reversed(range(1, L+1)):
+        W = parameters["W"][l]
+        A_prev = caches["A"][l-1]
+        if A_prev.ndim == 2:
+            # the shared input again in a single matmul for every model, dZ of shape (K*n, m)
+            K, n, n_prev = W.shape
+            dW = matmul(dZ.reshape(K*n, m), A_prev.T).reshape(K, n, n_prev)
+        else:
+            dW = np.matmul(dZ, A_prev.transpose(0, 2, 1))
+        dW /= m
+        if np.any(alpha):
+            dW += alpha/m * W
+        grads["dW"][l] = dW
+        grads["db"][l] = np.sum(dZ, axis=2, keepdims=True) / m
+
+        if l > 1:
+            dA_prev = np.matmul(W.transpose(0, 2, 1), dZ)
+            if dropout:
+                dA_prev *= caches["D"][l-1]
+                dA_prev /= keep_prob
+            activation_cache = (caches["Z"][l-1], None if dropout else caches["A"][l-1])
+            dZ = ACTIVATIONS[activations[l-1]][1](dA_prev, activation_cache)
+
+    return grads
+
+
+def stacked_cross_entropy(ZL, Y, parameters, alpha):
+    """
+    Cross-entropy of every model from the pre-activations of its sigmoid output, with l2 regularization
+
+    Arguments:
+
+    ZL -- stacked pre-activations of the last layer of shape (K, 1, m)
+
+    Y -- labels of shape (1, m)
+
+    parameters -- stacked weights W and biases b
+
+    alpha -- l2 regularization term, shared or of shape (K, 1, 1)
+
+    Returns:
+
+    costs -- array of shape (K,), the cost of every model
+    """
+
+    m = Y.shape[1]
+    costs = np.sum(np.maximum(ZL, 0) - ZL*Y + np.log1p(np.exp(-np.abs(ZL))), axis=(1, 2)) / m
+
+    return costs + stacked_l2_penalty(parameters, alpha, m)
+
+
+def stacked_l2_penalty(parameters, alpha, m):
+    """
+    Arguments:
+
+    parameters -- stacked weights W and biases b
+
+    alpha -- l2 regularization term, shared or of shape (K, 1, 1)
+
+    m -- number of examples the cost is averaged over
+
+    Returns:
+
+    penalties -- array of shape (K,), alpha/(2*m) times the sum of squared weights of every model, or 0
+    """
+
+    if not np.any(alpha):
+        return 0
+
+    squares = sum(np.sum(np.square(W), axis=(1, 2)) for W in parameters["W"].values())
+
+    return np.ravel(alpha/(2*m) * squares.reshape(-1, 1, 1))
+
+
+class StackedLLayer:
+    """
+    K models of the same layers_dims trained together on the same data, e.g. an ensemble or a sweep over
+    learning_rate, alpha and keep_prob
+
+    Every layer of the K models runs as one stacked matmul, the first layer as a single matmul reading
+    the input once, so that small models such as (12288, 7, 1) train in little more than the time of one.
+    The models share their batches and, when given per model, differ by their hyperparameters.
+    """
+
+    def fit_params(self, X, Y, layers_dims, num_iterations, models, learning_rate=0.0075, alpha=0, keep_prob=1,
+                   verbose=True, batch_size=None, shuffle=True, dtype=np.float64, optimizer="gd", beta1=0.9,
+                   beta2=None, epsilon=1e-8, activations=None, cost_every=1):
+        """
+        fits K models to X, Y, see LLayer.fit_params
+
+        Arguments:
+
+        X -- input of shape (num_features, m), numpy array, Dataset or scipy.sparse matrix
+
+        Y -- labels for data of shape (1, m)
+
+        layers_dims -- dimensions of each layer in the networks
+
+        num_iterations -- number of passes (epochs) over the training data
+
+        models -- number of models K
+
+        learning_rate, alpha, keep_prob -- hyperparameters shared by every model, or sequences of K values
+
+        verbose -- print the costs every 20 iterations
+
+        batch_size -- number of examples per parameter update, None for full batch gradient descent
+
+        shuffle -- reshuffle the examples every epoch when training in mini-batches
+
+        dtype -- floating point type of the parameters and computations
+
+        optimizer -- "gd", "momentum", "rmsprop" or "adam", see nnlib.utils.update
+
+        beta1, beta2, epsilon -- optimizer parameters, see LLayer.fit_params
+
+        activations -- activation names of layers 1..L, elementwise for the hidden layers and sigmoid for the last
+
+        cost_every -- compute the costs every cost_every epochs only, None or 0 to never compute them
+
+        The costs of every evaluated epoch are appended to costs as arrays of shape (K,).
+        """
+
+        if optimizer not in ("gd", "momentum", "rmsprop", "adam"):
+            raise ValueError("unknown optimizer " + str(optimizer))
+        self.activations = layer_activations(activations, len(layers_dims)-1)
+        L = len(self.activations)
+        if self.activations[L] != "sigmoid" or "softmax" in self.activations.values():
+            raise ValueError("stacked models need elementwise hidden activations and a sigmoid output")
+
+        self.dtype = np.dtype(dtype)
+        if issparse(X):
+            X = X.tocsc()
+        self.X = X
+        self.Y = Y
+        self.layers_dims = layers_dims
+        self.models = models
+        self.parameters = initialize_stacked_parameters(layers_dims, models, dtype=self.dtype)
+        self.learning_rate = per_model(learning_rate, models, self.dtype)
+        self.alpha = per_model(alpha, models, self.dtype)
+        self.keep_prob = per_model(keep_prob, models, self.dtype)
+        self.optimizer = optimizer
+        self.beta1 = beta1
+        self.beta2 = beta2 if beta2 is not None else 0.9 if optimizer == "rmsprop" else 0.999
+        self.epsilon = epsilon
+        self.v = initialize_velocity(self.parameters) if optimizer in ("momentum", "adam") else None
+        self.s = initialize_velocity(self.parameters) if optimizer in ("rmsprop", "adam") else None
+        self.batch_size = batch_size
+        self.t = 0
+        self.epoch = -1
+        self.costs = []
+        self.cost_iterations = []
+        m = X.shape[1]
+
+        for i in range(num_iterations):
+            evaluate = bool(cost_every) and i % cost_every == 0
+            costs = 0
+            indices = list(batch_indices(m, batch_size, shuffle))
+            for index in indices:
+                X_batch = columns(self.X, index).astype(self.dtype, copy=False)
+                Y_batch = self.Y[:, index]
+                AL, caches = stacked_forward(X_batch, self.parameters, self.keep_prob, self.activations)
+                grads = stacked_backward(AL, Y_batch, self.parameters, caches, self.alpha, self.keep_prob,
+                                         self.activations)
+                if evaluate:
+                    m_batch = Y_batch.shape[1]
+                    costs = costs + stacked_cross_entropy(caches["Z"][L], Y_batch, self.parameters, 0) * m_batch / m
+                self._update(grads)
+            if evaluate:
+                # the l2 term of every batch, summed once with the weights at the end of the epoch
+                self.costs.append(costs + len(indices) * stacked_l2_penalty(self.parameters, self.alpha, m))
+                self.cost_iterations.append(i)
+                if verbose and i % 20 == 0:
+                    print(str(i), 'iterations:', str(self.costs[-1]))
+            self.epoch = i
+
+    def _update(self, grads):
+        self.t += 1
+
+        if self.optimizer == "momentum":
+            update_parameters_with_momentum(self.parameters, grads, self.v, self.learning_rate, self.beta1)
+        elif self.optimizer == "rmsprop":
+            update_parameters_with_rmsprop(self.parameters, grads, self.s, self.learning_rate, self.beta2, self.epsilon)
+        elif self.optimizer == "adam":
+            update_parameters_with_adam(self.parameters, grads, self.v, self.s, self.t, self.learning_rate,
+                                        self.beta1, self.beta2, self.epsilon)
+        else:
+            self.parameters = update_parameters(self.parameters, grads, self.learning_rate)
+
+    def output(self, X):
+        """
+        outputs of the last layer of every model for input X, of shape (K, layers_dims[-1], m)
+        """
+
+        AL, _ = stacked_forward(X.astype(self.dtype, copy=False), self.parameters, 1, self.activations)
+
+        return AL
+
+    def predict(self, X, ensemble=False):
+        """
+        labels predicted by every model, of shape (K, 1, m), or by their average output with ensemble, of shape (1, m)
+        """
+
+        AL = self.output(X)
+        if ensemble:
+            return np.mean(AL, axis=0) >= 0.5
+
+        return AL >= 0.5
+
+    def verify_cost(self, X_test, Y_test):
+        """
+        cost of every model on X_test, Y_test, of shape (K,)
+        """
+
+        _, caches = stacked_forward(X_test.astype(self.dtype, copy=False), self.parameters, 1, self.activations)
+
+        return stacked_cross_entropy(caches["Z"][len(self.activations)], Y_test, self.parameters, self.alpha)
+
+    def verify_accuracy(self, X_test, Y_test, ensemble=False):
+        """
+        accuracy of every model on X_test, Y_test, of shape (K,), or of their ensemble with ensemble
+        """
+
+        p = self.predict(X_test, ensemble)
+
+        return np.mean(p == Y_test, axis=-1).ravel() if not ensemble else np.mean(p == Y_test)
+
+    def model(self, k):
+        """
+        LLayer with the parameters, optimizer state and costs of model k, for output, predict, quantize, save...
+        """
+
+        hyperparameters = {key: float(np.ravel(getattr(self, key))[k]) if np.ndim(getattr(self, key))
+                           else getattr(self, key) for key in ("learning_rate", "alpha", "keep_prob")}
+
+        return LLayer._from_parameters(
+                unstack_parameters(self.parameters, k), self.layers_dims, self.activations, self.dtype,
+                v=unstack_parameters(self.v, k, ("dW", "db")) if self.v is not None else None,
+                s=unstack_parameters(self.s, k, ("dW", "db")) if self.s is not None else None,
+                batch_size=self.batch_size, optimizer=self.optimizer, beta1=self.beta1, beta2=self.beta2,
+                epsilon=self.epsilon, t=self.t, epoch=self.epoch, costs=[float(costs[k]) for costs in self.costs],
+                cost_iterations=list(self.cost_iterations), finished=True, **hyperparameters)
@@ -0,0 +1,37 @@
+import numpy as np
+
+from nnlib.utils.flat import allocate_flat
+
+
+def initialize_workspace(layers_dims, m, dtype=np.float64):
+    """
+    Preallocate every array written during a forward and backward pass
+
+    Arguments:
+
+    layers_dims -- dimensions of each layer in the network
+
+    m -- number of examples in each pass
+
+    dtype -- floating point type the pass is computed in
+
+    Returns:
+
+    workspace -- dictionary of dictionaries {A, D, Z, dZ, dA, dW, db} of arrays indexed by layer,
+    used as both the caches of model_forward and the grads of model_backward,
+    dW and db are views into one flat gradient buffer stored under "flat"
+    """
+
+    workspace = dict(A={}, D={}, Z={}, dZ={}, dA={}, **allocate_flat(layers_dims, keys=("dW", "db"), dtype=dtype))
+    L = len(layers_dims) - 1
+    workspace["D"][0] = 1  # same as model_forward, the input is never dropped
+
+    for l in range(1, L+1):
+        shape = (layers_dims[l], m)
+        workspace["A"][l] = np.empty(shape, dtype=dtype)
+        workspace["D"][l] = np.empty(shape, dtype=bool)
+        workspace["Z"][l] = np.empty(shape, dtype=dtype)
+        workspace["dZ"][l] = np.empty(shape, dtype=dtype)
+        workspace["dA"][l] = np.empty(shape, dtype=dtype)
+
+    return workspace
@@ -1,7 +1,7 @@
 import numpy as np
 
 
-def sigmoid(Z):
+def sigmoid(Z, out=None):
     """
     sigmoid activation function
 
@@ -9,6 +9,8 @@ def sigmoid(Z):
 
     Z -- numpy array
 
+    out -- optional preallocated array to write the result into
+
     Returns:
 
     A -- output of sigmoid(Z)
@@ -16,12 +18,14 @@ def sigmoid(Z):
     cache -- Z, useful for back propagation
     """
 
-    A = 1/(1+np.exp(-Z))
+    A = np.exp(np.negative(Z, out=out), out=out)
+    A += 1
+    np.reciprocal(A, out=A)
 
     return A
 
 
-def relu(Z):
+def relu(Z, out=None):
     """
     RELU activation function
 
@@ -29,6 +33,8 @@ def relu(Z):
 
     Z -- numpy array
 
+    out -- optional preallocated array to write the result into
+
     Returns:
 
     A -- output of rulu(Z)
@@ -36,6 +42,122 @@ def relu(Z):
     cache -- Z, useful for back propagation
     """
 
-    A = np.maximum(0, Z)
+    A = np.maximum(0, Z, out=out)
+
+    return A
+
+
+def leaky_relu(Z, out=None, slope=0.01):
+    """
+    leaky RELU activation function
+
+    Arguments:
+
+    Z -- numpy array
+
+    out -- optional preallocated array to write the result into, may be Z itself
+
+    slope -- slope of the negative part, between 0 and 1
+
+    Returns:
+
+    A -- output of leaky_relu(Z)
+    """
+
+    A = np.maximum(Z, np.multiply(slope, Z), out=out)
+
+    return A
+
+
+def tanh(Z, out=None):
+    """
+    hyperbolic tangent activation function
+
+    Arguments:
+
+    Z -- numpy array
+
+    out -- optional preallocated array to write the result into, may be Z itself
+
+    Returns:
+
+    A -- output of tanh(Z)
+    """
+
+    A = np.tanh(Z, out=out)
+
+    return A
+
+
+_GELU_SCALE = np.sqrt(2/np.pi)
+_GELU_CUBIC = 0.044715
+
+
+def gelu(Z, out=None):
+    """
+    GELU activation function, tanh approximation
+
+    Arguments:
+
+    Z -- numpy array
+
+    out -- optional preallocated array to write the result into, may be Z itself
+
+    Returns:
+
+    A -- output of 0.5 * Z * (1 + tanh(sqrt(2/pi) * (Z + 0.044715 * Z**3)))
+    """
+
+    T = np.power(Z, 3)
+    T *= _GELU_CUBIC
+    T += Z
+    T *= _GELU_SCALE
+    np.tanh(T, out=T)
+    T += 1
+    T *= 0.5
+    A = np.multiply(Z, T, out=out)
+
+    return A
+
+
+def softmax(Z, out=None):
+    """
+    softmax activation function over the units of each example (axis 0)
+
+    Arguments:
+
+    Z -- numpy array of shape (units, m)
+
+    out -- optional preallocated array to write the result into, may be Z itself
+
+    Returns:
+
+    A -- output of softmax(Z), every column sums to 1
+    """
+
+    # shifting by the largest logit of each example keeps exp from overflowing
+    A = np.subtract(Z, Z.max(axis=0, keepdims=True), out=out)
+    np.exp(A, out=A)
+    A /= A.sum(axis=0, keepdims=True)
+
+    return A
+
+
+def identity(Z, out=None):
+    """
+    identity (linear) activation function
+
+    Arguments:
+
+    Z -- numpy array
+
+    out -- optional preallocated array to write the result into, may be Z itself
+
+    Returns:
+
+    A -- copy of Z
+    """
+
+    A = np.positive(Z, out=out)
 
     return A
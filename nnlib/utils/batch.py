@@ -0,0 +1,32 @@
+import numpy as np
+
+
+def batch_indices(m, batch_size=None, shuffle=True):
+    """
+    Generator over the example indices of each mini-batch
+
+    Arguments:
+
+    m -- number of examples
+
+    batch_size -- number of examples per mini-batch, None for a single full batch
+
+    shuffle -- visit the examples in a new random order (drawn from np.random) on every call
+
+    Yields:
+
+    index -- slice, or sorted integer array when shuffling, of the examples in the current mini-batch
+    """
+
+    if batch_size is None or batch_size >= m:
+        yield slice(None)
+        return
+
+    if shuffle:
+        permutation = np.random.permutation(m)
+        for k in range(0, m, batch_size):
+            # sorted indices keep reads from disk backed inputs sequential
+            yield np.sort(permutation[k:k+batch_size])
+    else:
+        for k in range(0, m, batch_size):
+            yield slice(k, k+batch_size)
@@ -0,0 +1,95 @@
+import json
+import os
+import struct
+
+import numpy as np
+
+
+MAGIC = b"NNLIB001"
+ALIGNMENT = 64
+
+
+def _aligned(offset):
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def save_checkpoint(path, arrays, meta):
+    """
+    Write arrays and metadata to a single binary file that load_checkpoint can memory-map
+
+    The file is the 8 byte magic, the length of a JSON header as a little-endian uint64, the header
+    and then the raw bytes of every array, each starting on a 64 byte boundary. The file is written
+    next to path and renamed over it, so an interrupted save never leaves a truncated checkpoint.
+
+    Arguments:
+
+    path -- file to write
+
+    arrays -- dictionary of numpy arrays by name
+
+    meta -- JSON serializable dictionary stored in the header
+    """
+
+    arrays = {name: np.ascontiguousarray(array) for name, array in arrays.items()}
+    layout = {}
+    header = b""
+    # the offsets depend on the header length and the header contains the offsets, grow it until both agree
+    start = 0
+    while True:
+        offset = start
+        for name, array in arrays.items():
+            layout[name] = dict(dtype=array.dtype.str, shape=list(array.shape), offset=offset)
+            offset = _aligned(offset + array.nbytes)
+        header = json.dumps(dict(meta=meta, arrays=layout)).encode("utf-8")
+        if _aligned(len(MAGIC) + 8 + len(header)) <= start:
+            break
+        start = _aligned(len(MAGIC) + 8 + len(header))
+
+    tmp_path = str(path) + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for name, array in arrays.items():
+            f.write(b"\0" * (layout[name]["offset"] - f.tell()))
+            f.write(memoryview(array.reshape(-1)).cast("B"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(path, mmap=False):
+    """
+    Read a file written by save_checkpoint
+
+    Arguments:
+
+    path -- file to read
+
+    mmap -- map the arrays read-only from the file instead of reading them, nothing is copied
+    and the pages are shared by every process mapping the same file
+
+    Returns:
+
+    arrays -- dictionary of numpy arrays by name
+
+    meta -- metadata dictionary
+    """
+
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(str(path) + " is not an nnlib checkpoint")
+        length, = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(length).decode("utf-8"))
+
+        arrays = {}
+        for name, entry in header["arrays"].items():
+            dtype = np.dtype(entry["dtype"])
+            shape = tuple(entry["shape"])
+            if mmap and int(np.prod(shape)) > 0:
+                arrays[name] = np.memmap(path, dtype=dtype, mode="r", offset=entry["offset"], shape=shape)
+            else:
+                f.seek(entry["offset"])
+                arrays[name] = np.fromfile(f, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+
+    return arrays, header["meta"]
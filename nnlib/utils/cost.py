@@ -15,6 +15,31 @@ def cross_entropy(AL, Y, parameters, alpha):
 
     alpha -- l2 regularization parameter
 
+    Returns:
+
+    cost -- cross-entropy cost with l2 regularization
+    """
+
+    m = Y.shape[1]
+    cost = np.squeeze(-np.sum(Y * np.log(AL) + (1-Y) * np.log(1-AL), keepdims=True)/m)
+    cost += l2_penalty(parameters, alpha, m)
+
+    return cost
+
+
+def cross_entropy_with_logits(ZL, Y, parameters, alpha):
+    """
+    Implement cross-entropy loss of a sigmoid output layer from its pre-activation, with l2 regularization
+
+    Computed as max(Z, 0) - Z*Y + log(1 + exp(-|Z|)), which neither overflows nor takes
+    the log of 0 when the sigmoid saturates.
+
+    Arguments:
+
+    ZL -- pre-activation of the sigmoid output layer
+
+    Y -- result vector
+
     parameters -- self explanatory
 
     alpha -- l2 regularization parameter
@@ -25,7 +50,121 @@ def cross_entropy(AL, Y, parameters, alpha):
     """
 
     m = Y.shape[1]
-    cost = np.squeeze(-np.sum(Y * np.log(AL) + (1-Y) * np.log(1-AL), keepdims=True)/m)
-    cost += alpha/(2*m) * sum((np.sum(np.square(parameters['W'][Wl])) for Wl in parameters['W']))
+    Y = Y.reshape(ZL.shape)
+    cost = np.sum(np.maximum(ZL, 0) - ZL*Y + np.log1p(np.exp(-np.abs(ZL)))) / m
+    cost += l2_penalty(parameters, alpha, m)
 
     return cost
+
+
+def sparse_cross_entropy(AL, Y, parameters, alpha):
+    """
+    Implement categorical cross-entropy loss of a softmax output layer for integer labels, with l2 regularization
+
+    Arguments:
+
+    AL -- class probabilities of shape (classes, m)
+
+    Y -- integer labels of shape (1, m), the class of each example rather than one-hot columns
+
+    parameters -- self explanatory
+
+    alpha -- l2 regularization parameter
+
+    Returns:
+
+    cost -- cross-entropy cost with l2 regularization
+    """
+
+    m = AL.shape[1]
+    # only the probability of the true class of each example is read
+    cost = -np.sum(np.log(AL[np.ravel(Y), np.arange(m)])) / m
+    cost += l2_penalty(parameters, alpha, m)
+
+    return cost
+
+
+def sparse_cross_entropy_with_logits(ZL, Y, parameters, alpha):
+    """
+    Implement categorical cross-entropy loss of a softmax output layer from its pre-activation
+    for integer labels, with l2 regularization
+
+    Computed as logsumexp(Z) - Z[Y] with the largest logit of each example factored out,
+    which neither overflows nor takes the log of 0.
+
+    Arguments:
+
+    ZL -- pre-activation of the softmax output layer of shape (classes, m)
+
+    Y -- integer labels of shape (1, m)
+
+    parameters -- self explanatory
+
+    alpha -- l2 regularization parameter
+
+    Returns:
+
+    cost -- cross-entropy cost with l2 regularization
+    """
+
+    m = ZL.shape[1]
+    Z_max = ZL.max(axis=0)
+    log_sum_exp = np.log(np.sum(np.exp(ZL - Z_max), axis=0)) + Z_max
+    cost = np.sum(log_sum_exp - ZL[np.ravel(Y), np.arange(m)]) / m
+    cost += l2_penalty(parameters, alpha, m)
+
+    return cost
+
+
+def output_cost(AL, ZL, Y, parameters, alpha, activation):
+    """
+    Cost matching the activation of the output layer, from the logits when a stable form exists
+
+    Arguments:
+
+    AL -- output of the last layer
+
+    ZL -- pre-activation of the last layer
+
+    Y -- labels, integer labels of shape (1, m) for a softmax output
+
+    parameters -- self explanatory
+
+    alpha -- l2 regularization parameter
+
+    activation -- name of the activation of the last layer
+
+    Returns:
+
+    cost -- sparse categorical cross-entropy for a softmax output, binary cross-entropy otherwise
+    """
+
+    if activation == "softmax":
+        return sparse_cross_entropy_with_logits(ZL, Y, parameters, alpha)
+    if activation == "sigmoid":
+        return cross_entropy_with_logits(ZL, Y, parameters, alpha)
+
+    return cross_entropy(AL, Y, parameters, alpha)
+
+
+def l2_penalty(parameters, alpha, m):
+    """
+    l2 regularization term of the cost
+
+    Arguments:
+
+    parameters -- python dictionary of parameters
+
+    alpha -- l2 regularization parameter
+
+    m -- number of examples the cost is averaged over
+
+    Returns:
+
+    penalty -- alpha/(2*m) times the sum of squared weights
+    """
+
+    if not alpha:
+        return 0
+
+    return alpha/(2*m) * sum((np.sum(np.square(parameters['W'][Wl])) for Wl in parameters['W']))
@@ -0,0 +1,109 @@
+import numpy as np
+
+from nnlib.utils.sparse import issparse
+
+
+class Dataset:
+    """
+    Input matrix backed by on-disk storage (np.memmap, h5py dataset, ...), read in chunks on demand
+
+    Examples are converted to floats and normalized only when their columns are read,
+    so the full training set never has to be loaded into memory.
+    """
+
+    def __init__(self, data, scale=1, samples_first=True, chunk_size=1024, dtype=np.float64):
+        """
+        Arguments:
+
+        data -- array-like storage supporting numpy style slicing, e.g. np.memmap or h5py.Dataset
+
+        scale -- every value read is divided by scale, e.g. 255. for 8 bit images
+
+        samples_first -- True if data has shape (m, ...) with one example per row (the h5py image layout),
+        False if data already has shape (num_features, m)
+
+        chunk_size -- number of examples read at once when a whole pass over the data is needed
+
+        dtype -- floating point type of the columns returned
+        """
+
+        self.data = data
+        self.scale = scale
+        self.samples_first = samples_first
+        self.chunk_size = chunk_size
+        self.dtype = dtype
+
+        if samples_first:
+            self.shape = (int(np.prod(data.shape[1:])), data.shape[0])
+        else:
+            self.shape = tuple(data.shape)
+
+    def columns(self, index):
+        """
+        Read columns of the (num_features, m) input matrix
+
+        Arguments:
+
+        index -- slice or integer array of example indices
+
+        Returns:
+
+        X -- normalized float array of shape (num_features, number of examples selected)
+        """
+
+        if isinstance(index, slice):
+            X = self._read(index)
+        else:
+            # h5py only supports increasing indices, read in order and undo the sort afterwards
+            index = np.asarray(index)
+            order = np.argsort(index)
+            X = np.empty((self.shape[0], len(index)), dtype=self.dtype)
+            X[:, order] = self._read(index[order])
+
+        return X
+
+    def chunks(self):
+        """
+        Generator over consecutive chunks of at most chunk_size columns
+        """
+
+        m = self.shape[1]
+
+        for k in range(0, m, self.chunk_size):
+            yield self.columns(slice(k, k+self.chunk_size))
+
+    def _read(self, index):
+        if self.samples_first:
+            rows = np.asarray(self.data[index])
+            X = rows.reshape(rows.shape[0], -1).T.astype(self.dtype)
+        else:
+            X = np.array(self.data[:, index], dtype=self.dtype)
+
+        if self.scale != 1:
+            X /= self.scale
+
+        return X
+
+
+def columns(X, index):
+    """
+    Select columns of an in-memory matrix or a Dataset
+
+    Arguments:
+
+    X -- numpy array or scipy.sparse CSC matrix of shape (num_features, m), or Dataset
+
+    index -- slice or integer array of example indices
+
+    Returns:
+
+    X_columns -- numpy array of the selected columns
+    """
+
+    if isinstance(X, Dataset):
+        return X.columns(index)
+    if issparse(X) and isinstance(index, slice) and index == slice(None):
+        # indexing would copy the whole matrix
+        return X
+
+    return X[:, index]
@@ -1,7 +1,9 @@
 import numpy as np
 
+from nnlib.utils.activation import sigmoid, tanh, softmax, _GELU_SCALE, _GELU_CUBIC
 
-def sigmoid_backward(dA, cache):
+
+def sigmoid_backward(dA, cache, out=None):
     """
     partial derivative of single SIGMOID unit
 
@@ -9,20 +11,24 @@ def sigmoid_backward(dA, cache):
 
     dA -- post-activation gradient
 
-    cache -- (Z, A), the pre/post-activation matrix
+    cache -- (Z, A), the pre/post-activation matrix, A is recomputed from Z if it is None
+
+    out -- optional preallocated array to write the result into
 
     Returns:
 
     dZ -- gradient of cost with respect to Z
     """
 
-    A = cache[1]
-    dZ = dA * A * (1-A)
+    A = cache[1] if cache[1] is not None else sigmoid(cache[0])
+    dZ = np.subtract(1, A, out=out)
+    dZ *= A
+    dZ *= dA
 
     return dZ
 
 
-def relu_backward(dA, cache):
+def relu_backward(dA, cache, out=None):
     """
     partial derivative of single RELU unit
 
@@ -32,13 +38,174 @@ def relu_backward(dA, cache):
 
     cache -- (Z, A), the pre/post-activation matrix
 
+    out -- optional preallocated array to write the result into
+
+    Returns:
+
+    dZ -- gradient of cost with respect to Z
+    """
+
+    Z = cache[0]
+    dZ = np.multiply(dA, Z > 0, out=out)
+
+    return dZ
+
+
+def leaky_relu_backward(dA, cache, out=None, slope=0.01):
+    """
+    partial derivative of single leaky RELU unit
+
+    Arguments:
+
+    dA -- post-activation gradient
+
+    cache -- (Z, A), the pre/post-activation matrix
+
+    out -- optional preallocated array to write the result into
+
+    slope -- slope of the negative part, as in the forward pass
+
     Returns:
 
     dZ -- gradient of cost with respect to Z
     """
 
     Z = cache[0]
-    dZ = np.array(dA, copy=True)
-    dZ[Z <= 0] = 0
+    dZ = np.multiply(dA, np.where(Z > 0, 1, slope).astype(dA.dtype, copy=False), out=out)
+
+    return dZ
+
+
+def tanh_backward(dA, cache, out=None):
+    """
+    partial derivative of single TANH unit
+
+    Arguments:
+
+    dA -- post-activation gradient
+
+    cache -- (Z, A), the pre/post-activation matrix, A is recomputed from Z if it is None
+
+    out -- optional preallocated array to write the result into
+
+    Returns:
+
+    dZ -- gradient of cost with respect to Z
+    """
+
+    A = cache[1] if cache[1] is not None else tanh(cache[0], out=out)
+    dZ = np.square(A, out=out)
+    np.subtract(1, dZ, out=dZ)
+    dZ *= dA
+
+    return dZ
+
+
+def gelu_backward(dA, cache, out=None):
+    """
+    partial derivative of single GELU unit, tanh approximation
+
+    Arguments:
+
+    dA -- post-activation gradient
+
+    cache -- (Z, A), the pre/post-activation matrix
+
+    out -- optional preallocated array to write the result into
+
+    Returns:
+
+    dZ -- gradient of cost with respect to Z
+    """
+
+    Z = cache[0]
+    Z2 = np.square(Z)
+    T = np.multiply(Z2, _GELU_CUBIC)
+    T += 1
+    T *= Z
+    T *= _GELU_SCALE
+    np.tanh(T, out=T)
+    # 0.5 * (1 + T) + 0.5 * Z * (1 - T**2) * sqrt(2/pi) * (1 + 3 * 0.044715 * Z**2)
+    Z2 *= 3*_GELU_CUBIC
+    Z2 += 1
+    Z2 *= _GELU_SCALE
+    Z2 *= Z
+    dZ = np.square(T, out=out)
+    np.subtract(1, dZ, out=dZ)
+    dZ *= Z2
+    dZ += T
+    dZ += 1
+    dZ *= 0.5
+    dZ *= dA
+
+    return dZ
+
+
+def softmax_backward(dA, cache, out=None):
+    """
+    partial derivative of a SOFTMAX layer, the product of dA with the jacobian of each example
+
+    Arguments:
+
+    dA -- post-activation gradient
+
+    cache -- (Z, A), the pre/post-activation matrix, A is recomputed from Z if it is None
+
+    out -- optional preallocated array to write the result into
+
+    Returns:
+
+    dZ -- gradient of cost with respect to Z
+    """
+
+    A = cache[1] if cache[1] is not None else softmax(cache[0])
+    dZ = np.multiply(dA, A, out=out)
+    dZ -= A * dZ.sum(axis=0, keepdims=True)
+
+    return dZ
+
+
+def identity_backward(dA, cache, out=None):
+    """
+    partial derivative of single identity unit
+
+    Arguments:
+
+    dA -- post-activation gradient
+
+    cache -- (Z, A), the pre/post-activation matrix
+
+    out -- optional preallocated array to write the result into
+
+    Returns:
+
+    dZ -- gradient of cost with respect to Z, a copy of dA
+    """
+
+    dZ = np.positive(dA, out=out)
+
+    return dZ
+
+
+def softmax_cross_entropy_backward(AL, Y, out=None):
+    """
+    gradient of the sparse categorical cross-entropy with respect to the pre-activation of a softmax layer
+
+    Arguments:
+
+    AL -- class probabilities of shape (classes, m)
+
+    Y -- integer labels of shape (1, m)
+
+    out -- optional preallocated array to write the result into
+
+    Returns:
+
+    dZ -- AL with 1 subtracted at the true class of each example, i.e. AL - one_hot(Y)
+    """
+
+    dZ = np.positive(AL, out=out)
+    # one scattered subtraction per example instead of a dense (classes, m) label matrix
+    dZ[np.ravel(Y), np.arange(AL.shape[1])] -= 1
 
     return dZ
@@ -0,0 +1,80 @@
+import numpy as np
+
+
+MASKS = ("bool", "packed", "seed")
+
+
+def dropout_mask(shape, keep_prob, rng=None, out=None):
+    """
+    Boolean mask keeping every unit with probability keep_prob
+
+    Arguments:
+
+    shape -- shape of the activations, (units, m)
+
+    keep_prob -- probability of keeping a unit
+
+    rng -- np.random.Generator to draw from, the global np.random state if None
+
+    out -- optional preallocated boolean array to write the mask into
+
+    Returns:
+
+    D -- boolean mask of the given shape
+    """
+
+    if rng is None:
+        return np.less(np.random.rand(*shape), keep_prob, out=out)
+
+    # single precision uniforms are plenty to compare against keep_prob, and half the size
+    return np.less(rng.random(shape, dtype=np.float32), keep_prob, out=out)
+
+
+def store_mask(D, masks="bool", seed=None):
+    """
+    Compact form of a mask kept for backward propagation
+
+    Arguments:
+
+    D -- boolean mask
+
+    masks -- "bool" to keep D itself, "packed" for 8 masks per byte, "seed" to keep only the seed it was drawn from
+
+    seed -- np.random.SeedSequence D was drawn from with dropout_mask(..., np.random.default_rng(seed)), for "seed"
+
+    Returns:
+
+    stored -- D, its bits packed in a uint8 array, or seed, see load_mask
+    """
+
+    if masks == "packed":
+        return np.packbits(D, axis=None)
+    if masks == "seed":
+        return seed
+
+    return D
+
+
+def load_mask(stored, shape, keep_prob):
+    """
+    Boolean mask from the form returned by store_mask
+
+    Arguments:
+
+    stored -- boolean mask, packed mask, seed or 1 for no mask
+
+    shape -- shape of the mask, (units, m)
+
+    keep_prob -- probability of keeping a unit, needed to redraw a mask from its seed
+
+    Returns:
+
+    D -- boolean mask of the given shape, or stored itself if it is not compacted
+    """
+
+    if isinstance(stored, np.random.SeedSequence):
+        return dropout_mask(shape, keep_prob, np.random.default_rng(stored))
+    if isinstance(stored, np.ndarray) and stored.dtype == np.uint8:
+        return np.unpackbits(stored, count=shape[0]*shape[1]).reshape(shape).view(bool)
+
+    return stored
@@ -0,0 +1,64 @@
+import numpy as np
+
+
+def flat_size(layers_dims):
+    """
+    Arguments:
+
+    layers_dims -- dimensions of each layer in the network
+
+    Returns:
+
+    size -- number of weights and biases in the network
+    """
+
+    return sum(layers_dims[l] * (layers_dims[l-1] + 1) for l in range(1, len(layers_dims)))
+
+
+def flat_views(buffer, layers_dims, keys=("W", "b")):
+    """
+    Split one contiguous buffer into per-layer weight and bias views
+
+    Arguments:
+
+    buffer -- 1-D array of flat_size(layers_dims) elements
+
+    layers_dims -- dimensions of each layer in the network
+
+    keys -- names of the weight and bias dictionaries, e.g. ("dW", "db") for gradients
+
+    Returns:
+
+    views -- dictionary of dictionaries of views into buffer, the buffer itself is stored under "flat"
+    """
+
+    W_key, b_key = keys
+    views = {W_key: {}, b_key: {}, "flat": buffer}
+    offset = 0
+
+    for l in range(1, len(layers_dims)):
+        for key, shape in ((W_key, (layers_dims[l], layers_dims[l-1])), (b_key, (layers_dims[l], 1))):
+            size = shape[0] * shape[1]
+            views[key][l] = buffer[offset:offset+size].reshape(shape)
+            offset += size
+
+    return views
+
+
+def allocate_flat(layers_dims, keys=("W", "b"), dtype=np.float64):
+    """
+    Allocate zeroed flat-backed weights and biases, see flat_views
+    """
+
+    return flat_views(np.zeros(flat_size(layers_dims), dtype=dtype), layers_dims, keys)
+
+
+def flat_zeros_like(parameters, keys=("dW", "db")):
+    """
+    Allocate zeroed flat-backed arrays shaped like flat-backed parameters, e.g. gradients or optimizer state
+    """
+
+    W = parameters["W"]
+    layers_dims = [W[1].shape[1]] + [W[l].shape[0] for l in sorted(W)]
+
+    return flat_views(np.zeros_like(parameters["flat"]), layers_dims, keys)
@@ -1,5 +1,7 @@
 import numpy as np
 
+from nnlib.utils.flat import allocate_flat
+
 
 def he_initialization(layers_dims, layer):
     """
@@ -16,22 +18,30 @@ def he_initialization(layers_dims, layer):
     return np.sqrt(np.divide(2, layers_dims[layer-1]))
 
 
-def initialize_parameters(layers_dims, initialization_func=he_initialization):
+def initialize_parameters(layers_dims, initialization_func=he_initialization, flat=False, dtype=np.float64):
     """
     Arguments:
 
     layer_dims -- python list containing tuples of dimensions of each layer in the network
 
+    flat -- back all weights and biases by one contiguous buffer, stored under "flat"
+
+    dtype -- floating point type of the weights and biases
+
     Returns:
 
     parameters -- python dictionary containing dictionary of Weights "W[]" and dictionary of bias vectors "b[]"
     """
 
-    parameters = dict(W={}, b={})
+    parameters = allocate_flat(layers_dims, dtype=dtype) if flat else dict(W={}, b={})
     L = len(layers_dims)
 
     for l in range(1, L):
-        parameters["W"][l] = np.random.randn(layers_dims[l], layers_dims[l-1])*initialization_func(layers_dims, l)
-        parameters["b"][l] = np.zeros((layers_dims[l], 1))
+        W = np.random.randn(layers_dims[l], layers_dims[l-1])*initialization_func(layers_dims, l)
+        if flat:
+            parameters["W"][l][...] = W
+        else:
+            parameters["W"][l] = W.astype(dtype, copy=False)
+            parameters["b"][l] = np.zeros((layers_dims[l], 1), dtype=dtype)
 
     return parameters
@@ -0,0 +1,60 @@
+from nnlib.utils.activation import sigmoid, relu, leaky_relu, tanh, gelu, softmax, identity
+from nnlib.utils.derivative import (sigmoid_backward, relu_backward, leaky_relu_backward, tanh_backward, gelu_backward,
+                                    softmax_backward, identity_backward)
+
+
+# activation name -> (forward, backward), both called as f(array, out=None) and able to write into out
+ACTIVATIONS = {
+        "sigmoid": (sigmoid, sigmoid_backward),
+        "relu": (relu, relu_backward),
+        "leaky_relu": (leaky_relu, leaky_relu_backward),
+        "tanh": (tanh, tanh_backward),
+        "gelu": (gelu, gelu_backward),
+        "softmax": (softmax, softmax_backward),
+        "linear": (identity, identity_backward),
+        }
+
+
+def register_activation(name, forward, backward):
+    """
+    Make an activation available to layer_activations by name
+
+    Arguments:
+
+    name -- name used in the activations of a model
+
+    forward -- function (Z, out=None) -> A, must accept out being Z itself
+
+    backward -- function (dA, cache, out=None) -> dZ where cache is (Z, A),
+    A is None when the stored activations were changed by dropout and must then be derived from Z
+    """
+
+    ACTIVATIONS[name] = (forward, backward)
+
+
+def layer_activations(activations, L):
+    """
+    Arguments:
+
+    activations -- sequence of the L activation names of layers 1..L,
+    None for relu in the hidden layers and sigmoid in the last layer
+
+    L -- number of layers in the network
+
+    Returns:
+
+    activations -- dictionary of activation names indexed by layer
+    """
+
+    if activations is None:
+        return {l: "relu" if l < L else "sigmoid" for l in range(1, L+1)}
+
+    if isinstance(activations, dict):
+        activations = [activations[l] for l in range(1, L+1)]
+    if len(activations) != L:
+        raise ValueError("expected " + str(L) + " activations, got " + str(len(activations)))
+    for name in activations:
+        if name not in ACTIVATIONS:
+            raise ValueError("unknown activation " + str(name))
+
+    return {l: name for l, name in enumerate(activations, 1)}
@@ -0,0 +1,61 @@
+import queue
+import threading
+
+
+_END = object()
+
+
+def prefetch(iterable, depth=2):
+    """
+    Generator consuming iterable in a background thread, up to depth items ahead of the caller
+
+    NumPy releases the GIL in its heavy operations, so preparing the next items
+    overlaps with whatever the caller computes on the current one.
+
+    Arguments:
+
+    iterable -- items to prepare in the background, e.g. a generator of mini-batches
+
+    depth -- maximum number of items prepared but not yet consumed
+
+    Yields:
+
+    item -- items of iterable in the same order, exceptions raised while preparing them are re-raised
+    """
+
+    items = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+            put((_END, None))
+        except BaseException as error:
+            put((_END, error))
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item, error = items.get()
+            if item is _END:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        # the caller may stop early, unblock the producer before waiting for it
+        stop.set()
+        thread.join()
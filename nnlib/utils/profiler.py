@@ -0,0 +1,74 @@
+import json
+import time
+
+
+class Profiler:
+    """
+    Training hooks recording wall time, FLOP estimates, bytes allocated and samples processed
+
+    model_forward, model_backward and LLayer.fit_params call begin(phase, layer) before
+    and end(phase, layer, ...) after each layer ("forward", "backward" and "recompute" with recompute_every)
+    and each training phase ("step", "cost", "update", "validation" and "checkpoint").
+    With processes, the forward and backward passes run in the worker processes and only the phases
+    of fit_params are recorded.
+    Any object with these two methods can be used as hooks; this one keeps one record per call.
+    """
+
+    def __init__(self):
+        self.records = []
+        self._starts = {}
+
+    def begin(self, phase, layer=None):
+        self._starts[(phase, layer)] = time.perf_counter()
+
+    def end(self, phase, layer=None, flops=0, nbytes=0, samples=0):
+        """
+        Arguments:
+
+        phase -- "forward", "backward", "recompute", "step", "cost", "update", "validation" or "checkpoint"
+
+        layer -- layer number, None for phases covering the whole network
+
+        flops -- estimated floating point operations performed
+
+        nbytes -- bytes of the arrays allocated
+
+        samples -- number of examples processed
+        """
+
+        seconds = time.perf_counter() - self._starts.pop((phase, layer))
+        self.records.append(dict(phase=phase, layer=layer, seconds=seconds, flops=flops, bytes=nbytes, samples=samples))
+
+    def summary(self):
+        """
+        Returns:
+
+        rows -- one dictionary per (phase, layer) with its number of calls, total seconds, flops and bytes,
+        GFLOP/s and samples/sec, slowest first
+        """
+
+        totals = {}
+
+        for record in self.records:
+            key = (record["phase"], record["layer"])
+            if key not in totals:
+                totals[key] = dict(phase=record["phase"], layer=record["layer"],
+                                   calls=0, seconds=0, flops=0, bytes=0, samples=0)
+            total = totals[key]
+            total["calls"] += 1
+            for field in ("seconds", "flops", "bytes", "samples"):
+                total[field] += record[field]
+
+        for total in totals.values():
+            total["gflops_per_sec"] = total["flops"] / total["seconds"] / 1e9 if total["seconds"] else 0
+            total["samples_per_sec"] = total["samples"] / total["seconds"] if total["seconds"] else 0
+
+        return sorted(totals.values(), key=lambda total: total["seconds"], reverse=True)
+
+    def export(self, path):
+        """
+        Write the summary and every record as JSON to path
+        """
+
+        with open(path, "w") as f:
+            json.dump(dict(summary=self.summary(), records=self.records), f, indent=1)
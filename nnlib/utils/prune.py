@@ -0,0 +1,132 @@
+import numpy as np
+
+from nnlib.utils.sparse import sp, issparse
+
+
+SCOPES = ("global", "layer")
+
+
+def prune_masks(parameters, amount, scope="global"):
+    """
+    Magnitude pruning: keep the weights of largest absolute value, biases are never pruned
+
+    Arguments:
+
+    parameters -- dictionary of weights W, b
+
+    amount -- fraction of the weights to remove, between 0 and 1
+
+    scope -- "global" to rank the weights of all layers together, layers with smaller weights losing more,
+    or "layer" to remove the same fraction from every layer
+
+    Returns:
+
+    masks -- dictionary of boolean arrays shaped like W indexed by layer, True for the weights kept
+    """
+
+    if scope not in SCOPES:
+        raise ValueError("unknown scope " + str(scope))
+    if not 0 <= amount <= 1:
+        raise ValueError("amount must be between 0 and 1, got " + str(amount))
+
+    W = parameters["W"]
+    if scope == "layer":
+        return {l: np.abs(W[l]) > _threshold(np.abs(W[l]).ravel(), amount) for l in W}
+
+    threshold = _threshold(np.concatenate([np.abs(W[l]).ravel() for l in W]), amount)
+
+    return {l: np.abs(W[l]) > threshold for l in W}
+
+
+def _threshold(magnitudes, amount):
+    # largest magnitude removed, -1 when nothing is, ties at the threshold are removed together
+    k = int(round(amount * magnitudes.size))
+    if k == 0:
+        return -1
+
+    return np.partition(magnitudes, k-1)[k-1]
+
+
+def apply_masks(parameters, masks):
+    """
+    Zero the pruned weights in place
+
+    Arguments:
+
+    parameters -- dictionary of weights W, b
+
+    masks -- dictionary of boolean arrays from prune_masks
+
+    Returns:
+
+    parameters -- the same dictionary
+    """
+
+    for l, mask in masks.items():
+        parameters["W"][l] *= mask
+
+    return parameters
+
+
+def sparsity(parameters):
+    """
+    Arguments:
+
+    parameters -- dictionary of weights W, b, dense or sparse
+
+    Returns:
+
+    sparsity -- fraction of the weights equal to zero
+    """
+
+    W = parameters["W"]
+    nonzeros = sum(W[l].nnz if issparse(W[l]) else np.count_nonzero(W[l]) for l in W)
+
+    return 1 - nonzeros / sum(np.prod(W[l].shape) for l in W)
+
+
+def sparse_parameters(parameters, min_sparsity=0.5):
+    """
+    Pruned weights stored as scipy.sparse CSR matrices, for model_predict
+
+    Only the nonzero weights are stored and multiplied, a sparse matmul is slower per nonzero than
+    a dense one so layers with fewer zeros than min_sparsity stay dense.
+
+    Arguments:
+
+    parameters -- dictionary of weights W, b
+
+    min_sparsity -- smallest fraction of zero weights for a layer to be stored sparse
+
+    Returns:
+
+    sparse_parameters -- dictionary of weights W (CSR or dense) and biases b indexed by layer,
+    sharing nothing with parameters
+    """
+
+    if sp is None:
+        raise ImportError("sparse weights require scipy: pip install nnlib[sparse]")
+
+    W = {}
+    for l, Wl in parameters["W"].items():
+        W[l] = sp.csr_matrix(Wl) if 1 - np.count_nonzero(Wl) / Wl.size >= min_sparsity else Wl.copy()
+
+    return dict(W=W, b={l: bl.copy() for l, bl in parameters["b"].items()})
+
+
+def parameters_nbytes(parameters):
+    """
+    Arguments:
+
+    parameters -- dictionary of weights W, b, dense or sparse
+
+    Returns:
+
+    nbytes -- memory held by the weights and biases, data and indices of the sparse matrices included
+    """
+
+    nbytes = 0
+    for Wl in parameters["W"].values():
+        nbytes += Wl.data.nbytes + Wl.indices.nbytes + Wl.indptr.nbytes if issparse(Wl) else Wl.nbytes
+
+    return nbytes + sum(bl.nbytes for bl in parameters["b"].values())
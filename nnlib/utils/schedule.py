@@ -0,0 +1,63 @@
+import numpy as np
+
+
+def inverse_time_decay(learning_rate0, epoch, decay_rate=1, time_interval=1):
+    """
+    Arguments:
+
+    learning_rate0 -- initial learning rate
+
+    epoch -- number of the current epoch, starting at 0
+
+    decay_rate -- how fast the learning rate decays
+
+    time_interval -- number of epochs between decays, the learning rate is constant in between
+
+    Returns:
+
+    learning_rate -- learning_rate0 / (1 + decay_rate * (epoch // time_interval))
+    """
+
+    return learning_rate0 / (1 + decay_rate * (epoch // time_interval))
+
+
+def exponential_decay(learning_rate0, epoch, decay_rate=0.95, time_interval=1):
+    """
+    Arguments:
+
+    learning_rate0 -- initial learning rate
+
+    epoch -- number of the current epoch, starting at 0
+
+    decay_rate -- factor the learning rate is multiplied by every time_interval epochs
+
+    time_interval -- number of epochs between decays
+
+    Returns:
+
+    learning_rate -- learning_rate0 * decay_rate ** (epoch // time_interval)
+    """
+
+    return learning_rate0 * decay_rate ** (epoch // time_interval)
+
+
+def cosine_decay(learning_rate0, epoch, num_epochs, minimum=0):
+    """
+    Arguments:
+
+    learning_rate0 -- initial learning rate
+
+    epoch -- number of the current epoch, starting at 0
+
+    num_epochs -- number of epochs over which the learning rate decays to minimum
+
+    minimum -- final learning rate
+
+    Returns:
+
+    learning_rate -- learning rate annealed from learning_rate0 to minimum along half a cosine
+    """
+
+    progress = min(epoch, num_epochs) / num_epochs
+
+    return minimum + (learning_rate0 - minimum) * (1 + np.cos(np.pi * progress)) / 2
@@ -0,0 +1,56 @@
+import numpy as np
+
+try:
+    import scipy.sparse as sp
+except ImportError:  # scipy is optional, only needed for sparse inputs: pip install nnlib[sparse]
+    sp = None
+
+
+def issparse(X):
+    """
+    Arguments:
+
+    X -- any matrix
+
+    Returns:
+
+    sparse -- whether X is a scipy.sparse matrix, always False without scipy
+    """
+
+    return sp is not None and sp.issparse(X)
+
+
+def matmul(A, B, out=None):
+    """
+    np.matmul for dense or scipy.sparse A and B
+
+    A sparse B is multiplied as (B.T @ A.T).T, the product scipy implements in time proportional to
+    the nonzeros of B times the rows of A; B.T of a CSC matrix is a CSR matrix sharing its arrays.
+    A sparse A, e.g. pruned weights, is multiplied directly.
+
+    Arguments:
+
+    A -- dense or sparse matrix
+
+    B -- dense or sparse matrix
+
+    out -- optional preallocated array to write the result into
+
+    Returns:
+
+    C -- dense product A @ B
+    """
+
+    if issparse(A):
+        product = A @ B
+        product = product.toarray() if issparse(product) else np.asarray(product)
+    elif issparse(B):
+        product = np.asarray(B.T @ A.T).T
+    else:
+        return np.matmul(A, B, out=out)
+
+    if out is None:
+        return np.ascontiguousarray(product)
+    np.copyto(out, product)
+
+    return out
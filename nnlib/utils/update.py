@@ -1,3 +1,8 @@
+import numpy as np
+
+from nnlib.utils.flat import flat_zeros_like
+
+
 def update_parameters(parameters, grads, learning_rate):
     """
     Update parameters using gradient descent
@@ -12,13 +17,178 @@ def update_parameters(parameters, grads, learning_rate):
 
     Returns:
 
-    parameters -- python dictionary containing updated parameters
+    parameters -- python dictionary containing updated parameters,
+    flat-backed parameters (see nnlib.utils.flat) are updated in place
     """
 
+    if "flat" in parameters and "flat" in grads:
+        parameters["flat"] -= learning_rate*grads["flat"]
+        return parameters
+
     L = len(parameters["W"])
 
+    if "flat" in parameters:
+        for l in range(L):
+            parameters["W"][l+1] -= learning_rate*grads["dW"][l+1]
+            parameters["b"][l+1] -= learning_rate*grads["db"][l+1]
+        return parameters
+
     for l in range(L):
         parameters["W"][l+1] = parameters["W"][l+1] - learning_rate*grads["dW"][l+1]
         parameters["b"][l+1] = parameters["b"][l+1] - learning_rate*grads["db"][l+1]
 
     return parameters
+
+
+def _segments(parameters, grads, *states):
+    """
+    pairs up the arrays to update: one tuple of flat buffers when everything is flat-backed,
+    otherwise one tuple per layer for the weights and for the biases
+    """
+
+    if "flat" in parameters and "flat" in grads and all("flat" in state for state in states):
+        yield (parameters["flat"], grads["flat"]) + tuple(state["flat"] for state in states)
+        return
+
+    for l in parameters["W"]:
+        yield (parameters["W"][l], grads["dW"][l]) + tuple(state["dW"][l] for state in states)
+        yield (parameters["b"][l], grads["db"][l]) + tuple(state["db"][l] for state in states)
+
+
+def initialize_velocity(parameters):
+    """
+    Initialize the moving average of the gradients, or of their squares, used by the optimizers below
+
+    Arguments:
+
+    parameters -- python dictionary of parameters
+
+    Returns:
+
+    v -- python dictionary of zero arrays "dW[]", "db[]" shaped like the parameters,
+    flat-backed if the parameters are
+    """
+
+    if "flat" in parameters:
+        return flat_zeros_like(parameters)
+
+    return dict(
+            dW={l: np.zeros_like(parameters["W"][l]) for l in parameters["W"]},
+            db={l: np.zeros_like(parameters["b"][l]) for l in parameters["b"]}
+            )
+
+
+def update_parameters_with_momentum(parameters, grads, v, learning_rate, beta1=0.9):
+    """
+    Update parameters using gradient descent with momentum
+
+    Arguments:
+
+    parameters -- python dictionary of parameters, updated in place
+
+    grads -- python dictionary containing gradients
+
+    v -- velocity from initialize_velocity, updated in place
+
+    learning_rate -- hyperperameter to be tuned
+
+    beta1 -- decay of the moving average of the gradients
+
+    Returns:
+
+    parameters -- python dictionary containing updated parameters
+    """
+
+    for p, g, v_p in _segments(parameters, grads, v):
+        v_p *= beta1
+        v_p += (1-beta1) * g
+        p -= learning_rate * v_p
+
+    return parameters
+
+
+def update_parameters_with_rmsprop(parameters, grads, s, learning_rate, beta2=0.9, epsilon=1e-8):
+    """
+    Update parameters using RMSProp
+
+    Arguments:
+
+    parameters -- python dictionary of parameters, updated in place
+
+    grads -- python dictionary containing gradients
+
+    s -- moving average of the squared gradients from initialize_velocity, updated in place
+
+    learning_rate -- hyperperameter to be tuned
+
+    beta2 -- decay of the moving average of the squared gradients
+
+    epsilon -- avoids division by zero
+
+    Returns:
+
+    parameters -- python dictionary containing updated parameters
+    """
+
+    for p, g, s_p in _segments(parameters, grads, s):
+        s_p *= beta2
+        s_p += (1-beta2) * np.square(g)
+        p -= learning_rate * g / (np.sqrt(s_p) + epsilon)
+
+    return parameters
+
+
+def initialize_adam(parameters):
+    """
+    Arguments:
+
+    parameters -- python dictionary of parameters
+
+    Returns:
+
+    v -- moving average of the gradients, see initialize_velocity
+
+    s -- moving average of the squared gradients, see initialize_velocity
+    """
+
+    return initialize_velocity(parameters), initialize_velocity(parameters)
+
+
+def update_parameters_with_adam(parameters, grads, v, s, t, learning_rate, beta1=0.9, beta2=0.999, epsilon=1e-8):
+    """
+    Update parameters using Adam
+
+    Arguments:
+
+    parameters -- python dictionary of parameters, updated in place
+
+    grads -- python dictionary containing gradients
+
+    v, s -- moment estimates from initialize_adam, updated in place
+
+    t -- number of the current update, starting at 1, used for bias correction
+
+    learning_rate -- hyperperameter to be tuned
+
+    beta1 -- decay of the moving average of the gradients
+
+    beta2 -- decay of the moving average of the squared gradients
+
+    epsilon -- avoids division by zero
+
+    Returns:
+
+    parameters -- python dictionary containing updated parameters
+    """
+
+    # bias correction of both moments folded into the step size
+    step = learning_rate * np.sqrt(1-beta2**t) / (1-beta1**t)
+
+    for p, g, v_p, s_p in _segments(parameters, grads, v, s):
+        v_p *= beta1
+        v_p += (1-beta1) * g
+        s_p *= beta2
+        s_p += (1-beta2) * np.square(g)
+        p -= step * v_p / (np.sqrt(s_p) + epsilon)
+
+    return parameters
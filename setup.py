@@ -26,6 +26,9 @@ setup(
         url='https://github.com/felix990302/nnlib',
         packages=find_packages(),
         install_requires=[
-            'numpy>=1.15.0'
-            ]
+            'numpy>=1.17.0'
+            ],
+        extras_require={
+            'sparse': ['scipy>=1.3.0']
+            }
         )
@@ -27,3 +27,14 @@ def cat_dataset():
         test_dataset.close()
 
     return train_set_x_orig, train_set_y_orig, test_set_x_orig, test_set_y_orig, classes
+
+
+@pytest.fixture(scope='session')
+def cat_dataset_files():
+    train_dataset = h5py.File(path.join(testdir, 'datasets/train_catvnoncat.h5'), "r")
+    test_dataset = h5py.File(path.join(testdir, 'datasets/test_catvnoncat.h5'), "r")
+
+    yield train_dataset, test_dataset
+
+    train_dataset.close()
+    test_dataset.close()
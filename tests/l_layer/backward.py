@@ -1,10 +1,13 @@
 import numpy as np
+import pytest
 from numpy.random import RandomState
 from numpy.testing import assert_allclose
 
 from nnlib.l_layer.backward import linear_backward, linear_backward_activation, model_backward
+from nnlib.l_layer.forward import model_forward
 from nnlib.utils.derivative import sigmoid_backward, relu_backward
 from nnlib.utils.activation import sigmoid, relu
+from nnlib.utils.initialize import initialize_parameters
 
 
 def test_linear_backward():
@@ -227,3 +230,193 @@ def test_model_backward_dropout():
 
     assert_allclose(grads['dA'][1], dA1, rtol=1e-05)
     assert_allclose(grads['dA'][2], dA2, rtol=1e-05)
+
+
+def test_model_backward_fused():
+    rand = RandomState(3)
+    X = rand.randn(4, 6)
+    Y = np.array([[1, 0, 1, 1, 0, 0]])
+    parameters = dict(
+            W={1: rand.randn(3, 4), 2: rand.randn(1, 3)},
+            b={1: rand.randn(3, 1), 2: rand.randn(1, 1)}
+            )
+    AL, caches = model_forward(X, parameters, keep_prob=1)
+
+    grads = model_backward(AL, Y, parameters, caches, alpha=0.2, keep_prob=1)
+    fused_grads = model_backward(AL, Y, parameters, caches, alpha=0.2, keep_prob=1, fused=True)
+
+    assert(2 not in fused_grads["dA"])
+    for l in (1, 2):
+        assert_allclose(fused_grads["dW"][l], grads["dW"][l])
+        assert_allclose(fused_grads["db"][l], grads["db"][l])
+
+
+def test_model_backward_flat():
+    rand = RandomState(4)
+    X = rand.randn(5, 8)
+    Y = (rand.randn(1, 8) > 0).astype(int)
+    np.random.seed(1)
+    parameters = initialize_parameters([5, 4, 3, 1], flat=True)
+    layered = dict(W=dict(parameters["W"]), b=dict(parameters["b"]))
+
+    for keep_prob in (1, 0.8):
+        np.random.seed(2)
+        AL, caches = model_forward(X, parameters, keep_prob)
+        grads = model_backward(AL, Y, parameters, caches, alpha=0.3, keep_prob=keep_prob, fused=True)
+        layered_grads = model_backward(AL, Y, layered, caches, alpha=0.3, keep_prob=keep_prob, fused=True)
+
+        # the gradients of every layer are views into one buffer, the input data gets none
+        assert(grads["flat"].shape == parameters["flat"].shape)
+        assert(0 not in grads["dA"])
+        for l in (1, 2, 3):
+            assert(np.shares_memory(grads["dW"][l], grads["flat"]))
+            assert_allclose(grads["dW"][l], layered_grads["dW"][l])
+            assert_allclose(grads["db"][l], layered_grads["db"][l], atol=1e-12)
+
+
+def test_model_backward_fused_saturated():
+    X = np.array([[1., -1.]])
+    Y = np.array([[0, 1]])
+    parameters = dict(W={1: np.array([[1000.]])}, b={1: np.array([[0.]])})
+
+    with np.errstate(over='ignore'):
+        AL, caches = model_forward(X, parameters, keep_prob=1)
+    with np.errstate(all='raise'):
+        grads = model_backward(AL, Y, parameters, caches, alpha=0, keep_prob=1, fused=True)
+
+    assert_allclose(grads["dW"][1], [[1.]])
+    assert_allclose(grads["db"][1], [[0.]])
+
+
+def test_model_backward_activations():
+    rand = RandomState(4)
+    X = rand.randn(4, 6)
+    Y = np.array([[1, 0, 1, 1, 0, 0]])
+    parameters = dict(
+            W={1: rand.randn(5, 4), 2: rand.randn(3, 5), 3: rand.randn(1, 3)},
+            b={1: rand.randn(5, 1), 2: rand.randn(3, 1), 3: rand.randn(1, 1)}
+            )
+    activations = ("gelu", "tanh", "sigmoid")
+
+    def cost(W):
+        AL, _ = model_forward(X, dict(W={**parameters["W"], 1: W}, b=parameters["b"]), 1, activations=activations)
+        return -np.mean(Y * np.log(AL) + (1-Y) * np.log(1-AL))
+
+    AL, caches = model_forward(X, parameters, keep_prob=1, activations=activations)
+    grads = model_backward(AL, Y, parameters, caches, alpha=0, keep_prob=1, fused=True, activations=activations)
+
+    epsilon = 1e-6
+    numerical = np.zeros_like(parameters["W"][1])
+    for i in np.ndindex(*numerical.shape):
+        W_plus, W_minus = parameters["W"][1].copy(), parameters["W"][1].copy()
+        W_plus[i] += epsilon
+        W_minus[i] -= epsilon
+        numerical[i] = (cost(W_plus) - cost(W_minus)) / (2*epsilon)
+
+    assert_allclose(grads["dW"][1], numerical, rtol=1e-5)
+
+
+def test_model_backward_softmax():
+    rand = RandomState(5)
+    X = rand.randn(4, 6)
+    Y = np.array([[2, 0, 1, 2, 0, 1]])
+    parameters = dict(
+            W={1: rand.randn(5, 4), 2: rand.randn(3, 5)},
+            b={1: rand.randn(5, 1), 2: rand.randn(3, 1)}
+            )
+    activations = ("relu", "softmax")
+    AL, caches = model_forward(X, parameters, keep_prob=1, activations=activations)
+
+    grads = model_backward(AL, Y, parameters, caches, alpha=0.3, keep_prob=1, activations=activations)
+    fused_grads = model_backward(AL, Y, parameters, caches, alpha=0.3, keep_prob=1, fused=True,
+                                 activations=activations)
+
+    # dense reference with one-hot labels
+    dZ2 = AL - np.eye(3)[:, Y[0]]
+    assert_allclose(fused_grads["dW"][2], dZ2 @ caches["A"][1].T / 6 + 0.3/6 * parameters["W"][2])
+    for l in (1, 2):
+        assert_allclose(fused_grads["dW"][l], grads["dW"][l])
+        assert_allclose(fused_grads["db"][l], grads["db"][l])
+
+
+def test_model_backward_recompute():
+    rand = RandomState(6)
+    X = rand.randn(4, 8)
+    Y = rand.randint(2, size=(1, 8))
+    layers_dims = [4, 6, 5, 5, 4, 3, 1]
+    parameters = dict(
+            W={l: rand.randn(layers_dims[l], layers_dims[l-1]) for l in range(1, 7)},
+            b={l: rand.randn(layers_dims[l], 1) for l in range(1, 7)}
+            )
+    activations = ("relu", "tanh", "relu", "gelu", "tanh", "sigmoid")
+
+    np.random.seed(2)
+    AL, caches = model_forward(X, parameters, keep_prob=0.8, activations=activations)
+    grads = model_backward(AL, Y, parameters, caches, alpha=0.1, keep_prob=0.8, fused=True, activations=activations)
+
+    for recompute_every in (1, 2, 4, 10):
+        np.random.seed(2)
+        AL_checkpointed, checkpoints = model_forward(X, parameters, keep_prob=0.8, activations=activations,
+                                                     recompute_every=recompute_every)
+        checkpointed_grads = model_backward(AL_checkpointed, Y, parameters, checkpoints, alpha=0.1, keep_prob=0.8,
+                                            fused=True, activations=activations)
+
+        assert_allclose(AL_checkpointed, AL)
+        assert(sorted(checkpoints["Z"]) == sorted({l for l in range(1, 6) if l % recompute_every == 0} | {6}))
+        for l in range(1, 7):
+            assert_allclose(checkpointed_grads["dW"][l], grads["dW"][l])
+            assert_allclose(checkpointed_grads["db"][l], grads["db"][l])
+
+
+def test_model_backward_compact_masks():
+    rand = RandomState(7)
+    X = rand.randn(4, 10)
+    Y = rand.randint(2, size=(1, 10))
+    layers_dims = [4, 6, 5, 3, 1]
+    parameters = dict(
+            W={l: rand.randn(layers_dims[l], layers_dims[l-1]) for l in range(1, 5)},
+            b={l: rand.randn(layers_dims[l], 1) for l in range(1, 5)}
+            )
+
+    results = {}
+    for masks, recompute_every in (("bool", None), ("packed", None), ("seed", None), ("packed", 2), ("seed", 3)):
+        rng = np.random.default_rng(4)
+        AL, caches = model_forward(X, parameters, keep_prob=0.6, recompute_every=recompute_every, rng=rng, masks=masks)
+        results[masks, recompute_every] = AL, caches, model_backward(AL, Y, parameters, caches, alpha=0, keep_prob=0.6,
+                                                                     fused=True)
+
+    AL, caches, grads = results["bool", None]
+    assert(caches["D"][1].dtype == bool)
+    assert(results["packed", None][1]["D"][1].dtype == np.uint8)
+    assert(isinstance(results["seed", None][1]["D"][1], np.random.SeedSequence))
+    # masks kept as seeds are drawn from their own streams, the others from rng directly
+    for key in (("packed", None), ("packed", 2)):
+        assert_allclose(results[key][0], AL)
+        for l in range(1, 5):
+            assert_allclose(results[key][2]["dW"][l], grads["dW"][l])
+    seed_AL, _, seed_grads = results["seed", None]
+    assert_allclose(results["seed", 3][0], seed_AL)
+    for l in range(1, 5):
+        assert_allclose(results["seed", 3][2]["dW"][l], seed_grads["dW"][l])
+
+
+def test_model_backward_sparse_input():
+    sp = pytest.importorskip("scipy.sparse")
+    rand = RandomState(8)
+    X = sp.random(50, 12, density=0.05, format="csc", random_state=rand)
+    Y = rand.randint(2, size=(1, 12))
+    parameters = dict(
+            W={1: rand.randn(5, 50), 2: rand.randn(1, 5)},
+            b={1: rand.randn(5, 1), 2: rand.randn(1, 1)}
+            )
+
+    AL, caches = model_forward(X.toarray(), parameters, keep_prob=1)
+    grads = model_backward(AL, Y, parameters, caches, alpha=0.1, keep_prob=1, fused=True)
+    sparse_AL, sparse_caches = model_forward(X, parameters, keep_prob=1)
+    sparse_grads = model_backward(sparse_AL, Y, parameters, sparse_caches, alpha=0.1, keep_prob=1, fused=True)
+
+    assert_allclose(sparse_AL, AL)
+    assert(0 not in sparse_grads["dA"])
+    for l in (1, 2):
+        assert_allclose(sparse_grads["dW"][l], grads["dW"][l])
+        assert_allclose(sparse_grads["db"][l], grads["db"][l])
@@ -48,3 +48,15 @@ def test_model_forward_dropout():
 
     assert_allclose(AL, ans, rtol=1e-05)
     assert(len(caches["A"]) == len(caches["D"])+1)
+
+
+def test_model_forward_no_dropout_no_draws():
+    rand = RandomState(2)
+    X = rand.randn(3, 5)
+    parameters = dict(W={1: rand.randn(4, 3), 2: rand.randn(1, 4)}, b={1: rand.randn(4, 1), 2: rand.randn(1, 1)})
+
+    np.random.seed(3)
+    _, caches = model_forward(X, parameters, keep_prob=1, rng=np.random.default_rng(0))
+
+    assert(caches["D"][1] == 1)
+    assert(np.random.get_state()[2] == RandomState(3).get_state()[2])
@@ -0,0 +1,98 @@
+import threading
+
+import numpy as np
+from numpy.random import RandomState
+from numpy.testing import assert_allclose
+from pytest import raises
+
+from nnlib.l_layer.forward import model_forward
+from nnlib.l_layer.inference import model_predict, initialize_inference_buffers, InferenceEngine
+from nnlib.utils.initialize import initialize_parameters
+
+
+def _model():
+    rand = RandomState(1)
+    X = rand.randn(6, 37)
+    np.random.seed(1)
+    parameters = initialize_parameters([6, 5, 3, 1], flat=True)
+
+    return X, parameters
+
+
+def test_model_predict():
+    X, parameters = _model()
+    AL, caches = model_forward(X, parameters, keep_prob=1)
+    buffers = initialize_inference_buffers([6, 5, 3, 1], 37)
+
+    assert_allclose(model_predict(X, parameters), AL)
+    assert_allclose(model_predict(X, parameters, logits=True), caches["Z"][3])
+    assert(model_predict(X, parameters, buffers) is buffers[3])
+    assert_allclose(buffers[3], AL)
+
+
+def test_model_predict_no_random_draws():
+    X, parameters = _model()
+    np.random.seed(3)
+    model_predict(X, parameters)
+
+    assert(np.random.get_state()[2] == RandomState(3).get_state()[2])
+
+
+def test_inference_engine_predict():
+    X, parameters = _model()
+    AL, _ = model_forward(X, parameters, keep_prob=1)
+    engine = InferenceEngine(parameters, max_batch_size=8)
+
+    first = engine.predict(X)
+    second = engine.predict(X[:, :5])
+
+    assert_allclose(first, AL)
+    assert_allclose(second, AL[:, :5])
+
+
+def test_inference_engine_submit():
+    X, parameters = _model()
+    AL, _ = model_forward(X, parameters, keep_prob=1)
+    engine = InferenceEngine(parameters, max_batch_size=16, max_delay=0.01)
+    futures = [None] * X.shape[1]
+
+    def client(columns):
+        for i in columns:
+            futures[i] = engine.submit(X[:, i])
+
+    threads = [threading.Thread(target=client, args=(range(k, X.shape[1], 4),)) for k in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    results = np.stack([future.result(timeout=5) for future in futures], axis=1)
+    engine.close()
+
+    assert_allclose(results, AL)
+
+
+def test_inference_engine_submit_errors():
+    X, parameters = _model()
+    AL, _ = model_forward(X, parameters, keep_prob=1)
+    engine = InferenceEngine(parameters, max_batch_size=4, max_delay=0.01)
+
+    with raises(ValueError):
+        engine.submit(np.zeros(5)).result(timeout=5)
+    with raises(ValueError):
+        engine.submit(np.array(["x"] * 6)).result(timeout=5)
+    # the serving thread survives both
+    result = engine.submit(X[:, 0]).result(timeout=5)
+    engine.close()
+
+    assert_allclose(result, AL[:, 0])
+
+
+def test_model_predict_activations():
+    X, parameters = _model()
+    activations = ("leaky_relu", "gelu", "linear")
+    AL, _ = model_forward(X, parameters, keep_prob=1, activations=activations)
+    engine = InferenceEngine(parameters, max_batch_size=8, activations=activations)
+
+    assert_allclose(model_predict(X, parameters, activations=activations), AL)
+    assert_allclose(engine.predict(X), AL)
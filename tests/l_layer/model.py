@@ -1,7 +1,15 @@
+from functools import partial
+from pathlib import Path
+
 import numpy as np
-from pytest import approx, mark
+from numpy.testing import assert_allclose
+from pytest import approx, importorskip, mark, raises
 
 from nnlib.l_layer import LLayer
+from nnlib.utils.checkpoint import load_checkpoint
+from nnlib.utils.dataset import Dataset
+from nnlib.utils.schedule import inverse_time_decay
+from nnlib.utils.profiler import Profiler
 
 
 @mark.timeout(1800)
@@ -41,3 +49,529 @@ def test_llayer(cat_dataset):
 
     assert(train_acc == approx(1.0))
     assert(predictions_acc == approx(0.76))
+
+
+def test_llayer_mini_batch(cat_dataset):
+    np.random.seed(1)
+
+    train_x_orig, train_y, _, _, _ = cat_dataset
+    train_x = train_x_orig.reshape(train_x_orig.shape[0], -1).T/255.
+
+    model = LLayer()
+    model.fit_params(
+            train_x,
+            train_y,
+            layers_dims=(12288, 7, 1),
+            num_iterations=60,
+            verbose=False,
+            learning_rate=0.005,
+            batch_size=32,
+            )
+
+    assert(len(model.costs) == 60)
+    assert(model.costs[-1] < model.costs[0])
+    assert(model.verify_accuracy(train_x, train_y) > 0.8)
+
+
+def test_llayer_dataset(cat_dataset, cat_dataset_files):
+    train_x_orig, train_y, test_x_orig, test_y, _ = cat_dataset
+    train_file, test_file = cat_dataset_files
+    train_x = train_x_orig.reshape(train_x_orig.shape[0], -1).T/255.
+    test_x = test_x_orig.reshape(test_x_orig.shape[0], -1).T/255.
+
+    in_memory = LLayer()
+    np.random.seed(1)
+    in_memory.fit_params(train_x, train_y, layers_dims=(12288, 7, 1), num_iterations=5, verbose=False, batch_size=64)
+
+    from_disk = LLayer()
+    np.random.seed(1)
+    from_disk.fit_params(
+            Dataset(train_file["train_set_x"], scale=255.),
+            train_y,
+            layers_dims=(12288, 7, 1),
+            num_iterations=5,
+            verbose=False,
+            batch_size=64,
+            )
+
+    assert_allclose(from_disk.costs, in_memory.costs)
+    assert_allclose(from_disk.output(Dataset(test_file["test_set_x"], scale=255., chunk_size=16)), in_memory.output(test_x))
+    assert(from_disk.verify_accuracy(Dataset(test_file["test_set_x"], scale=255.), test_y) ==
+           approx(in_memory.verify_accuracy(test_x, test_y)))
+
+
+def test_llayer_inplace(cat_dataset):
+    train_x_orig, train_y, _, _, _ = cat_dataset
+    train_x = train_x_orig.reshape(train_x_orig.shape[0], -1).T/255.
+
+    models = []
+    for inplace in (False, True):
+        np.random.seed(1)
+        model = LLayer()
+        model.fit_params(
+                train_x,
+                train_y,
+                layers_dims=(12288, 7, 1),
+                num_iterations=5,
+                verbose=False,
+                keep_prob=0.86,
+                batch_size=100,
+                inplace=inplace,
+                )
+        models.append(model)
+
+    assert_allclose(models[1].costs, models[0].costs)
+    assert_allclose(models[1].parameters["W"][1], models[0].parameters["W"][1])
+
+
+def test_llayer_dtype(cat_dataset):
+    train_x_orig, train_y, test_x_orig, test_y, _ = cat_dataset
+    train_x = train_x_orig.reshape(train_x_orig.shape[0], -1).T/255.
+    test_x = test_x_orig.reshape(test_x_orig.shape[0], -1).T/255.
+
+    def fit(X, dtype):
+        np.random.seed(1)
+        model = LLayer()
+        model.fit_params(
+                X,
+                train_y,
+                layers_dims=(12288, 7, 1),
+                num_iterations=300,
+                verbose=False,
+                learning_rate=0.01,
+                alpha=0.3,
+                keep_prob=0.86,
+                inplace=True,
+                dtype=dtype,
+                )
+        return model
+
+    double = fit(train_x, np.float64)
+    single = fit(train_x, np.float32)
+
+    assert(single.parameters["flat"].dtype == np.float32)
+    assert(single.output(test_x).dtype == np.float32)
+    assert(single.costs[-1] == approx(double.costs[-1], abs=1e-3))
+    assert(single.verify_accuracy(train_x, train_y) == approx(double.verify_accuracy(train_x, train_y), abs=0.01))
+    assert(single.verify_accuracy(test_x, test_y) == approx(double.verify_accuracy(test_x, test_y), abs=0.03))
+
+    # half precision storage only rounds the inputs, everything else is computed in single precision
+    half = fit(train_x, np.float16)
+
+    assert(half.X.dtype == np.float16)
+    assert(half.parameters["flat"].dtype == np.float32)
+    assert_allclose(half.costs, fit(train_x.astype(np.float16).astype(np.float32), np.float32).costs, rtol=1e-5)
+
+
+def test_llayer_prefetch(cat_dataset):
+    train_x_orig, train_y, _, _, _ = cat_dataset
+    train_x = train_x_orig.reshape(train_x_orig.shape[0], -1).T/255.
+
+    models = []
+    for prefetch in (0, 2):
+        np.random.seed(1)
+        model = LLayer()
+        model.fit_params(train_x, train_y, layers_dims=(12288, 7, 1), num_iterations=5, verbose=False,
+                         keep_prob=0.86, batch_size=50, prefetch=prefetch)
+        models.append(model)
+
+    assert_allclose(models[1].costs, models[0].costs)
+
+
+def test_llayer_optimizers(cat_dataset):
+    train_x_orig, train_y, _, _, _ = cat_dataset
+    train_x = train_x_orig.reshape(train_x_orig.shape[0], -1).T/255.
+
+    models = {}
+    for optimizer, learning_rate in (("gd", 0.01), ("momentum", 0.01), ("rmsprop", 0.0001), ("adam", 0.0003)):
+        np.random.seed(1)
+        model = LLayer()
+        model.fit_params(train_x, train_y, layers_dims=(12288, 7, 1), num_iterations=20, verbose=False,
+                         learning_rate=learning_rate, batch_size=64, optimizer=optimizer,
+                         lr_schedule=partial(inverse_time_decay, decay_rate=0.01))
+        models[optimizer] = model
+
+    for model in models.values():
+        assert(model.costs[-1] < model.costs[0])
+    assert(models["adam"].costs[-1] < models["gd"].costs[-1] - 0.05)
+    assert(models["adam"].s["flat"].any())
+
+
+def test_llayer_profiler():
+    rand = np.random.RandomState(1)
+    X = rand.randn(20, 100)
+    Y = (X[:1] > 0).astype(int)
+    profiler = Profiler()
+
+    model = LLayer()
+    model.fit_params(X, Y, layers_dims=(20, 8, 4, 1), num_iterations=3, verbose=False, batch_size=50, hooks=profiler)
+
+    summary = {(row["phase"], row["layer"]): row for row in profiler.summary()}
+
+    for l in (1, 2, 3):
+        assert(summary[("forward", l)]["calls"] == 6)
+        assert(summary[("backward", l)]["calls"] == 6)
+        assert(summary[("forward", l)]["bytes"] > 0)
+    assert(summary[("forward", 1)]["flops"] == 6 * (2*8*20*50 + 4*8*50))
+    assert(summary[("step", None)]["samples"] == 300)
+    assert(summary[("update", None)]["calls"] == 6)
+    assert(summary[("cost", None)]["calls"] == 6 + 3)
+
+    # the layers of worker processes are not profiled
+    profiler = Profiler()
+    model.fit_params(X, Y, layers_dims=(20, 8, 4, 1), num_iterations=3, verbose=False, batch_size=50, hooks=profiler,
+                     processes=2)
+    phases = {row["phase"] for row in profiler.summary()}
+    assert("step" in phases and "update" in phases and "forward" not in phases)
+
+
+def test_llayer_cost_every():
+    rand = np.random.RandomState(1)
+    X = rand.randn(20, 100)
+    Y = (X[:1] > 0).astype(int)
+
+    models = {}
+    for cost_every in (1, 4, None):
+        np.random.seed(1)
+        model = LLayer()
+        model.fit_params(X, Y, layers_dims=(20, 8, 1), num_iterations=10, verbose=False, alpha=0.5, keep_prob=0.9,
+                         batch_size=30, cost_every=cost_every)
+        models[cost_every] = model
+
+    assert(models[1].cost_iterations == list(range(10)))
+    assert(models[4].cost_iterations == [0, 4, 8])
+    assert_allclose(models[4].costs, models[1].costs[::4])
+    assert(models[None].costs == [])
+    assert_allclose(models[None].parameters["flat"], models[1].parameters["flat"])
+
+
+def test_llayer_large_learning_rate(cat_dataset):
+    train_x_orig, train_y, _, _, _ = cat_dataset
+    train_x = train_x_orig.reshape(train_x_orig.shape[0], -1).T/255.
+
+    np.random.seed(1)
+    model = LLayer()
+    with np.errstate(over='ignore'):
+        model.fit_params(train_x, train_y, layers_dims=(12288, 7, 1), num_iterations=30, verbose=False, learning_rate=20)
+
+    assert(np.all(np.isfinite(model.costs)))
+    assert(np.all(np.isfinite(model.parameters["flat"])))
+
+
+def test_llayer_activations(cat_dataset):
+    np.random.seed(1)
+
+    train_x_orig, train_y, _, _, _ = cat_dataset
+    train_x = train_x_orig.reshape(train_x_orig.shape[0], -1).T/255.
+
+    model = LLayer()
+    model.fit_params(
+            train_x,
+            train_y,
+            layers_dims=(12288, 7, 5, 1),
+            num_iterations=60,
+            verbose=False,
+            learning_rate=0.0003,
+            optimizer="adam",
+            batch_size=32,
+            inplace=True,
+            activations=("tanh", "gelu", "sigmoid"),
+            )
+
+    assert(model.costs[-1] < model.costs[0])
+    assert(model.verify_accuracy(train_x, train_y) > 0.75)
+
+
+def test_llayer_softmax():
+    rand = np.random.RandomState(0)
+    centers = rand.randn(10, 5) * 3
+    Y = rand.randint(5, size=(1, 500))
+    X = centers[:, Y[0]] + rand.randn(10, 500)
+
+    np.random.seed(1)
+    model = LLayer()
+    model.fit_params(X, Y, layers_dims=(10, 16, 5), num_iterations=50, verbose=False, learning_rate=0.1,
+                     batch_size=50, inplace=True, activations=("relu", "softmax"))
+
+    assert(model.costs[-1] < model.costs[0])
+    assert(model.predict(X).shape == Y.shape)
+    assert(model.verify_accuracy(X, Y) > 0.95)
+    assert(model.verify_cost(X, Y) == approx(model.costs[-1], rel=0.2))
+
+
+def test_llayer_recompute(cat_dataset):
+    train_x_orig, train_y, _, _, _ = cat_dataset
+    train_x = train_x_orig.reshape(train_x_orig.shape[0], -1).T/255.
+
+    models = {}
+    for recompute_every in (None, 2):
+        np.random.seed(1)
+        models[recompute_every] = LLayer()
+        models[recompute_every].fit_params(train_x, train_y, layers_dims=(12288, 20, 7, 5, 1), num_iterations=5,
+                                           verbose=False, keep_prob=0.9, batch_size=64, recompute_every=recompute_every)
+
+    assert_allclose(models[2].costs, models[None].costs)
+    assert_allclose(models[2].parameters["flat"], models[None].parameters["flat"])
+
+
+def test_llayer_dropout_masks(cat_dataset):
+    train_x_orig, train_y, _, _, _ = cat_dataset
+    train_x = train_x_orig.reshape(train_x_orig.shape[0], -1).T/255.
+
+    models = {}
+    for dropout_masks in ("bool", "packed", "seed"):
+        np.random.seed(1)
+        models[dropout_masks] = LLayer()
+        models[dropout_masks].fit_params(train_x, train_y, layers_dims=(12288, 20, 7, 1), num_iterations=5, verbose=False,
+                                         keep_prob=0.8, batch_size=64, dropout_seed=3, dropout_masks=dropout_masks)
+
+    assert_allclose(models["packed"].parameters["flat"], models["bool"].parameters["flat"])
+    assert(models["seed"].costs[-1] < models["seed"].costs[0])
+    for options in (dict(dropout_masks="packed"), dict(dropout_seed=3)):
+        with raises(ValueError):
+            LLayer().fit_params(train_x, train_y, layers_dims=(12288, 1), num_iterations=1, verbose=False,
+                                keep_prob=0.8, processes=2, **options)
+
+
+def test_llayer_save_load(cat_dataset, tmpdir):
+    tmp_path = Path(str(tmpdir))
+    train_x_orig, train_y, test_x_orig, test_y, _ = cat_dataset
+    train_x = train_x_orig.reshape(train_x_orig.shape[0], -1).T/255.
+    test_x = test_x_orig.reshape(test_x_orig.shape[0], -1).T/255.
+    path = tmp_path / "model.nnlib"
+
+    np.random.seed(1)
+    model = LLayer()
+    model.fit_params(train_x, train_y, layers_dims=(12288, 7, 1), num_iterations=3, verbose=False, alpha=0.1,
+                     optimizer="adam", learning_rate=0.001, activations=("tanh", "sigmoid"))
+    model.save(path)
+
+    for mmap in (False, True):
+        loaded = LLayer.load(path, mmap=mmap)
+
+        assert(loaded.layers_dims == (12288, 7, 1))
+        assert(loaded.optimizer == "adam")
+        assert_allclose(loaded.costs, model.costs)
+        assert_allclose(loaded.output(test_x), model.output(test_x))
+        assert(loaded.verify_cost(test_x, test_y) == approx(model.verify_cost(test_x, test_y)))
+        assert_allclose(loaded.v["flat"], model.v["flat"])
+
+
+def test_llayer_save_numpy_hyperparameters(tmpdir):
+    tmp_path = Path(str(tmpdir))
+    rand = np.random.RandomState(1)
+    X = rand.randn(5, 40)
+    Y = (X[:1] > 0).astype(int)
+
+    model = LLayer()
+    model.fit_params(X, Y, layers_dims=(5, 3, 1), num_iterations=2, verbose=False, learning_rate=np.float32(0.01),
+                     alpha=np.float32(0.1), keep_prob=np.float32(0.9), batch_size=np.int64(16), optimizer="adam",
+                     beta1=np.float32(0.9), checkpoint_path=tmp_path / "model.nnlib")
+    loaded = LLayer.load(tmp_path / "model.nnlib")
+
+    assert(loaded.batch_size == 16 and type(loaded.batch_size) is int)
+    assert(loaded.learning_rate == approx(0.01) and loaded.keep_prob == approx(0.9))
+
+
+@mark.parametrize("optimizer", ("gd", "adam"))
+def test_llayer_resume(cat_dataset, tmpdir, optimizer):
+    tmp_path = Path(str(tmpdir))
+    train_x_orig, train_y, _, _, _ = cat_dataset
+    train_x = train_x_orig.reshape(train_x_orig.shape[0], -1).T/255.
+    path = tmp_path / "model.nnlib"
+    fit = partial(LLayer.fit_params, X=train_x, Y=train_y, layers_dims=(12288, 7, 1), verbose=False,
+                  learning_rate=0.001 if optimizer == "adam" else 0.005, keep_prob=0.9, batch_size=64,
+                  optimizer=optimizer, cost_every=2, validation_data=(train_x[:, :50], train_y[:, :50]))
+
+    np.random.seed(1)
+    uninterrupted = LLayer()
+    fit(uninterrupted, num_iterations=6)
+
+    # a job stopped after 4 epochs with a checkpoint every 2, then restarted from scratch
+    np.random.seed(1)
+    fit(LLayer(), num_iterations=4, checkpoint_path=path, checkpoint_every=2)
+    np.random.seed(7)
+    resumed = LLayer()
+    fit(resumed, num_iterations=6, checkpoint_path=path, checkpoint_every=2, resume=True)
+
+    assert(resumed.cost_iterations == [0, 2, 4])
+    assert_allclose(resumed.costs, uninterrupted.costs)
+    assert_allclose(resumed.validation_costs, uninterrupted.validation_costs)
+    assert(resumed.best_iteration == uninterrupted.best_iteration)
+    assert_allclose(resumed.parameters["flat"], uninterrupted.parameters["flat"])
+    assert(LLayer.load(path).epoch == 5)
+
+
+def test_llayer_early_stopping(cat_dataset, tmpdir):
+    tmp_path = Path(str(tmpdir))
+    train_x_orig, train_y, _, _, _ = cat_dataset
+    train_x = train_x_orig.reshape(train_x_orig.shape[0], -1).T/255.
+    X, Y, X_val, Y_val = train_x[:, :159], train_y[:, :159], train_x[:, 159:], train_y[:, 159:]
+    fit = partial(LLayer.fit_params, X=X, Y=Y, layers_dims=(12288, 20, 7, 1), num_iterations=200, verbose=False,
+                  learning_rate=0.001, optimizer="adam", batch_size=32, validation_data=(X_val, Y_val),
+                  validation_every=2)
+
+    np.random.seed(1)
+    model = LLayer()
+    fit(model, patience=5, checkpoint_path=tmp_path / "model.nnlib")
+
+    assert(model.stopped_iteration is not None and model.stopped_iteration < 199)
+    assert(model.validation_iterations == list(range(0, model.stopped_iteration+1, 2)))
+    assert(len(model.validation_iterations) - model.validation_iterations.index(model.best_iteration) - 1 == 5)
+    assert(model.best_validation_cost == min(model.validation_costs))
+    assert(model.verify_cost(X_val, Y_val) == approx(model.best_validation_cost))
+    assert(model.verify_accuracy(X_val, Y_val) == approx(
+        model.validation_accuracies[model.validation_iterations.index(model.best_iteration)]))
+    # the checkpoint resumes from the last epoch but loads the best parameters
+    loaded = LLayer.load(tmp_path / "model.nnlib")
+    assert(loaded.verify_cost(X_val, Y_val) == approx(model.best_validation_cost))
+    assert_allclose(loaded.parameters["flat"], model.parameters["flat"])
+
+    np.random.seed(1)
+    last = LLayer()
+    fit(last, num_iterations=model.stopped_iteration+1, restore_best=False)
+
+    assert(last.stopped_iteration is None)
+    assert_allclose(last.validation_costs, model.validation_costs)
+    assert(last.verify_cost(X_val, Y_val) == approx(last.validation_costs[-1]))
+    # which are the ones kept in the checkpoint to resume from
+    assert_allclose(load_checkpoint(tmp_path / "model.nnlib")[0]["parameters"], last.parameters["flat"])
+
+
+def test_llayer_validation_saturated():
+    rand = np.random.RandomState(0)
+    X = rand.randn(20, 200) * 10
+    Y = (X[:1] > 0).astype(int)
+    fit = partial(LLayer.fit_params, X=X[:, :150], Y=Y[:, :150], layers_dims=(20, 16, 1), num_iterations=30,
+                  verbose=False, validation_data=(X[:, 150:], Y[:, 150:]), patience=3)
+
+    # saturated outputs, the validation cost is computed from the logits as the training cost
+    np.random.seed(1)
+    model = LLayer()
+    fit(model, learning_rate=0.5)
+
+    assert(np.isfinite(model.validation_costs).all())
+    assert(model.verify_cost(X[:, 150:], Y[:, 150:]) == approx(model.best_validation_cost))
+
+    # a diverged model is never the best
+    np.random.seed(1)
+    diverged = LLayer()
+    with np.errstate(all="ignore"):
+        fit(diverged, learning_rate=1e300)
+
+    assert(np.isnan(diverged.validation_costs).all())
+    assert(diverged.best_validation_cost is None and diverged.best_iteration is None)
+    assert(diverged.stopped_iteration == 2)
+
+
+def test_llayer_sparse_input():
+    sp = importorskip("scipy.sparse")
+    rand = np.random.RandomState(0)
+    # bag of words like features, 2% nonzero, the label depends on a few of the words
+    X = sp.random(2000, 400, density=0.02, format="csr", random_state=rand, data_rvs=lambda k: np.ones(k))
+    Y = (np.asarray(X[:20].sum(axis=0)) > 0).astype(int)
+
+    models = {}
+    for name, X_train in (("dense", X.toarray()), ("sparse", X)):
+        np.random.seed(1)
+        models[name] = LLayer()
+        models[name].fit_params(X_train, Y, layers_dims=(2000, 8, 1), num_iterations=20, verbose=False,
+                                learning_rate=0.001, optimizer="adam", batch_size=50, keep_prob=0.9)
+
+    assert(sp.issparse(models["sparse"].X))
+    assert_allclose(models["sparse"].costs, models["dense"].costs)
+    assert_allclose(models["sparse"].parameters["flat"], models["dense"].parameters["flat"])
+    assert(models["sparse"].verify_accuracy(X, Y) == models["dense"].verify_accuracy(X.toarray(), Y))
+
+
+def test_llayer_pruning(cat_dataset, tmpdir):
+    tmp_path = Path(str(tmpdir))
+    train_x_orig, train_y, test_x_orig, test_y, _ = cat_dataset
+    train_x = train_x_orig.reshape(train_x_orig.shape[0], -1).T/255.
+    test_x = test_x_orig.reshape(test_x_orig.shape[0], -1).T/255.
+
+    np.random.seed(1)
+    model = LLayer()
+    model.fit_params(train_x, train_y, layers_dims=(12288, 7, 1), num_iterations=150, verbose=False,
+                     learning_rate=0.0003, optimizer="adam", prune_amount=0.9, prune_every=50,
+                     validation_data=(test_x, test_y))
+
+    W = model.parameters["W"]
+    assert(model.sparsity == approx(0.9))
+    assert(np.count_nonzero(W[1]) + np.count_nonzero(W[2]) == approx(0.1 * (W[1].size + W[2].size), abs=1))
+    # the best validation is one of the last round, with all of its weights pruned
+    assert(model.best_iteration >= 99)
+    assert(model.verify_accuracy(train_x, train_y) > 0.8)
+    assert((model.predict(test_x, sparse=True) == model.predict(test_x)).all())
+    assert_allclose(model.output(test_x, sparse=True), model.output(test_x))
+
+    model.save(tmp_path / "model.nnlib")
+    loaded = LLayer.load(tmp_path / "model.nnlib")
+    assert(loaded.sparsity == approx(0.9))
+    assert((loaded.predict(test_x, sparse=True) == model.predict(test_x)).all())
+
+
+@mark.parametrize("prune_every", (None, 20))
+def test_llayer_pruning_early_stopping(cat_dataset, tmpdir, prune_every):
+    tmp_path = Path(str(tmpdir))
+    train_x_orig, train_y, _, _, _ = cat_dataset
+    train_x = train_x_orig.reshape(train_x_orig.shape[0], -1).T/255.
+    X, Y, X_val, Y_val = train_x[:, :159], train_y[:, :159], train_x[:, 159:], train_y[:, 159:]
+
+    np.random.seed(1)
+    model = LLayer()
+    model.fit_params(X, Y, layers_dims=(12288, 7, 1), num_iterations=100, verbose=False, learning_rate=0.003,
+                     optimizer="adam", validation_data=(X_val, Y_val), patience=2, prune_amount=0.9,
+                     prune_every=prune_every, checkpoint_path=tmp_path / "model.nnlib")
+
+    W = model.parameters["W"]
+    # stopped before the rounds of pruning, which all happen when training stops
+    assert(model.stopped_iteration < 19)
+    assert(model.sparsity == approx(0.9))
+    assert(np.count_nonzero(W[1]) + np.count_nonzero(W[2]) == approx(0.1 * (W[1].size + W[2].size), abs=1))
+    assert(LLayer.load(tmp_path / "model.nnlib").sparsity == approx(0.9))
+    assert_allclose(LLayer.load(tmp_path / "model.nnlib").parameters["flat"], model.parameters["flat"])
+
+
+def test_llayer_quantize_sparse_dataset():
+    sp = importorskip("scipy.sparse")
+    rand = np.random.RandomState(0)
+    X = sp.random(300, 200, density=0.05, format="csr", random_state=rand)
+    X_dense = X.toarray()
+    Y = (X_dense[:10].sum(axis=0, keepdims=True) > 0.2).astype(int)
+
+    np.random.seed(1)
+    model = LLayer()
+    model.fit_params(X, Y, layers_dims=(300, 8, 1), num_iterations=20, verbose=False, optimizer="adam",
+                     learning_rate=0.01)
+    dense = model.quantize(X_dense)
+    AL = model.output(X_dense, quantized=True)
+
+    for X_input in (X, Dataset(np.ascontiguousarray(X_dense.T), chunk_size=64)):
+        quantized = model.quantize(X_input)
+
+        assert(quantized["A_scale"] == approx(dense["A_scale"]))
+        assert_allclose(model.output(X_input, quantized=True), AL)
+        assert((model.predict(X_input, quantized=True) == model.predict(X_dense, quantized=True)).all())
+
+
+def test_llayer_quantize(cat_dataset):
+    train_x_orig, train_y, test_x_orig, test_y, _ = cat_dataset
+    train_x = train_x_orig.reshape(train_x_orig.shape[0], -1).T/255.
+    test_x = test_x_orig.reshape(test_x_orig.shape[0], -1).T/255.
+
+    np.random.seed(1)
+    model = LLayer()
+    model.fit_params(train_x, train_y, layers_dims=(12288, 7, 1), num_iterations=300, verbose=False,
+                     learning_rate=0.0003, optimizer="adam")
+    with raises(ValueError):
+        model.predict(test_x, quantized=True)
+
+    quantized = model.quantize(train_x[:, :100])
+
+    assert(quantized["W"][1].dtype == np.int8)
+    assert_allclose(model.output(test_x, quantized=True), model.output(test_x), atol=0.02)
+    assert(model.verify_accuracy(train_x, train_y, quantized=True)
+           == approx(model.verify_accuracy(train_x, train_y), abs=0.02))
+    assert(model.verify_accuracy(test_x, test_y, quantized=True)
+           == approx(model.verify_accuracy(test_x, test_y), abs=0.04))
@@ -0,0 +1,76 @@
+import numpy as np
+from numpy.random import RandomState
+from numpy.testing import assert_allclose
+
+from nnlib.l_layer import LLayer
+from nnlib.l_layer.forward import model_forward
+from nnlib.l_layer.backward import model_backward
+from nnlib.l_layer.parallel import DataParallel
+from nnlib.utils.cost import cross_entropy
+from nnlib.utils.initialize import initialize_parameters
+
+
+def test_data_parallel_gradients():
+    rand = RandomState(1)
+    X = rand.randn(6, 25)
+    Y = rand.randn(1, 25) > 0
+    layers_dims = [6, 5, 3, 1]
+    np.random.seed(1)
+    parameters = initialize_parameters(layers_dims, flat=True)
+
+    AL, caches = model_forward(X, parameters, keep_prob=1)
+    grads = model_backward(AL, Y, parameters, caches, alpha=0.7, keep_prob=1)
+    cost = cross_entropy(AL, Y, parameters, alpha=0)
+
+    trainer = DataParallel(parameters, layers_dims, X, Y, keep_prob=1, processes=3)
+    try:
+        for index in (slice(None), np.arange(25)):
+            parallel_grads, parallel_cost = trainer.gradients(index, alpha=0.7)
+
+            assert_allclose(parallel_cost, cost)
+            for l in range(1, 4):
+                assert_allclose(parallel_grads["dW"][l], grads["dW"][l])
+                assert_allclose(parallel_grads["db"][l], grads["db"][l], atol=1e-12)
+
+        # updates in the parent process are seen by the workers
+        trainer.parameters["flat"][:] = 0
+        parallel_grads, parallel_cost = trainer.gradients(np.array([0, 3, 7]), alpha=0)
+
+        assert_allclose(parallel_cost, np.log(2))
+        assert(not parallel_grads["dW"][1].any())
+    finally:
+        trainer.close()
+
+
+def test_llayer_processes():
+    rand = RandomState(2)
+    X = rand.randn(10, 200)
+    Y = (X[:1] + X[1:2] > 0).astype(int)
+
+    models = []
+    for processes in (None, 4):
+        np.random.seed(1)
+        model = LLayer()
+        model.fit_params(X, Y, layers_dims=(10, 4, 1), num_iterations=10, learning_rate=0.1, alpha=0.1,
+                         verbose=False, batch_size=64, shuffle=False, processes=processes)
+        models.append(model)
+
+    assert_allclose(models[1].costs, models[0].costs)
+    assert_allclose(models[1].parameters["flat"], models[0].parameters["flat"])
+
+
+def test_llayer_processes_dropout_reproducible():
+    rand = RandomState(3)
+    X = rand.randn(10, 120)
+    Y = (X[:1] > 0).astype(int)
+
+    models = []
+    for _ in range(2):
+        np.random.seed(1)
+        model = LLayer()
+        model.fit_params(X, Y, layers_dims=(10, 8, 1), num_iterations=5, learning_rate=0.1, keep_prob=0.7,
+                         verbose=False, batch_size=40, processes=3)
+        models.append(model)
+
+    assert_allclose(models[1].costs, models[0].costs)
+    assert_allclose(models[1].parameters["flat"], models[0].parameters["flat"])
@@ -0,0 +1,59 @@
+import numpy as np
+from numpy.random import RandomState
+from numpy.testing import assert_allclose
+
+from nnlib.l_layer.inference import model_predict
+from nnlib.l_layer.quantize import quantize_parameters, quantize_inputs, quantized_predict, quantized_nbytes
+from nnlib.utils.initialize import initialize_parameters
+
+
+def _model(layers_dims=(60, 20, 8, 1)):
+    rand = RandomState(1)
+    X = rand.randn(layers_dims[0], 200)
+    np.random.seed(1)
+    parameters = initialize_parameters(layers_dims, flat=True)
+    parameters["flat"][...] += 0.05 * rand.randn(parameters["flat"].size)
+
+    return X, parameters
+
+
+def test_quantize_parameters():
+    X, parameters = _model()
+
+    quantized = quantize_parameters(parameters, X)
+
+    for l in (1, 2, 3):
+        W, W_q, W_scale = parameters["W"][l], quantized["W"][l], quantized["W_scale"][l]
+        assert(W_q.dtype == np.int8 and quantized["b"][l].dtype == np.int32)
+        assert(W_scale.shape == (W.shape[0], 1))
+        assert((np.max(np.abs(W_q), axis=1) == 127).all())
+        assert((np.abs(W - W_q * W_scale) <= W_scale / 2 + 1e-7).all())
+    assert(quantized["A_scale"][1] == np.max(np.abs(X)) / 127)
+    assert(quantized_nbytes(quantized) < parameters["flat"].nbytes / 6)
+
+
+def test_quantize_inputs():
+    A = np.array([[-3., -0.26, 0.], [0.24, 1.1, 2.6]])
+
+    assert_allclose(quantize_inputs(A, 0.5), [[-6, -1, 0], [0, 2, 5]])
+    assert_allclose(quantize_inputs(A, 0.01), [[-127, -26, 0], [24, 110, 127]])
+
+
+def test_quantized_predict():
+    X, parameters = _model()
+    X_copy = X.copy()
+
+    AL = quantized_predict(X, quantize_parameters(parameters, X[:, :100]), None)
+
+    assert_allclose(X, X_copy)
+    assert_allclose(AL, model_predict(X, parameters), atol=0.02)
+
+
+def test_quantized_predict_activations():
+    X, parameters = _model((60, 20, 4))
+    activations = ("tanh", "softmax")
+
+    quantized = quantize_parameters(parameters, X, activations, percentile=99.9)
+
+    assert_allclose(quantized_predict(X, quantized, activations), model_predict(X, parameters, activations=activations),
+                    atol=0.02)
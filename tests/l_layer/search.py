@@ -0,0 +1,114 @@
+from pathlib import Path
+
+import numpy as np
+from numpy.random import RandomState
+from numpy.testing import assert_allclose
+from pytest import approx, raises
+
+from nnlib.l_layer import LLayer
+from nnlib.l_layer.search import grid, sample, log_uniform, halving_budgets, search, format_leaderboard
+
+
+def _data():
+    rand = RandomState(0)
+    X = rand.randn(10, 300)
+    Y = (X[:3].sum(axis=0, keepdims=True) > 0).astype(int)
+
+    return X[:, :200], Y[:, :200], (X[:, 200:], Y[:, 200:])
+
+
+def test_grid():
+    configs = grid(dict(alpha=[0, 0.1], layers_dims=[(5, 1), (5, 3, 1), (5, 4, 1)]))
+
+    assert(len(configs) == 6)
+    assert(configs[0] == dict(alpha=0, layers_dims=(5, 1)))
+    assert(configs[-1] == dict(alpha=0.1, layers_dims=(5, 4, 1)))
+    assert(type(grid(dict(batch_size=np.array([32, 64])))[0]["batch_size"]) is int)
+
+
+def test_sample():
+    rng = np.random.default_rng(0)
+
+    configs = sample(dict(learning_rate=log_uniform(1e-4, 1e-1), keep_prob=[0.8, 1]), 50, rng)
+
+    assert(len(configs) == 50)
+    assert(all(1e-4 <= config["learning_rate"] <= 1e-1 for config in configs))
+    assert({config["keep_prob"] for config in configs} == {0.8, 1})
+    assert(all(type(config["alpha"]) is float for config in sample(dict(alpha=np.array([0, 0.1])), 5, rng)))
+    assert(configs == sample(dict(learning_rate=log_uniform(1e-4, 1e-1), keep_prob=[0.8, 1]), 50,
+                             np.random.default_rng(0)))
+
+
+def test_halving_budgets():
+    assert(halving_budgets(27, 81) == [3, 9, 27, 81])
+    assert(halving_budgets(10, 100, eta=2) == [6, 12, 25, 50, 100])
+    assert(halving_budgets(1, 100) == [100])
+
+
+def test_search_grid():
+    X, Y, validation_data = _data()
+
+    leaderboard = search(dict(learning_rate=[0.003, 0.1], alpha=[0, 0.1]), X, Y, 30, validation_data=validation_data,
+                         processes=2, verbose=False, layers_dims=(10, 4, 1), optimizer="adam")
+
+    assert(len(leaderboard) == 4)
+    assert([trial["score"] for trial in leaderboard] == sorted(trial["score"] for trial in leaderboard))
+    assert(all(trial["status"] in ("completed", "killed") for trial in leaderboard))
+    assert(sum(trial["status"] == "killed" for trial in leaderboard) >= 1)
+    best = leaderboard[0]
+    assert(best["status"] == "completed" and best["iterations"] == 30)
+    assert(best["checkpoint"] is None)
+    assert(best["score"] == approx(np.nanmin(best["validation_costs"])))
+
+    # a trial continued over several rungs is the same as a single run
+    np.random.seed(best["trial"])
+    model = LLayer()
+    model.fit_params(X, Y, num_iterations=30, verbose=False, validation_data=validation_data, layers_dims=(10, 4, 1),
+                     optimizer="adam", **best["params"])
+    assert_allclose(model.costs, best["costs"])
+    assert(model.verify_cost(*validation_data) == approx(best["cost"]))
+    assert(model.verify_accuracy(*validation_data) == approx(best["accuracy"]))
+    assert("rank" in format_leaderboard(leaderboard) and len(format_leaderboard(leaderboard, 2).splitlines()) == 3)
+
+
+def test_search_halving(tmpdir):
+    tmp_path = Path(str(tmpdir))
+    X, Y, _ = _data()
+
+    leaderboard = search(dict(learning_rate=log_uniform(1e-3, 1)), X, Y, 27, strategy="halving", n_trials=9,
+                         processes=2, verbose=False, directory=str(tmp_path), layers_dims=(10, 4, 1))
+
+    iterations = sorted(trial["iterations"] for trial in leaderboard)
+    assert(iterations == [3] * 6 + [9, 9, 27])
+    assert(leaderboard[0]["status"] == "completed")
+    assert(leaderboard[0]["iterations"] == 27)
+    assert(LLayer.load(leaderboard[0]["checkpoint"]).epoch == 26)
+
+
+def test_search_reused_directory(tmpdir):
+    tmp_path = Path(str(tmpdir))
+    X, Y, validation_data = _data()
+    run = dict(X=X, Y=Y, num_iterations=10, processes=1, verbose=False, validation_data=validation_data,
+               layers_dims=(10, 4, 1))
+
+    search(dict(learning_rate=[0.5]), directory=str(tmp_path), **run)
+    reused = search(dict(learning_rate=[0.0001]), directory=str(tmp_path), **run)
+    fresh = search(dict(learning_rate=[0.0001]), **run)
+
+    assert(reused[0]["iterations"] == 10)
+    assert_allclose(reused[0]["costs"], fresh[0]["costs"])
+    assert(reused[0]["score"] == approx(fresh[0]["score"]))
+
+
+def test_search_failures():
+    X, Y, _ = _data()
+
+    leaderboard = search(dict(optimizer=["adam", "sgd"]), X, Y, 4, processes=1, verbose=False, layers_dims=(10, 1))
+
+    assert([trial["status"] for trial in leaderboard] == ["completed", "failed"])
+    assert("unknown optimizer" in leaderboard[1]["error"])
+    # numpy values are saved in the checkpoints as Python numbers
+    leaderboard = search(dict(batch_size=np.array([32, 64])), X, Y, 2, processes=1, verbose=False, layers_dims=(10, 1))
+    assert([trial["status"] for trial in leaderboard] == ["completed", "completed"])
+    with raises(ValueError):
+        search(dict(alpha=[0]), X, Y, 4, strategy="bayes")
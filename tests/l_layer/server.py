@@ -0,0 +1,72 @@
+import http.client
+import json
+
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+from pytest import fixture, raises
+
+from nnlib.l_layer.inference import model_predict
+from nnlib.utils.initialize import initialize_parameters
+
+# the server needs Python 3.8
+shared_memory = pytest.importorskip("multiprocessing.shared_memory")
+from nnlib.l_layer.server import InferenceServer, InferenceClient  # noqa: E402
+
+
+@fixture
+def served():
+    np.random.seed(1)
+    parameters = initialize_parameters([6, 5, 3], flat=True)
+    activations = ("tanh", "softmax")
+    with InferenceServer(parameters, activations, processes=2, max_delay=0.005) as server:
+        yield server, parameters, activations
+
+
+def test_inference_server_predict(served):
+    server, parameters, activations = served
+    X = np.random.RandomState(2).randn(6, 9)
+    client = InferenceClient(server.address, timeout=10)
+
+    assert_allclose(client.predict(X), model_predict(X, parameters, activations=activations))
+    assert_allclose(client.predict(X[:, :1]), model_predict(X[:, :1], parameters, activations=activations))
+    assert_allclose(client.predict(X.astype(np.float32)), model_predict(X, parameters, activations=activations),
+                    rtol=1e-5)
+    client.close()
+
+
+def test_inference_server_json(served):
+    server, parameters, activations = served
+    X = np.random.RandomState(3).randn(6, 2)
+    connection = http.client.HTTPConnection(*server.address, timeout=10)
+
+    connection.request("POST", "/predict", body=json.dumps(dict(inputs=X.T.tolist())),
+                       headers={"Content-Type": "application/json"})
+    outputs = json.loads(connection.getresponse().read())["outputs"]
+
+    assert_allclose(np.array(outputs).T, model_predict(X, parameters, activations=activations))
+
+    connection.request("GET", "/health")
+    assert("pid" in json.loads(connection.getresponse().read()))
+    connection.close()
+
+
+def test_inference_server_bad_request(served):
+    server, _, _ = served
+    client = InferenceClient(server.address, timeout=10)
+
+    with raises(RuntimeError):
+        client.predict(np.zeros((4, 1)))
+    client.close()
+
+
+def test_inference_server_close():
+    np.random.seed(1)
+    server = InferenceServer(initialize_parameters([2, 1], flat=True), processes=1)
+    name = server.memory.name
+    workers = server.workers
+    server.close()
+
+    assert(all(not worker.is_alive() for worker in workers))
+    with raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
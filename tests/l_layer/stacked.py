@@ -0,0 +1,152 @@
+from pathlib import Path
+
+import numpy as np
+from numpy.random import RandomState
+from numpy.testing import assert_allclose
+from pytest import approx, importorskip, raises
+
+from nnlib.l_layer import LLayer
+from nnlib.l_layer.forward import model_forward
+from nnlib.l_layer.backward import model_backward
+from nnlib.l_layer.stacked import (initialize_stacked_parameters, stack_parameters, unstack_parameters, per_model,
+                                   stacked_forward, stacked_backward, stacked_cross_entropy, StackedLLayer)
+from nnlib.utils.cost import cross_entropy, l2_penalty
+from nnlib.utils.initialize import initialize_parameters
+from nnlib.utils.update import update_parameters
+
+
+def _data():
+    rand = RandomState(0)
+    X = rand.randn(12, 50)
+    Y = (X[:2].sum(axis=0, keepdims=True) > 0).astype(int)
+
+    return X, Y
+
+
+def test_stack_parameters():
+    np.random.seed(1)
+    parameters_list = [initialize_parameters((12, 6, 1), flat=True) for _ in range(3)]
+
+    parameters = stack_parameters(parameters_list)
+
+    assert(parameters["W"][1].shape == (3, 6, 12))
+    assert(parameters["b"][2].shape == (3, 1, 1))
+    assert_allclose(unstack_parameters(parameters, 2)["flat"], parameters_list[2]["flat"])
+    assert(initialize_stacked_parameters((12, 6, 1), 4)["W"][1].shape == (4, 6, 12))
+
+
+def test_stacked_gradients():
+    X, Y = _data()
+    np.random.seed(1)
+    parameters_list = [initialize_parameters((12, 6, 4, 1), flat=True) for _ in range(3)]
+    parameters = stack_parameters(parameters_list)
+    alpha = [0, 0.3, 0.7]
+
+    for activations in (None, ("tanh", "gelu", "sigmoid")):
+        AL, caches = stacked_forward(X, parameters, 1, activations)
+        grads = stacked_backward(AL, Y, parameters, caches, per_model(alpha, 3), 1, activations)
+        costs = stacked_cross_entropy(caches["Z"][3], Y, parameters, per_model(alpha, 3))
+
+        for k in range(3):
+            AL_k, caches_k = model_forward(X, parameters_list[k], 1, activations=activations)
+            grads_k = model_backward(AL_k, Y, parameters_list[k], caches_k, alpha[k], 1, fused=True,
+                                     activations=activations)
+
+            assert_allclose(AL[k], AL_k)
+            assert_allclose(costs[k], cross_entropy(AL_k, Y, parameters_list[k], alpha[k]))
+            for l in (1, 2, 3):
+                assert_allclose(grads["dW"][l][k], grads_k["dW"][l])
+                assert_allclose(grads["db"][l][k], grads_k["db"][l], atol=1e-12)
+
+
+def test_stacked_forward_dropout():
+    X, _ = _data()
+    np.random.seed(1)
+    parameters = initialize_stacked_parameters((12, 30, 1), 2)
+
+    AL, caches = stacked_forward(X, parameters, per_model([1, 0.5], 2))
+
+    assert(caches["D"][1][0].all())
+    assert(0.4 < np.mean(caches["D"][1][1]) < 0.6)
+    assert_allclose(AL[0], stacked_forward(X, parameters, 1)[0][0])
+
+
+def test_stacked_sparse_input():
+    sp = importorskip("scipy.sparse")
+    X, Y = _data()
+    X[np.abs(X) < 1] = 0
+    np.random.seed(1)
+    parameters = initialize_stacked_parameters((12, 6, 1), 3)
+
+    AL, caches = stacked_forward(sp.csr_matrix(X), parameters, 1)
+    grads = stacked_backward(AL, Y, parameters, caches, 0, 1)
+    AL_dense, caches_dense = stacked_forward(X, parameters, 1)
+
+    assert_allclose(AL, AL_dense)
+    assert_allclose(grads["dW"][1], stacked_backward(AL_dense, Y, parameters, caches_dense, 0, 1)["dW"][1])
+
+
+def test_stacked_llayer():
+    X, Y = _data()
+    learning_rates = [0.01, 0.1, 0.5]
+    np.random.seed(1)
+    initial = initialize_stacked_parameters((12, 6, 1), 3)
+
+    np.random.seed(1)
+    model = StackedLLayer()
+    model.fit_params(X, Y, layers_dims=(12, 6, 1), num_iterations=30, models=3, learning_rate=learning_rates,
+                     alpha=0.1, verbose=False)
+
+    assert(len(model.costs) == 30 and model.costs[0].shape == (3,))
+    assert((model.costs[-1] < model.costs[0]).all())
+    for k in range(3):
+        # the same model trained on its own
+        parameters = unstack_parameters(initial, k)
+        for i in range(30):
+            AL, caches = model_forward(X, parameters, 1)
+            cost = cross_entropy(AL, Y, parameters, 0)
+            parameters = update_parameters(parameters, model_backward(AL, Y, parameters, caches, 0.1, 1, fused=True),
+                                           learning_rates[k])
+        # as in LLayer, the l2 term is added with the weights at the end of the epoch
+        assert_allclose(model.costs[-1][k], cost + l2_penalty(parameters, 0.1, 50))
+        assert_allclose(model.model(k).parameters["flat"], parameters["flat"])
+        assert((model.model(k).predict(X) == model.predict(X)[k]).all())
+        assert(model.model(k).verify_accuracy(X, Y) == model.verify_accuracy(X, Y)[k])
+
+    assert_allclose(model.verify_cost(X, Y), [model.model(k).verify_cost(X, Y) for k in range(3)])
+    assert(model.predict(X, ensemble=True).shape == (1, 50))
+    assert(0 <= model.verify_accuracy(X, Y, ensemble=True) <= 1)
+
+
+def test_stacked_llayer_save_load(tmpdir):
+    tmp_path = Path(str(tmpdir))
+    X, Y = _data()
+    np.random.seed(1)
+    model = StackedLLayer()
+    model.fit_params(X, Y, layers_dims=(12, 6, 1), num_iterations=5, models=2, learning_rate=[0.01, 0.02],
+                     optimizer="adam", verbose=False)
+
+    model.model(1).save(tmp_path / "model.nnlib")
+    loaded = LLayer.load(tmp_path / "model.nnlib")
+
+    assert(loaded.learning_rate == approx(0.02) and loaded.optimizer == "adam" and loaded.epoch == 4)
+    assert_allclose(loaded.costs, [costs[1] for costs in model.costs])
+    assert_allclose(loaded.output(X), model.output(X)[1])
+    assert_allclose(loaded.v["dW"][1], model.v["dW"][1][1])
+
+    # training goes on from the saved optimizer state
+    np.random.seed(1)
+    resumed = LLayer()
+    resumed.fit_params(X, Y, layers_dims=(12, 6, 1), num_iterations=7, learning_rate=0.02, optimizer="adam",
+                       verbose=False, checkpoint_path=tmp_path / "model.nnlib", resume=True)
+    assert(resumed.t == 7 and len(resumed.costs) == 7)
+
+
+def test_stacked_llayer_errors():
+    X, Y = _data()
+    model = StackedLLayer()
+
+    with raises(ValueError):
+        model.fit_params(X, Y, (12, 3), 1, models=2, activations=("softmax",), verbose=False)
+    with raises(ValueError):
+        model.fit_params(X, Y, (12, 3, 1), 1, models=2, learning_rate=[0.1, 0.2, 0.3], verbose=False)
@@ -0,0 +1,73 @@
+import numpy as np
+from numpy.random import RandomState
+from numpy.testing import assert_allclose
+
+from nnlib.l_layer.forward import model_forward
+from nnlib.l_layer.backward import model_backward
+from nnlib.l_layer.workspace import initialize_workspace
+from nnlib.utils.initialize import initialize_parameters
+
+
+def test_initialize_workspace():
+    workspace = initialize_workspace([5, 4, 3], 6)
+
+    for l, (n, n_prev) in enumerate([(4, 5), (3, 4)], start=1):
+        for key in ("A", "D", "Z", "dZ", "dA"):
+            assert(workspace[key][l].shape == (n, 6))
+        assert(workspace["D"][l].dtype == bool)
+        assert(workspace["dW"][l].shape == (n, n_prev))
+        assert(workspace["db"][l].shape == (n, 1))
+    assert(0 not in workspace["dA"])
+
+
+def test_model_workspace():
+    rand = RandomState(1)
+    X = rand.randn(5, 6)
+    Y = rand.randn(1, 6) > 0
+    layers_dims = [5, 4, 3, 1]
+    np.random.seed(2)
+    parameters = initialize_parameters(layers_dims)
+    workspace = initialize_workspace(layers_dims, 6)
+    buffers = {key: dict(workspace[key]) for key in ("A", "dW")}
+
+    for i in range(2):
+        np.random.seed(i)
+        AL, caches = model_forward(X, parameters, keep_prob=0.8)
+        grads = model_backward(AL, Y, parameters, caches, alpha=0.1, keep_prob=0.8)
+
+        np.random.seed(i)
+        AL_inplace, caches_inplace = model_forward(X, parameters, keep_prob=0.8, workspace=workspace)
+        grads_inplace = model_backward(AL_inplace, Y, parameters, caches_inplace, alpha=0.1, keep_prob=0.8, workspace=workspace)
+
+        assert(AL_inplace is buffers["A"][3])
+        assert_allclose(AL_inplace, AL)
+        for l in range(1, 4):
+            assert(grads_inplace["dW"][l] is buffers["dW"][l])
+            assert_allclose(grads_inplace["dW"][l], grads["dW"][l])
+            assert_allclose(grads_inplace["db"][l], grads["db"][l])
+            assert_allclose(grads_inplace["dA"][l], grads["dA"][l])
+
+
+def test_workspace_flat_gradients():
+    workspace = initialize_workspace([5, 4, 3], 6)
+
+    workspace["flat"][:] = 0
+    workspace["dW"][2][:] = 1
+
+    assert(workspace["flat"].sum() == 12)
+
+
+def test_model_workspace_float32():
+    rand = RandomState(1)
+    X = rand.randn(5, 6).astype(np.float32)
+    Y = rand.randn(1, 6) > 0
+    layers_dims = [5, 4, 1]
+    parameters = initialize_parameters(layers_dims, flat=True, dtype=np.float32)
+    workspace = initialize_workspace(layers_dims, 6, dtype=np.float32)
+
+    AL, caches = model_forward(X, parameters, keep_prob=0.8, workspace=workspace)
+    grads = model_backward(AL, Y, parameters, caches, alpha=0.1, keep_prob=0.8, workspace=workspace)
+
+    assert(AL.dtype == np.float32)
+    assert(grads["flat"].dtype == np.float32)
+    assert(grads["dW"][1].dtype == np.float32)
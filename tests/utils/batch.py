@@ -0,0 +1,31 @@
+import numpy as np
+from numpy.testing import assert_array_equal
+
+from nnlib.utils.batch import batch_indices
+
+
+def test_batch_indices_full_batch():
+    assert(list(batch_indices(4)) == [slice(None)])
+    assert(list(batch_indices(4, batch_size=8)) == [slice(None)])
+
+
+def test_batch_indices_in_order():
+    X = np.arange(15).reshape(3, 5)
+
+    indices = list(batch_indices(5, batch_size=2, shuffle=False))
+
+    assert(indices == [slice(0, 2), slice(2, 4), slice(4, 6)])
+    assert_array_equal(np.concatenate([X[:, index] for index in indices], axis=1), X)
+
+
+def test_batch_indices_shuffle():
+    np.random.seed(1)
+
+    indices = list(batch_indices(10, batch_size=4))
+    seen = np.concatenate(indices)
+
+    assert([len(index) for index in indices] == [4, 4, 2])
+    assert_array_equal(np.sort(seen), np.arange(10))
+    for index in indices:
+        # sorted within a batch for sequential reads
+        assert_array_equal(index, np.sort(index))
@@ -0,0 +1,70 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+
+from nnlib.utils.checkpoint import save_checkpoint, load_checkpoint, ALIGNMENT
+
+
+def _arrays():
+    rand = np.random.RandomState(0)
+
+    return dict(
+            weights=rand.randn(7, 5),
+            half=rand.randn(3).astype(np.float16),
+            keys=rand.randint(2**31, size=624).astype(np.uint32),
+            empty=np.zeros((0, 4)),
+            )
+
+
+@pytest.mark.parametrize("mmap", (False, True))
+def test_checkpoint_round_trip(tmpdir, mmap):
+    tmp_path = Path(str(tmpdir))
+    path = tmp_path / "model.nnlib"
+    arrays = _arrays()
+    meta = dict(layers_dims=[5, 7, 1], costs=[0.5, 0.25], name="test")
+
+    save_checkpoint(path, arrays, meta)
+    loaded, loaded_meta = load_checkpoint(path, mmap=mmap)
+
+    assert(loaded_meta == meta)
+    assert(sorted(loaded) == sorted(arrays))
+    for name, array in arrays.items():
+        assert(loaded[name].dtype == array.dtype)
+        assert_array_equal(loaded[name], array)
+    assert(list(tmp_path.iterdir()) == [path])
+
+
+def test_checkpoint_mmap(tmpdir):
+    tmp_path = Path(str(tmpdir))
+    path = tmp_path / "model.nnlib"
+    save_checkpoint(path, _arrays(), {})
+
+    loaded, _ = load_checkpoint(path, mmap=True)
+
+    assert(isinstance(loaded["weights"], np.memmap))
+    assert(loaded["weights"].offset % ALIGNMENT == 0)
+    with pytest.raises(ValueError):
+        loaded["weights"][0, 0] = 1
+
+
+def test_checkpoint_overwrite(tmpdir):
+    tmp_path = Path(str(tmpdir))
+    path = tmp_path / "model.nnlib"
+    save_checkpoint(path, dict(a=np.zeros(3)), dict(epoch=0))
+    save_checkpoint(path, dict(a=np.ones(5)), dict(epoch=1))
+
+    loaded, meta = load_checkpoint(path)
+
+    assert(meta["epoch"] == 1)
+    assert_array_equal(loaded["a"], np.ones(5))
+
+
+def test_checkpoint_not_a_checkpoint(tmpdir):
+    tmp_path = Path(str(tmpdir))
+    path = tmp_path / "model.npy"
+    np.save(path, np.zeros(3))
+
+    with pytest.raises(ValueError):
+        load_checkpoint(path)
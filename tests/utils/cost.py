@@ -2,7 +2,8 @@ import numpy as np
 from numpy.random import RandomState
 from numpy.testing import assert_allclose
 
-from nnlib.utils.cost import cross_entropy
+from nnlib.utils.cost import cross_entropy, cross_entropy_with_logits, sparse_cross_entropy, sparse_cross_entropy_with_logits
+from nnlib.utils.activation import sigmoid, softmax
 
 
 def test_cross_entropy():
@@ -48,3 +49,46 @@ def test_cross_entropy_l2_regularization():
             )
 
     assert_allclose(cost, 1.78648594516)
+
+
+def test_cross_entropy_with_logits():
+    random_state = RandomState(1)
+    Y = np.array([[1, 1, 0, 1, 0]])
+    ZL = random_state.randn(1, 5)
+    parameters = {'W': {1: random_state.randn(2, 3)}, 'b': {1: random_state.randn(2, 1)}}
+
+    cost = cross_entropy_with_logits(ZL, Y, parameters, alpha=0.1)
+
+    assert_allclose(cost, cross_entropy(sigmoid(ZL), Y, parameters, alpha=0.1))
+
+
+def test_cross_entropy_with_logits_saturated():
+    Y = np.array([[1, 0, 1, 0]])
+    ZL = np.array([[800., -800., -40., 40.]])
+
+    with np.errstate(over='raise', divide='raise', invalid='raise'):
+        cost = cross_entropy_with_logits(ZL, Y, {'W': {}}, alpha=0)
+
+    assert_allclose(cost, (0 + 0 + 40 + 40) / 4)
+
+
+def test_sparse_cross_entropy():
+    random_state = RandomState(2)
+    ZL = random_state.randn(4, 5)
+    Y = np.array([[0, 3, 1, 1, 2]])
+    parameters = {'W': {1: random_state.randn(4, 3)}, 'b': {1: random_state.randn(4, 1)}}
+    AL = softmax(ZL)
+    one_hot = np.eye(4)[:, Y[0]]
+
+    cost = sparse_cross_entropy(AL, Y, parameters, alpha=0.1)
+
+    assert_allclose(cost, -np.sum(one_hot * np.log(AL))/5 + 0.1/10*np.sum(parameters['W'][1]**2))
+    assert_allclose(sparse_cross_entropy_with_logits(ZL, Y, parameters, alpha=0.1), cost)
+
+
+def test_sparse_cross_entropy_with_logits_saturated():
+    ZL = np.array([[1000., -1000.], [-1000., 1000.]])
+
+    with np.errstate(over='raise', divide='raise', invalid='raise'):
+        assert_allclose(sparse_cross_entropy_with_logits(ZL, np.array([[0, 1]]), {'W': {}}, 0), 0)
+        assert_allclose(sparse_cross_entropy_with_logits(ZL, np.array([[1, 0]]), {'W': {}}, 0), 2000)
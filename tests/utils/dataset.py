@@ -0,0 +1,36 @@
+from pathlib import Path
+
+import numpy as np
+import h5py
+from numpy.testing import assert_allclose
+
+from nnlib.utils.dataset import Dataset, columns
+
+
+def test_dataset_memmap(tmpdir):
+    tmp_path = Path(str(tmpdir))
+    rand = np.random.RandomState(1)
+    images = rand.randint(0, 256, size=(10, 2, 2, 3)).astype(np.uint8)
+    data = np.memmap(str(tmp_path / 'images.dat'), dtype=np.uint8, mode='w+', shape=images.shape)
+    data[:] = images
+    X = images.reshape(10, -1).T/255.
+
+    dataset = Dataset(data, scale=255., chunk_size=4)
+
+    assert(dataset.shape == (12, 10))
+    assert_allclose(dataset.columns(slice(2, 5)), X[:, 2:5])
+    assert_allclose(dataset.columns(np.array([7, 1, 4])), X[:, [7, 1, 4]])
+    assert([chunk.shape[1] for chunk in dataset.chunks()] == [4, 4, 2])
+    assert_allclose(np.concatenate(list(dataset.chunks()), axis=1), X)
+
+
+def test_dataset_h5py_features_first(tmpdir):
+    tmp_path = Path(str(tmpdir))
+    X = np.random.RandomState(2).randn(3, 6)
+    with h5py.File(str(tmp_path / 'features.h5'), 'w') as f:
+        f['X'] = X
+        dataset = Dataset(f['X'], samples_first=False)
+
+        assert(dataset.shape == (3, 6))
+        assert_allclose(dataset.columns(np.array([5, 0, 2])), X[:, [5, 0, 2]])
+        assert_allclose(columns(dataset, slice(1, 3)), columns(X, slice(1, 3)))
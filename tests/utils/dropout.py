@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_array_equal
+
+from nnlib.utils.dropout import dropout_mask, store_mask, load_mask
+
+
+def test_dropout_mask():
+    D = dropout_mask((100, 200), 0.7, np.random.default_rng(0))
+
+    assert(D.dtype == bool)
+    assert(D.mean() == pytest.approx(0.7, abs=0.02))
+    assert_array_equal(dropout_mask((100, 200), 0.7, np.random.default_rng(0)), D)
+
+
+def test_dropout_mask_out():
+    out = np.empty((3, 4), dtype=bool)
+
+    assert(dropout_mask((3, 4), 0.5, np.random.default_rng(1), out=out) is out)
+
+
+def test_store_mask_packed():
+    D = dropout_mask((7, 13), 0.5, np.random.default_rng(2))
+    stored = store_mask(D, "packed")
+
+    assert(stored.nbytes == -(-D.size // 8))
+    assert_array_equal(load_mask(stored, D.shape, 0.5), D)
+
+
+def test_store_mask_seed():
+    seed = np.random.SeedSequence(3)
+    D = dropout_mask((7, 13), 0.5, np.random.default_rng(seed))
+    stored = store_mask(D, "seed", seed)
+
+    assert_array_equal(load_mask(stored, D.shape, 0.5), D)
+
+
+def test_load_mask_unchanged():
+    D = np.ones((2, 2), dtype=bool)
+
+    assert(load_mask(D, D.shape, 0.5) is D)
+    assert(load_mask(1, D.shape, 1) == 1)
@@ -0,0 +1,29 @@
+import numpy as np
+
+from nnlib.utils.flat import flat_size, flat_views, allocate_flat
+
+
+def test_flat_size():
+    assert(flat_size([5, 4, 3]) == 5*4 + 4 + 4*3 + 3)
+
+
+def test_flat_views():
+    buffer = np.arange(flat_size([3, 2, 1]), dtype=float)
+    views = flat_views(buffer, [3, 2, 1], keys=("dW", "db"))
+
+    assert(views["flat"] is buffer)
+    assert(views["dW"][1].shape == (2, 3))
+    assert(views["db"][1].shape == (2, 1))
+    assert(views["dW"][2].shape == (1, 2))
+    assert(views["db"][2].shape == (1, 1))
+    assert(np.shares_memory(views["dW"][2], buffer))
+
+    buffer[:] = 0
+    assert(not views["dW"][1].any())
+
+
+def test_allocate_flat():
+    parameters = allocate_flat([5, 4, 3], dtype=np.float32)
+
+    assert(parameters["flat"].dtype == np.float32)
+    assert(not parameters["flat"].any())
@@ -1,3 +1,6 @@
+import numpy as np
+from numpy.testing import assert_array_equal
+
 from nnlib.utils.initialize import initialize_parameters
 
 
@@ -8,3 +11,25 @@ def test_initialize_parameters():
     for i in range(len(layers_dims)-1):
         assert(params["W"][i+1].shape == (layers_dims[i+1], layers_dims[i]))
         assert(params["b"][i+1].shape == (layers_dims[i+1], 1))
+
+
+def test_initialize_parameters_flat():
+    layers_dims = [5, 4, 3]
+    np.random.seed(1)
+    params = initialize_parameters(layers_dims)
+    np.random.seed(1)
+    flat_params = initialize_parameters(layers_dims, flat=True)
+
+    assert(flat_params["flat"].shape == (5*4 + 4 + 4*3 + 3,))
+    for l in range(1, len(layers_dims)):
+        assert_array_equal(flat_params["W"][l], params["W"][l])
+        assert_array_equal(flat_params["b"][l], params["b"][l])
+        assert(np.shares_memory(flat_params["W"][l], flat_params["flat"]))
+
+
+def test_initialize_parameters_dtype():
+    for flat in (False, True):
+        params = initialize_parameters([5, 4, 3], flat=flat, dtype=np.float32)
+
+        assert(params["W"][1].dtype == np.float32)
+        assert(params["b"][2].dtype == np.float32)
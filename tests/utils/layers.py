@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from numpy.random import RandomState
+from numpy.testing import assert_allclose
+
+from nnlib.utils.layers import ACTIVATIONS, layer_activations, register_activation
+
+
+@pytest.mark.parametrize("name", sorted(ACTIVATIONS))
+def test_activation_backward(name):
+    forward, backward = ACTIVATIONS[name]
+    rand = RandomState(0)
+    Z = rand.randn(4, 5)
+    dA = rand.randn(4, 5)
+
+    # numerical gradient of sum(dA * forward(Z)) with respect to Z
+    epsilon = 1e-6
+    numerical = np.zeros_like(Z)
+    for i in np.ndindex(*Z.shape):
+        Z_plus, Z_minus = Z.copy(), Z.copy()
+        Z_plus[i] += epsilon
+        Z_minus[i] -= epsilon
+        numerical[i] = np.sum(dA * (forward(Z_plus) - forward(Z_minus))) / (2*epsilon)
+
+    dZ = backward(dA, (Z, forward(Z)))
+
+    assert_allclose(dZ, numerical, rtol=1e-5, atol=1e-8)
+    assert_allclose(backward(dA, (Z, None)), dZ)
+
+
+@pytest.mark.parametrize("name", sorted(ACTIVATIONS))
+def test_activation_in_place(name):
+    forward, backward = ACTIVATIONS[name]
+    rand = RandomState(1)
+    Z = rand.randn(3, 4)
+    dA = rand.randn(3, 4)
+    A = forward(Z)
+    dZ = backward(dA, (Z, A))
+
+    Z_in_place = Z.copy()
+    A_in_place = forward(Z_in_place, out=Z_in_place)
+    dZ_out = np.empty_like(Z)
+    dZ_in_place = backward(dA, (Z, None), out=dZ_out)
+
+    assert(A_in_place is Z_in_place)
+    assert(dZ_in_place is dZ_out)
+    assert_allclose(A_in_place, A)
+    assert_allclose(dZ_in_place, dZ)
+
+
+def test_layer_activations():
+    assert(layer_activations(None, 3) == {1: "relu", 2: "relu", 3: "sigmoid"})
+    assert(layer_activations(["tanh", "linear"], 2) == {1: "tanh", 2: "linear"})
+
+    with pytest.raises(ValueError):
+        layer_activations(["relu"], 2)
+    with pytest.raises(ValueError):
+        layer_activations(["relu", "swish"], 2)
+
+
+def test_register_activation():
+    def square(Z, out=None):
+        return np.square(Z, out=out)
+
+    def square_backward(dA, cache, out=None):
+        dZ = np.multiply(dA, cache[0], out=out)
+        dZ *= 2
+        return dZ
+
+    register_activation("square", square, square_backward)
+    try:
+        assert(layer_activations(["square", "sigmoid"], 2)[1] == "square")
+    finally:
+        del ACTIVATIONS["square"]
@@ -0,0 +1,49 @@
+import threading
+import time
+
+from pytest import raises
+
+from nnlib.utils.prefetch import prefetch
+
+
+def test_prefetch_order():
+    assert(list(prefetch(range(100), depth=3)) == list(range(100)))
+
+
+def test_prefetch_depth():
+    produced = []
+
+    def items():
+        for i in range(10):
+            produced.append(i)
+            yield i
+
+    batches = prefetch(items(), depth=2)
+    assert(next(batches) == 0)
+    time.sleep(0.2)
+
+    # one item consumed, depth items queued and at most one more waiting to be queued
+    assert(len(produced) <= 4)
+    assert(list(batches) == list(range(1, 10)))
+
+
+def test_prefetch_error():
+    def items():
+        yield 1
+        raise ValueError('bad batch')
+
+    batches = prefetch(items())
+
+    assert(next(batches) == 1)
+    with raises(ValueError):
+        next(batches)
+
+
+def test_prefetch_close():
+    threads = threading.active_count()
+    batches = prefetch(iter(range(1000)), depth=1)
+
+    assert(next(batches) == 0)
+    batches.close()
+
+    assert(threading.active_count() == threads)
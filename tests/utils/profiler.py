@@ -0,0 +1,39 @@
+import json
+from pathlib import Path
+
+from nnlib.utils.profiler import Profiler
+
+
+def test_profiler():
+    profiler = Profiler()
+    for _ in range(3):
+        profiler.begin("forward", 1)
+        profiler.end("forward", 1, flops=100, nbytes=8, samples=4)
+    profiler.begin("update")
+    profiler.end("update")
+
+    summary = profiler.summary()
+    forward = [row for row in summary if row["phase"] == "forward"][0]
+
+    assert(len(profiler.records) == 4)
+    assert(len(summary) == 2)
+    assert(forward["layer"] == 1)
+    assert(forward["calls"] == 3)
+    assert(forward["flops"] == 300)
+    assert(forward["bytes"] == 24)
+    assert(forward["samples"] == 12)
+    assert(forward["samples_per_sec"] > 0)
+
+
+def test_profiler_export(tmpdir):
+    tmp_path = Path(str(tmpdir))
+    profiler = Profiler()
+    profiler.begin("cost")
+    profiler.end("cost", samples=10)
+    profiler.export(str(tmp_path / "profile.json"))
+
+    with open(str(tmp_path / "profile.json")) as f:
+        log = json.load(f)
+
+    assert(log["records"][0]["phase"] == "cost")
+    assert(log["summary"][0]["samples"] == 10)
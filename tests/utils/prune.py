@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+
+from nnlib.utils.initialize import initialize_parameters
+from nnlib.utils.prune import prune_masks, apply_masks, sparsity, sparse_parameters, parameters_nbytes
+from nnlib.l_layer.inference import model_predict
+
+
+def test_prune_masks_global():
+    parameters = dict(W={1: np.array([[0.1, -3.], [2., -0.2]]), 2: np.array([[0.3, -0.05]])}, b={1: None, 2: None})
+
+    masks = prune_masks(parameters, 0.5)
+
+    assert((masks[1] == [[False, True], [True, False]]).all())
+    assert((masks[2] == [[True, False]]).all())
+    assert(all(not mask.any() for mask in prune_masks(parameters, 1).values()))
+    assert(all(mask.all() for mask in prune_masks(parameters, 0).values()))
+
+
+def test_prune_masks_layer():
+    np.random.seed(1)
+    parameters = initialize_parameters((50, 20, 5, 1), flat=True)
+
+    masks = prune_masks(parameters, 0.6, scope="layer")
+
+    assert(np.sum(masks[1]) == 400)
+    assert(np.sum(masks[2]) == 40)
+    assert(np.sum(masks[3]) == 2)
+    assert(np.min(np.abs(parameters["W"][1][masks[1]])) >= np.max(np.abs(parameters["W"][1][~masks[1]])))
+    with pytest.raises(ValueError):
+        prune_masks(parameters, 0.6, scope="unit")
+    with pytest.raises(ValueError):
+        prune_masks(parameters, 1.5)
+
+
+def test_apply_masks():
+    np.random.seed(1)
+    parameters = initialize_parameters((50, 20, 5, 1), flat=True)
+    b = parameters["b"][1].copy()
+
+    apply_masks(parameters, prune_masks(parameters, 0.75))
+
+    assert(sparsity(parameters) == pytest.approx(0.75, abs=1e-3))
+    assert_allclose(parameters["b"][1], b)
+
+
+def test_sparse_parameters():
+    sp = pytest.importorskip("scipy.sparse")
+    np.random.seed(1)
+    parameters = initialize_parameters((300, 20, 1), flat=True)
+    masks = prune_masks(parameters, 0.9, scope="layer")
+    masks[2][...] = True
+    apply_masks(parameters, masks)
+    X = np.random.randn(300, 16)
+
+    sparse = sparse_parameters(parameters)
+
+    assert(sp.issparse(sparse["W"][1]))
+    assert(isinstance(sparse["W"][2], np.ndarray))
+    assert(sparsity(sparse) == pytest.approx(sparsity(parameters)))
+    assert(parameters_nbytes(sparse) < parameters["flat"].nbytes / 4)
+    assert_allclose(model_predict(X, sparse), model_predict(X, parameters))
@@ -0,0 +1,21 @@
+from numpy.testing import assert_allclose
+
+from nnlib.utils.schedule import inverse_time_decay, exponential_decay, cosine_decay
+
+
+def test_inverse_time_decay():
+    assert_allclose(inverse_time_decay(0.5, 0, decay_rate=1), 0.5)
+    assert_allclose(inverse_time_decay(0.5, 2, decay_rate=1), 0.5/3)
+    assert_allclose(inverse_time_decay(0.5, 999, decay_rate=0.3, time_interval=1000), 0.5)
+    assert_allclose(inverse_time_decay(0.5, 1000, decay_rate=0.3, time_interval=1000), 0.5/1.3)
+
+
+def test_exponential_decay():
+    assert_allclose(exponential_decay(0.1, 3, decay_rate=0.5), 0.0125)
+    assert_allclose(exponential_decay(0.1, 3, decay_rate=0.5, time_interval=2), 0.05)
+
+
+def test_cosine_decay():
+    assert_allclose(cosine_decay(0.1, 0, 10), 0.1)
+    assert_allclose(cosine_decay(0.1, 5, 10), 0.05)
+    assert_allclose(cosine_decay(0.1, 20, 10, minimum=0.01), 0.01)
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose
+
+from nnlib.utils.sparse import issparse, matmul
+
+sp = pytest.importorskip("scipy.sparse")
+
+
+@pytest.mark.parametrize("format", ("csr", "csc"))
+def test_matmul(format):
+    rand = np.random.RandomState(0)
+    A = rand.randn(4, 30)
+    B = sp.random(30, 7, density=0.1, format=format, random_state=1)
+    out = np.empty((4, 7))
+
+    C = matmul(A, B)
+
+    assert(isinstance(C, np.ndarray))
+    assert_allclose(C, A @ B.toarray())
+    assert(matmul(A, B, out=out) is out)
+    assert_allclose(out, C)
+    assert_allclose(matmul(A, B.toarray()), C)
+
+
+def test_issparse():
+    assert(issparse(sp.csc_matrix(np.eye(3))))
+    assert(not issparse(np.eye(3)))
+
+
+def test_matmul_sparse_left():
+    rand = np.random.RandomState(0)
+    A = sp.random(7, 30, density=0.1, format="csr", random_state=1)
+    B = rand.randn(30, 4)
+
+    assert_allclose(matmul(A, B), A.toarray() @ B)
+    assert_allclose(matmul(A, sp.csc_matrix(B)), A.toarray() @ B)
@@ -1,7 +1,9 @@
 import numpy as np
 from numpy.testing import assert_allclose
 
-from nnlib.utils.update import update_parameters
+from nnlib.utils.update import (update_parameters, initialize_velocity, initialize_adam, update_parameters_with_momentum,
+                                update_parameters_with_rmsprop, update_parameters_with_adam)
+from nnlib.utils.flat import allocate_flat
 
 
 def test_update_parameters():
@@ -23,3 +25,91 @@ def test_update_parameters():
     assert_allclose(new_params["W"][2], W2*0.95)
     assert_allclose(new_params["b"][1], b1*0.95)
     assert_allclose(new_params["b"][2], b2*0.95)
+
+
+def test_update_parameters_flat():
+    parameters = allocate_flat([4, 3, 1])
+    parameters["flat"][:] = 1
+    W1 = parameters["W"][1]
+    grads = allocate_flat([4, 3, 1], keys=("dW", "db"))
+    grads["flat"][:] = 0.05
+
+    new_params = update_parameters(parameters, grads, learning_rate=1)
+
+    assert(new_params["W"][1] is W1)
+    assert_allclose(new_params["flat"], 0.95)
+
+
+def test_update_parameters_flat_layer_grads():
+    parameters = allocate_flat([4, 3, 1])
+    parameters["flat"][:] = 1
+    grads = {
+            "dW": {1: np.full((3, 4), 0.05), 2: np.full((1, 3), 0.05)},
+            "db": {1: np.full((3, 1), 0.05), 2: np.full((1, 1), 0.05)}
+                  }
+
+    update_parameters(parameters, grads, learning_rate=1)
+
+    assert_allclose(parameters["flat"], 0.95)
+
+
+def _parameters_and_grads(flat):
+    parameters = allocate_flat([4, 3, 1]) if flat else {
+            "W": {1: np.zeros((3, 4)), 2: np.zeros((1, 3))},
+            "b": {1: np.zeros((3, 1)), 2: np.zeros((1, 1))}
+            }
+    grads = allocate_flat([4, 3, 1], keys=("dW", "db")) if flat else {
+            "dW": {1: np.zeros((3, 4)), 2: np.zeros((1, 3))},
+            "db": {1: np.zeros((3, 1)), 2: np.zeros((1, 1))}
+            }
+    for l in (1, 2):
+        parameters["W"][l][...] = 1
+        parameters["b"][l][...] = 1
+        grads["dW"][l][...] = 0.5
+        grads["db"][l][...] = -0.5
+
+    return parameters, grads
+
+
+def test_update_parameters_with_momentum():
+    for flat in (False, True):
+        parameters, grads = _parameters_and_grads(flat)
+        v = initialize_velocity(parameters)
+        v_W1 = v["dW"][1]
+
+        update_parameters_with_momentum(parameters, grads, v, learning_rate=0.1, beta1=0.9)
+        update_parameters_with_momentum(parameters, grads, v, learning_rate=0.1, beta1=0.9)
+
+        assert(("flat" in v) == flat)
+        assert(v["dW"][1] is v_W1)
+        assert_allclose(v["dW"][1], 0.095)
+        assert_allclose(v["db"][2], -0.095)
+        assert_allclose(parameters["W"][1], 1 - 0.1*(0.05 + 0.095))
+        assert_allclose(parameters["b"][2], 1 + 0.1*(0.05 + 0.095))
+
+
+def test_update_parameters_with_rmsprop():
+    for flat in (False, True):
+        parameters, grads = _parameters_and_grads(flat)
+        s = initialize_velocity(parameters)
+
+        update_parameters_with_rmsprop(parameters, grads, s, learning_rate=0.1, beta2=0.9, epsilon=0)
+
+        assert_allclose(s["dW"][2], 0.025)
+        assert_allclose(parameters["W"][2], 1 - 0.1*0.5/np.sqrt(0.025))
+        assert_allclose(parameters["b"][1], 1 + 0.1*0.5/np.sqrt(0.025))
+
+
+def test_update_parameters_with_adam():
+    for flat in (False, True):
+        parameters, grads = _parameters_and_grads(flat)
+        v, s = initialize_adam(parameters)
+
+        for t in (1, 2):
+            update_parameters_with_adam(parameters, grads, v, s, t, learning_rate=0.01, epsilon=0)
+
+        # with constant gradients the bias corrected update is learning_rate * sign(gradient)
+        assert_allclose(parameters["W"][1], 1 - 0.02)
+        assert_allclose(parameters["b"][1], 1 + 0.02)
+        assert_allclose(v["dW"][1], 0.5 * (1 - 0.9**2))
+        assert_allclose(s["db"][2], 0.25 * (1 - 0.999**2))